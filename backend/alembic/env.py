@@ -0,0 +1,39 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+# python -m backend.app.migrate entrega conexão e metadata prontos; pela CLI do alembic
+# (executada em backend/) importamos o pacote app diretamente.
+connection = config.attributes.get("connection")
+target_metadata = config.attributes.get("target_metadata")
+if connection is None:
+    from app.database import Base, engine
+    from app import models  # noqa: F401  (registra as tabelas em Base.metadata)
+    target_metadata = Base.metadata
+
+
+def run_migrations_online():
+    def _executar(conn):
+        context.configure(
+            connection=conn,
+            target_metadata=target_metadata,
+            render_as_batch=conn.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+    if connection is not None:
+        _executar(connection)
+    else:
+        with engine.connect() as conn:
+            _executar(conn)
+
+
+if context.is_offline_mode():
+    raise SystemExit("Modo offline não suportado: execute contra um banco.")
+run_migrations_online()
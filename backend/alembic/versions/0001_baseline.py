@@ -0,0 +1,89 @@
+"""baseline: usuarios, clientes e documentos
+
+Substitui add_usuario_id.py e drop_logo_column.py. Em bancos existentes apenas
+acrescenta usuarioId e remove logoUrl quando necessário.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-11-01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.util import tem_tabela, colunas
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not tem_tabela("usuarios"):
+        op.create_table(
+            "usuarios",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("nome", sa.String(255), nullable=False),
+            sa.Column("login", sa.String(255), nullable=False, unique=True),
+            sa.Column("senhaHash", sa.String(255), nullable=False),
+            sa.Column("perfil", sa.String(30), nullable=False),
+            sa.Column("status", sa.String(20), nullable=False, server_default="A"),
+        )
+    elif "status" not in colunas("usuarios"):
+        op.add_column("usuarios", sa.Column("status", sa.String(20), nullable=False, server_default="A"))
+
+    if not tem_tabela("clientes"):
+        op.create_table(
+            "clientes",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("nomeCompleto", sa.String(255), nullable=False),
+            sa.Column("email", sa.String(255), nullable=False),
+            sa.Column("estadoCivil", sa.String(50), nullable=False),
+            sa.Column("profissao", sa.String(100), nullable=False),
+            sa.Column("cpf", sa.String(20), nullable=False),
+            sa.Column("rg", sa.String(50), nullable=False),
+            sa.Column("orgaoExpedidor", sa.String(50), nullable=False),
+            sa.Column("nit", sa.String(50), nullable=False),
+            sa.Column("numeroBeneficio", sa.String(50), nullable=False),
+            sa.Column("dataNascimento", sa.Date(), nullable=False),
+            sa.Column("nomeMae", sa.String(255), nullable=False),
+            sa.Column("nomePai", sa.String(255), nullable=False),
+            sa.Column("endereco", sa.Text(), nullable=False),
+            sa.Column("bairro", sa.String(100), nullable=False),
+            sa.Column("cidade", sa.String(100), nullable=False),
+            sa.Column("uf", sa.String(2), nullable=False),
+            sa.Column("usuarioId", sa.Uuid(), sa.ForeignKey("usuarios.id"), nullable=False),
+        )
+    else:
+        cols = colunas("clientes")
+        with op.batch_alter_table("clientes") as batch:
+            if "usuarioId" not in cols:
+                batch.add_column(sa.Column("usuarioId", sa.Uuid(), nullable=True))
+            if "logoUrl" in cols:
+                batch.drop_column("logoUrl")
+
+    if not tem_tabela("documentos"):
+        op.create_table(
+            "documentos",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("tipoDocumento", sa.String(100), nullable=False),
+            sa.Column("titulo", sa.String(255), nullable=False),
+            sa.Column("tomTexto", sa.String(50), nullable=False),
+            sa.Column("conteudo", sa.Text(), nullable=False),
+            sa.Column("status", sa.String(50), nullable=False),
+            sa.Column("dataCreacao", sa.Date(), nullable=False),
+            sa.Column("dataUltimaEdicao", sa.Date(), nullable=False),
+            sa.Column("geradoPorIA", sa.String(5), nullable=False, server_default="false"),
+            sa.Column("dadosFormulario", sa.Text(), nullable=True),
+            sa.Column("imagemUrl", sa.Text(), nullable=True),
+            sa.Column("usuarioId", sa.Uuid(), sa.ForeignKey("usuarios.id"), nullable=False),
+        )
+    elif "usuarioId" not in colunas("documentos"):
+        op.add_column("documentos", sa.Column("usuarioId", sa.Uuid(), nullable=True))
+
+
+def downgrade():
+    op.drop_table("documentos")
+    op.drop_table("clientes")
+    op.drop_table("usuarios")
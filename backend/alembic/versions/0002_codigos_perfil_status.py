@@ -0,0 +1,49 @@
+"""perfil/status de usuarios como códigos A/U e A/I
+
+Substitui convert_codes.py e convert_profile_status_codes.py, usando o framework de backfill.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-11-01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app import backfill
+from app.migrations.util import engine, limpar_backfill
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _legado(t):
+    return sa.or_(
+        sa.func.upper(t.c.perfil).in_(["ADMINISTRATIVO", "USUARIO"]),
+        sa.func.upper(t.c.status).in_(["ATIVO", "INATIVO"]),
+    )
+
+
+def _converter(conn, t, ids):
+    perfil = sa.func.upper(t.c.perfil)
+    status = sa.func.upper(t.c.status)
+    conn.execute(
+        t.update()
+        .where(t.c.id.in_(ids))
+        .values(
+            perfil=sa.case((perfil == "ADMINISTRATIVO", "A"), (perfil == "USUARIO", "U"), else_=t.c.perfil),
+            status=sa.case((status == "ATIVO", "A"), (status == "INATIVO", "I"), else_=t.c.status),
+        )
+    )
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        backfill.executar(engine(), "0002_codigos_perfil_status", "usuarios", _converter, filtro=_legado, tamanho_lote=500)
+
+
+def downgrade():
+    # Códigos curtos continuam válidos para a aplicação; só o progresso do backfill é descartado
+    limpar_backfill("0002_codigos_perfil_status")
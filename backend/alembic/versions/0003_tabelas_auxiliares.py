@@ -0,0 +1,97 @@
+"""tabelas auxiliares: estatísticas, idempotência, jobs, modelos, blobs e tombstones
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-11-01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.util import tem_tabela
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not tem_tabela("estatisticas_contadores"):
+        op.create_table(
+            "estatisticas_contadores",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("usuarioId", sa.Uuid(), sa.ForeignKey("usuarios.id"), nullable=False),
+            sa.Column("dimensao", sa.String(50), nullable=False),
+            sa.Column("chave", sa.String(255), nullable=False),
+            sa.Column("total", sa.Integer(), nullable=False),
+            sa.UniqueConstraint("usuarioId", "dimensao", "chave", name="uq_estatisticas_contadores"),
+        )
+    if not tem_tabela("chaves_idempotencia"):
+        op.create_table(
+            "chaves_idempotencia",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("usuarioId", sa.Uuid(), sa.ForeignKey("usuarios.id"), nullable=False),
+            sa.Column("chave", sa.String(255), nullable=False),
+            sa.Column("rota", sa.String(100), nullable=False),
+            sa.Column("hashRequisicao", sa.String(64), nullable=False),
+            sa.Column("statusCode", sa.Integer(), nullable=True),
+            sa.Column("resposta", sa.Text(), nullable=True),
+            sa.Column("expiraEm", sa.DateTime(), nullable=False),
+            sa.UniqueConstraint("usuarioId", "chave", name="uq_chaves_idempotencia"),
+        )
+        op.create_index("ix_chaves_idempotencia_expiraEm", "chaves_idempotencia", ["expiraEm"])
+    if not tem_tabela("modelos_documento"):
+        op.create_table(
+            "modelos_documento",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("usuarioId", sa.Uuid(), sa.ForeignKey("usuarios.id"), nullable=False),
+            sa.Column("nome", sa.String(255), nullable=False),
+            sa.Column("tipoDocumento", sa.String(100), nullable=False),
+            sa.Column("titulo", sa.String(255), nullable=False),
+            sa.Column("tomTexto", sa.String(50), nullable=False),
+            sa.Column("corpo", sa.Text(), nullable=False),
+            sa.Column("versao", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_modelos_documento_usuarioId", "modelos_documento", ["usuarioId"])
+    if not tem_tabela("jobs_geracao"):
+        op.create_table(
+            "jobs_geracao",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("usuarioId", sa.Uuid(), sa.ForeignKey("usuarios.id"), nullable=False),
+            sa.Column("clienteId", sa.Uuid(), sa.ForeignKey("clientes.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("parametros", sa.Text(), nullable=False),
+            sa.Column("documentoId", sa.Uuid(), sa.ForeignKey("documentos.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("erro", sa.Text(), nullable=True),
+            sa.Column("criadoEm", sa.DateTime(), nullable=False),
+            sa.Column("atualizadoEm", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_jobs_geracao_usuarioId", "jobs_geracao", ["usuarioId"])
+        op.create_index("ix_jobs_geracao_status", "jobs_geracao", ["status"])
+    if not tem_tabela("blobs"):
+        op.create_table(
+            "blobs",
+            sa.Column("hash", sa.String(64), primary_key=True),
+            sa.Column("tamanho", sa.BigInteger(), nullable=False),
+            sa.Column("mime", sa.String(100), nullable=False),
+            sa.Column("miniaturaHash", sa.String(64), nullable=True),
+            sa.Column("criadoEm", sa.DateTime(), nullable=False),
+        )
+    if not tem_tabela("registros_removidos"):
+        op.create_table(
+            "registros_removidos",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("tabela", sa.String(30), nullable=False),
+            sa.Column("registroId", sa.Uuid(), nullable=False),
+            sa.Column("usuarioId", sa.Uuid(), nullable=True),
+            sa.Column("removidoEm", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_registros_removidos_removidoEm", "registros_removidos", ["removidoEm"])
+        op.create_index("ix_registros_removidos_usuario_data", "registros_removidos", ["usuarioId", "removidoEm"])
+
+
+def downgrade():
+    for tabela in ("registros_removidos", "blobs", "jobs_geracao", "modelos_documento",
+                   "chaves_idempotencia", "estatisticas_contadores"):
+        op.drop_table(tabela)
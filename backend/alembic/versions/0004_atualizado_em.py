@@ -0,0 +1,64 @@
+"""atualizadoEm em clientes e documentos
+
+Coluna criada como opcional, preenchida em lotes fora da transação da migração
+(sem lock longo) e só então marcada NOT NULL. Substitui add_atualizado_em.py.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-11-01
+
+"""
+from datetime import datetime, time
+from alembic import op
+import sqlalchemy as sa
+
+from app import backfill
+from app.migrations.util import colunas, coluna_opcional, criar_indice, engine, limpar_backfill
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def _preencher_clientes(conn, t, ids):
+    conn.execute(t.update().where(t.c.id.in_(ids)).values(atualizadoEm=datetime.utcnow()))
+
+
+def _preencher_documentos(conn, t, ids):
+    # Melhor aproximação disponível: a data da última edição
+    linhas = conn.execute(sa.select(t.c.id, t.c.dataUltimaEdicao).where(t.c.id.in_(ids))).all()
+    conn.execute(
+        t.update().where(t.c.id == sa.bindparam("_id")).values(atualizadoEm=sa.bindparam("_ts")),
+        [{"_id": i, "_ts": datetime.combine(d, time()) if d else datetime.utcnow()} for i, d in linhas],
+    )
+
+
+def upgrade():
+    novas = [t for t in ("clientes", "documentos") if "atualizadoEm" not in colunas(t)]
+    for tabela in novas:
+        op.add_column(tabela, sa.Column("atualizadoEm", sa.DateTime(), nullable=True))
+    # Inclui execuções anteriores interrompidas: coluna já existe mas ainda é opcional
+    pendentes = [t for t in ("clientes", "documentos") if coluna_opcional(t, "atualizadoEm")]
+
+    with op.get_context().autocommit_block():
+        for tabela, preencher in (("clientes", _preencher_clientes), ("documentos", _preencher_documentos)):
+            if tabela in pendentes:
+                backfill.executar(engine(), f"0004_{tabela}_atualizadoEm", tabela, preencher,
+                                  filtro=lambda t: t.c.atualizadoEm.is_(None), reiniciar=tabela in novas)
+
+    for tabela in pendentes:
+        with op.batch_alter_table(tabela) as batch:
+            batch.alter_column("atualizadoEm", existing_type=sa.DateTime(), nullable=False)
+    criar_indice("ix_clientes_atualizadoEm", "clientes", ["atualizadoEm"])
+    criar_indice("ix_documentos_atualizadoEm", "documentos", ["atualizadoEm"])
+
+
+def downgrade():
+    op.drop_index("ix_documentos_atualizadoEm", table_name="documentos")
+    op.drop_index("ix_clientes_atualizadoEm", table_name="clientes")
+    with op.batch_alter_table("documentos") as batch:
+        batch.drop_column("atualizadoEm")
+    with op.batch_alter_table("clientes") as batch:
+        batch.drop_column("atualizadoEm")
+    limpar_backfill("0004_clientes_atualizadoEm", "0004_documentos_atualizadoEm")
@@ -0,0 +1,65 @@
+"""CPF/NIT somente dígitos, CPF único por escritório
+
+Normaliza os valores existentes em lotes (fora da transação da migração) e cria o
+índice único (usuarioId, cpf). Se já houver duplicados, a migração para e indica o
+relatório para resolvê-los antes de executar novamente.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-11-08
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+from app import backfill, duplicados
+from app.validacao import somente_digitos
+from app.migrations.util import criar_indice, engine, indices, limpar_backfill
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _filtro_mascara(dialeto: str):
+    # Apenas linhas com algum caractere não numérico; em outros bancos percorre todas
+    if dialeto == "postgresql":
+        return lambda t: sa.or_(t.c.cpf.op("~")("[^0-9]"), t.c.nit.op("~")("[^0-9]"))
+    if dialeto == "sqlite":
+        return lambda t: sa.or_(t.c.cpf.op("GLOB")("*[^0-9]*"), t.c.nit.op("GLOB")("*[^0-9]*"))
+    return None
+
+
+def _normalizar(conn, t, ids):
+    # atualizadoEm avança junto: clientes já sincronizados recebem o CPF/NIT novo no próximo /sync
+    linhas = conn.execute(sa.select(t.c.id, t.c.cpf, t.c.nit).where(t.c.id.in_(ids))).all()
+    conn.execute(
+        t.update().where(t.c.id == sa.bindparam("_id"))
+        .values(cpf=sa.bindparam("_cpf"), nit=sa.bindparam("_nit"), atualizadoEm=datetime.utcnow()),
+        [{"_id": i, "_cpf": somente_digitos(cpf), "_nit": somente_digitos(nit)} for i, cpf, nit in linhas],
+    )
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        # reiniciar: o filtro já torna a passagem idempotente e reexecuções pegam linhas novas
+        backfill.executar(engine(), "0005_cpf_nit_normalizados", "clientes", _normalizar,
+                          filtro=_filtro_mascara(op.get_bind().dialect.name), reiniciar=True)
+
+    if "uq_clientes_usuario_cpf" not in indices("clientes"):
+        repetidos = duplicados.contar(op.get_bind(), "cpf")
+        if repetidos:
+            raise RuntimeError(
+                f"{repetidos} CPF(s) repetidos no mesmo escritório. Gere o relatório com "
+                "`python -m backend.app.duplicados`, resolva os duplicados e execute a migração novamente."
+            )
+    criar_indice("uq_clientes_usuario_cpf", "clientes", ["usuarioId", "cpf"], unique=True)
+    criar_indice("ix_clientes_usuario_nit", "clientes", ["usuarioId", "nit"])
+
+
+def downgrade():
+    op.drop_index("ix_clientes_usuario_nit", table_name="clientes")
+    op.drop_index("uq_clientes_usuario_cpf", table_name="clientes")
+    limpar_backfill("0005_cpf_nit_normalizados")
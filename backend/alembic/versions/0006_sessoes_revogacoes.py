@@ -0,0 +1,46 @@
+"""sessões de login (refresh tokens) e log de revogações
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-11-12
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.util import tem_tabela
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not tem_tabela("sessoes"):
+        op.create_table(
+            "sessoes",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("usuarioId", sa.Uuid(), sa.ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("refreshJti", sa.String(64), nullable=False),
+            sa.Column("criadoEm", sa.DateTime(), nullable=False),
+            sa.Column("expiraEm", sa.DateTime(), nullable=False),
+            sa.Column("revogadoEm", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_sessoes_usuarioId", "sessoes", ["usuarioId"])
+        op.create_index("ix_sessoes_expiraEm", "sessoes", ["expiraEm"])
+    if not tem_tabela("revogacoes"):
+        op.create_table(
+            "revogacoes",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("tipo", sa.String(10), nullable=False),
+            sa.Column("valor", sa.String(64), nullable=False),
+            sa.Column("desde", sa.BigInteger(), nullable=True),
+            sa.Column("expiraEm", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_revogacoes_expiraEm", "revogacoes", ["expiraEm"])
+
+
+def downgrade():
+    op.drop_table("revogacoes")
+    op.drop_table("sessoes")
@@ -0,0 +1,37 @@
+"""log de auditoria (somente inserção)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-11-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.util import tem_tabela
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if tem_tabela("auditoria"):
+        return
+    op.create_table(
+        "auditoria",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True, autoincrement=True),
+        sa.Column("criadoEm", sa.DateTime(), nullable=False),
+        sa.Column("usuarioId", sa.Uuid(), nullable=True),
+        sa.Column("acao", sa.String(20), nullable=False),
+        sa.Column("tabela", sa.String(30), nullable=False),
+        sa.Column("registroId", sa.String(64), nullable=True),
+    )
+    op.create_index("ix_auditoria_criadoEm", "auditoria", ["criadoEm"])
+    op.create_index("ix_auditoria_registro", "auditoria", ["tabela", "registroId", "id"])
+    op.create_index("ix_auditoria_usuario", "auditoria", ["usuarioId", "id"])
+
+
+def downgrade():
+    op.drop_table("auditoria")
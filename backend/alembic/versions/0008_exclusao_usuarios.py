@@ -0,0 +1,43 @@
+"""exclusão lógica de usuários e progresso da remoção em segundo plano
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-11-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.util import colunas, criar_indice, tem_tabela
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "excluidoEm" not in colunas("usuarios"):
+        op.add_column("usuarios", sa.Column("excluidoEm", sa.DateTime(), nullable=True))
+    criar_indice("ix_usuarios_excluidoEm", "usuarios", ["excluidoEm"])
+    if not tem_tabela("exclusoes_usuario"):
+        op.create_table(
+            "exclusoes_usuario",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("usuarioId", sa.Uuid(), nullable=False),
+            sa.Column("destinoId", sa.Uuid(), nullable=True),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("etapa", sa.String(30), nullable=True),
+            sa.Column("processados", sa.Integer(), nullable=False),
+            sa.Column("erro", sa.Text(), nullable=True),
+            sa.Column("criadoEm", sa.DateTime(), nullable=False),
+            sa.Column("atualizadoEm", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_exclusoes_usuario_usuarioId", "exclusoes_usuario", ["usuarioId"])
+
+
+def downgrade():
+    op.drop_table("exclusoes_usuario")
+    op.drop_index("ix_usuarios_excluidoEm", table_name="usuarios")
+    with op.batch_alter_table("usuarios") as batch:
+        batch.drop_column("excluidoEm")
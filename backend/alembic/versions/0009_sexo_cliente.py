@@ -0,0 +1,26 @@
+"""sexo do cliente (regras de aposentadoria por idade)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-11-22
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.util import colunas
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "sexo" not in colunas("clientes"):
+        op.add_column("clientes", sa.Column("sexo", sa.String(1), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("clientes") as batch:
+        batch.drop_column("sexo")
@@ -0,0 +1,30 @@
+"""resumos diários de documentos nos contadores de estatísticas
+
+Os contadores das novas dimensões são calculados por stats.garantir_inicializado na
+primeira subida da aplicação após a migração.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2024-11-26
+
+"""
+from alembic import op
+
+from app.migrations.util import criar_indice
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    criar_indice("ix_estatisticas_contadores_dimensao_chave", "estatisticas_contadores", ["dimensao", "chave"])
+
+
+def downgrade():
+    op.drop_index("ix_estatisticas_contadores_dimensao_chave", table_name="estatisticas_contadores")
+    op.execute(
+        "DELETE FROM estatisticas_contadores "
+        "WHERE dimensao IN ('documentos_dia_criacao', 'documentos_dia_edicao')"
+    )
@@ -0,0 +1,76 @@
+"""dadosFormulario deduplicado em dados_formulario (endereçado por hash, com contagem de referências)
+
+Move o JSON de cada documento para a tabela compartilhada em lotes (fora da transação da
+migração) e remove a coluna antiga. Texto que não é JSON válido (já lido como nulo pela API)
+é descartado.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2024-12-02
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+from app import backfill, formularios
+from app.migrations.util import colunas, criar_indice, engine, limpar_backfill, tem_tabela
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def _ler(texto):
+    try:
+        return json.loads(texto) if texto else None
+    except ValueError:
+        return None
+
+
+def _deduplicar(conn, t, ids):
+    linhas = conn.execute(sa.select(t.c.id, t.c.dadosFormulario).where(t.c.id.in_(ids))).all()
+    hashes = formularios.referenciar(conn, [_ler(texto) for _, texto in linhas])
+    conn.execute(
+        t.update().where(t.c.id == sa.bindparam("_id"))
+        .values(dadosFormularioHash=sa.bindparam("_hash"), dadosFormulario=None),
+        [{"_id": i, "_hash": h} for (i, _), h in zip(linhas, hashes)],
+    )
+
+
+def upgrade():
+    if not tem_tabela("dados_formulario"):
+        op.create_table(
+            "dados_formulario",
+            sa.Column("hash", sa.String(64), primary_key=True),
+            sa.Column("conteudo", sa.Text(), nullable=False),
+            sa.Column("referencias", sa.Integer(), nullable=False),
+            sa.Column("criadoEm", sa.DateTime(), nullable=False),
+        )
+    if "dadosFormularioHash" not in colunas("documentos"):
+        op.add_column("documentos", sa.Column("dadosFormularioHash", sa.String(64), nullable=True))
+    criar_indice("ix_documentos_dadosFormularioHash", "documentos", ["dadosFormularioHash"])
+
+    if "dadosFormulario" in colunas("documentos"):
+        with op.get_context().autocommit_block():
+            # reiniciar: só linhas com a coluna antiga preenchida, que o lote esvazia
+            backfill.executar(engine(), "0011_dados_formulario", "documentos", _deduplicar,
+                              filtro=lambda t: t.c.dadosFormulario.isnot(None), reiniciar=True)
+        with op.batch_alter_table("documentos") as batch:
+            batch.drop_column("dadosFormulario")
+
+
+def downgrade():
+    op.add_column("documentos", sa.Column("dadosFormulario", sa.Text(), nullable=True))
+    op.execute(
+        'UPDATE documentos SET "dadosFormulario" = '
+        '(SELECT f.conteudo FROM dados_formulario f WHERE f.hash = documentos."dadosFormularioHash") '
+        'WHERE "dadosFormularioHash" IS NOT NULL'
+    )
+    op.drop_index("ix_documentos_dadosFormularioHash", table_name="documentos")
+    with op.batch_alter_table("documentos") as batch:
+        batch.drop_column("dadosFormularioHash")
+    op.drop_table("dados_formulario")
+    limpar_backfill("0011_dados_formulario")
@@ -0,0 +1,27 @@
+"""revogações de usuário com instante em milissegundos
+
+Tokens passam a levar iat com milissegundos; o "desde" das revogações de usuário
+acompanha, para que um login logo após a revogação não seja tratado como revogado.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2024-12-10
+
+"""
+from alembic import op
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+# Epoch em segundos fica abaixo disto até o ano 5138; em milissegundos, sempre acima
+_LIMITE = 100_000_000_000
+
+
+def upgrade():
+    op.execute(f"UPDATE revogacoes SET desde = desde * 1000 WHERE tipo = 'usuario' AND desde < {_LIMITE}")
+
+
+def downgrade():
+    op.execute(f"UPDATE revogacoes SET desde = desde / 1000 WHERE tipo = 'usuario' AND desde >= {_LIMITE}")
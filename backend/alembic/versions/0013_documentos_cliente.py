@@ -0,0 +1,78 @@
+"""clienteId indexado em documentos
+
+O filtro por cliente da exportação em pacote deixa de procurar o id dentro do JSON de
+dados_formulario (LIKE) e dos jobs de geração. A coluna é preenchida em lotes a partir
+dos jobs e do clienteId gravado pela mala direta no dadosFormulario.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2024-12-12
+
+"""
+import json
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+from app import backfill
+from app.migrations.util import colunas, criar_indice, engine, limpar_backfill
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+_BACKFILL = "0013_documentos_clienteId"
+
+
+def _cliente_do_formulario(texto):
+    try:
+        valor = json.loads(texto).get("clienteId") if texto else None
+        return uuid.UUID(valor) if valor else None
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+# Tabelas com os tipos declarados: depois de uma recriação em lote no SQLite, a reflexão
+# devolve as colunas UUID como CHAR(32)
+_documentos = sa.table("documentos", sa.column("id", sa.Uuid()), sa.column("dadosFormularioHash", sa.String()),
+                       sa.column("clienteId", sa.Uuid()))
+_jobs = sa.table("jobs_geracao", sa.column("documentoId", sa.Uuid()), sa.column("clienteId", sa.Uuid()))
+_formularios = sa.table("dados_formulario", sa.column("hash", sa.String()), sa.column("conteudo", sa.Text()))
+
+
+def _preencher(conn, t, ids):
+    d, f, j = _documentos, _formularios, _jobs
+    ids = [i if isinstance(i, uuid.UUID) else uuid.UUID(str(i)) for i in ids]
+    encontrados = {}
+    q = sa.select(d.c.id, f.c.conteudo).join(f, f.c.hash == d.c.dadosFormularioHash).where(d.c.id.in_(ids))
+    for documento_id, texto in conn.execute(q):
+        cliente_id = _cliente_do_formulario(texto)
+        if cliente_id is not None:
+            encontrados[documento_id] = cliente_id
+    q = sa.select(j.c.documentoId, j.c.clienteId).where(j.c.documentoId.in_(ids), j.c.clienteId.isnot(None))
+    encontrados.update(dict(conn.execute(q).all()))
+    if encontrados:
+        conn.execute(
+            d.update().where(d.c.id == sa.bindparam("_id")).values(clienteId=sa.bindparam("_cliente")),
+            [{"_id": i, "_cliente": c} for i, c in encontrados.items()],
+        )
+
+
+def upgrade():
+    nova = "clienteId" not in colunas("documentos")
+    if nova:
+        op.add_column("documentos", sa.Column("clienteId", sa.Uuid(), nullable=True))
+    criar_indice("ix_documentos_clienteId", "documentos", ["clienteId"])
+
+    with op.get_context().autocommit_block():
+        backfill.executar(engine(), _BACKFILL, "documentos", _preencher,
+                          filtro=lambda t: t.c.clienteId.is_(None), reiniciar=nova)
+
+
+def downgrade():
+    op.drop_index("ix_documentos_clienteId", table_name="documentos")
+    with op.batch_alter_table("documentos") as batch:
+        batch.drop_column("clienteId")
+    limpar_backfill(_BACKFILL)
@@ -0,0 +1,131 @@
+import os
+import sys
+import logging
+import argparse
+
+# Servidor de produção: python -m backend.app serve (ou python -m app serve dentro de backend/).
+# Por padrão usa o gerenciador de processos do próprio uvicorn (um worker por núcleo,
+# SIGHUP reinicia os workers um a um, SIGTTIN/SIGTTOU aumentam/diminuem a quantidade).
+# Com --gerenciador gunicorn (Linux, pacote opcional) a aplicação é carregada uma vez no
+# processo mestre antes do fork (preload), e SIGHUP troca os workers sem derrubar conexões.
+# Vários workers exigem EVENTOS_BACKEND=postgres para que o SSE (/eventos) veja as mudanças
+# feitas em qualquer processo.
+
+SERVIDOR_HOST = os.getenv("SERVIDOR_HOST", "0.0.0.0")
+SERVIDOR_PORTA = int(os.getenv("SERVIDOR_PORTA", "8000"))
+SERVIDOR_WORKERS = int(os.getenv("SERVIDOR_WORKERS", str(os.cpu_count() or 1)))
+SERVIDOR_BACKLOG = int(os.getenv("SERVIDOR_BACKLOG", "2048"))
+SERVIDOR_KEEPALIVE_SECONDS = int(os.getenv("SERVIDOR_KEEPALIVE_SECONDS", "5"))
+# Tempo para concluir requisições em andamento no encerramento/reinício de um worker
+SERVIDOR_ENCERRAMENTO_SECONDS = int(os.getenv("SERVIDOR_ENCERRAMENTO_SECONDS", "30"))
+# Recicla o worker após N requisições (0 = nunca); limita o efeito de vazamentos de memória
+SERVIDOR_MAX_REQUISICOES = int(os.getenv("SERVIDOR_MAX_REQUISICOES", "0"))
+# "auto" escolhe uvloop/httptools quando instalados (uvicorn[standard]) e asyncio/h11 caso contrário
+SERVIDOR_LOOP = os.getenv("SERVIDOR_LOOP", "auto")
+SERVIDOR_HTTP = os.getenv("SERVIDOR_HTTP", "auto")
+SERVIDOR_GERENCIADOR = os.getenv("SERVIDOR_GERENCIADOR", "uvicorn")
+# IPs dos proxies reversos confiáveis para X-Forwarded-For/Proto ("*" = qualquer um)
+SERVIDOR_PROXIES = os.getenv("SERVIDOR_PROXIES", "127.0.0.1")
+
+APP = f"{__package__}.main:app"
+
+logger = logging.getLogger("servidor")
+
+
+def _uvicorn(args):
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.porta,
+        workers=args.workers,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keepalive,
+        timeout_graceful_shutdown=args.encerramento,
+        limit_max_requests=args.max_requisicoes or None,
+        loop=args.loop,
+        http=args.http,
+        proxy_headers=True,
+        forwarded_allow_ips=args.proxies,
+        log_level=args.log,
+    )
+
+
+def _gunicorn(args):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("gunicorn não está instalado (pip install gunicorn); use --gerenciador uvicorn", file=sys.stderr)
+        return 1
+
+    def post_fork(servidor, worker):
+        # Conexões abertas no mestre durante o preload não podem ser compartilhadas entre processos
+        from .database import engine
+        engine.dispose(close=False)
+
+    opcoes = {
+        "bind": f"{args.host}:{args.porta}",
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "backlog": args.backlog,
+        "keepalive": args.keepalive,
+        "graceful_timeout": args.encerramento,
+        "max_requests": args.max_requisicoes,
+        "max_requests_jitter": args.max_requisicoes // 10,
+        "preload_app": True,
+        "post_fork": post_fork,
+        "forwarded_allow_ips": args.proxies,
+        "loglevel": args.log,
+    }
+
+    class Aplicacao(BaseApplication):
+        def load_config(self):
+            for chave, valor in opcoes.items():
+                self.cfg.set(chave, valor)
+
+        def load(self):
+            from .main import app
+            return app
+
+    Aplicacao().run()
+    return 0
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog=f"python -m {__package__}", description="Servidor da API JurixPrev")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("serve", help="inicia a API com vários workers")
+    p.add_argument("--host", default=SERVIDOR_HOST)
+    p.add_argument("--porta", "--port", type=int, default=SERVIDOR_PORTA)
+    p.add_argument("--workers", type=int, default=SERVIDOR_WORKERS, help="processos (padrão: núcleos da máquina)")
+    p.add_argument("--backlog", type=int, default=SERVIDOR_BACKLOG, help="fila de conexões pendentes do socket")
+    p.add_argument("--keepalive", type=int, default=SERVIDOR_KEEPALIVE_SECONDS, help="segundos de keep-alive ocioso")
+    p.add_argument("--encerramento", type=int, default=SERVIDOR_ENCERRAMENTO_SECONDS,
+                   help="segundos para concluir requisições ao encerrar/reiniciar um worker")
+    p.add_argument("--max-requisicoes", type=int, default=SERVIDOR_MAX_REQUISICOES,
+                   help="recicla o worker após N requisições (0 = nunca)")
+    p.add_argument("--loop", default=SERVIDOR_LOOP, choices=("auto", "asyncio", "uvloop"))
+    p.add_argument("--http", default=SERVIDOR_HTTP, choices=("auto", "h11", "httptools"))
+    p.add_argument("--gerenciador", default=SERVIDOR_GERENCIADOR, choices=("uvicorn", "gunicorn"))
+    p.add_argument("--proxies", default=SERVIDOR_PROXIES, help="IPs de proxies confiáveis para X-Forwarded-*")
+    p.add_argument("--log", default="info", choices=("critical", "error", "warning", "info", "debug"))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log.upper(), format="%(levelname)s:     %(message)s")
+    args.workers = max(1, args.workers)
+    # Lido por metricas.py nos workers: sem METRICAS_TOKEN, /metrics só atende com bind em loopback
+    os.environ["SERVIDOR_HOST"] = args.host
+    if args.host not in ("127.0.0.1", "::1", "localhost") and not os.getenv("METRICAS_TOKEN"):
+        logger.warning("Servidor exposto em %s sem METRICAS_TOKEN: /metrics responderá 403", args.host)
+    if args.workers > 1 and os.getenv("EVENTOS_BACKEND", "local") != "postgres":
+        logger.warning("%d workers com EVENTOS_BACKEND=local: /eventos só recebe mudanças do próprio processo",
+                       args.workers)
+    if args.gerenciador == "gunicorn":
+        return _gunicorn(args)
+    _uvicorn(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,55 @@
+from fastapi import HTTPException
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Política de acesso: administradores enxergam todos os escritórios, os demais usuários
+# apenas registros com o próprio usuarioId. O escopo vira condição na própria consulta
+# (um único SELECT/UPDATE/DELETE), em vez de carregar a linha e comparar depois.
+# Registros fora do escopo respondem 404, sem revelar que existem. Registros de usuários
+# com exclusão pendente (ver exclusao.py) somem já na exclusão lógica, antes da remoção física.
+
+PERFIS_ADMIN = ("A", "ADMINISTRATIVO")
+
+
+def is_admin(usuario) -> bool:
+    return (getattr(usuario, "perfil", None) or "U").upper() in PERFIS_ADMIN
+
+
+def escopo(usuario):
+    # usuarioId a aplicar nas consultas; None significa sem restrição (administrador)
+    return None if is_admin(usuario) else usuario.id
+
+
+def dono_excluido(coluna_usuario):
+    # Condição "o dono está com exclusão pendente"; usar negada (~) nas consultas sem escopo
+    u = models.Usuario
+    return exists().where(u.id == coluna_usuario, u.excluidoEm.isnot(None))
+
+
+def filtrar(query, modelo, usuario_id):
+    if usuario_id is None:
+        return query.filter(~dono_excluido(modelo.usuarioId))
+    return query.filter(modelo.usuarioId == usuario_id)
+
+
+def consultar(db: Session, modelo, usuario):
+    return filtrar(db.query(modelo), modelo, escopo(usuario))
+
+
+def obter(db: Session, modelo, registro_id, usuario, detalhe: str = "Registro não encontrado"):
+    registro = consultar(db, modelo, usuario).filter(modelo.id == registro_id).first()
+    if registro is None:
+        raise HTTPException(status_code=404, detail=detalhe)
+    return registro
+
+
+def exigir_admin(usuario, detalhe: str = "Sem permissão"):
+    if not is_admin(usuario):
+        raise HTTPException(status_code=403, detail=detalhe)
+
+
+def dono_permitido(usuario, usuario_id) -> bool:
+    # Pode agir em nome de usuario_id (ex.: ?usuarioId= em buscas de administrador)
+    return usuario_id is None or usuario_id == usuario.id or is_admin(usuario)
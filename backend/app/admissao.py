@@ -0,0 +1,169 @@
+import os
+import re
+import json
+import asyncio
+import time
+from collections import deque
+
+# Controle de admissão: limita as requisições em execução por worker para que uma rajada não
+# se acumule no threadpool e no pool de conexões até estourar timeouts em cascata.
+# - cada rota tem uma prioridade (login e gravação de documentos antes de listagens/exportações);
+# - parte das vagas fica reservada para a prioridade alta, e a baixa tem um teto próprio;
+# - sem vaga, a requisição espera numa fila limitada por prioridade; fila cheia ou espera
+#   esgotada respondem 503 com Retry-After imediatamente;
+# - vaga liberada vai para a fila de maior prioridade.
+# A vaga é mantida até o fim da resposta (inclusive streaming). Estado e métricas são por processo.
+
+ADMISSAO_ATIVA = os.getenv("ADMISSAO_ATIVA", "1") == "1"
+# Próximo do pool do banco (5 + 10 conexões por padrão): acima disso as requisições só esperariam conexão
+ADMISSAO_MAX_CONCORRENTES = int(os.getenv("ADMISSAO_MAX_CONCORRENTES", "15"))
+ADMISSAO_RESERVA_ALTA = int(os.getenv("ADMISSAO_RESERVA_ALTA", "3"))
+ADMISSAO_MAX_BAIXA = int(os.getenv("ADMISSAO_MAX_BAIXA", "4"))
+ADMISSAO_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSAO_RETRY_AFTER_SECONDS", "2"))
+
+ALTA = "alta"
+NORMAL = "normal"
+BAIXA = "baixa"
+PRIORIDADES = (ALTA, NORMAL, BAIXA)
+
+# (tamanho máximo da fila, espera máxima em segundos) por prioridade
+FILAS = {
+    ALTA: (int(os.getenv("ADMISSAO_FILA_ALTA", "200")), float(os.getenv("ADMISSAO_ESPERA_ALTA_SECONDS", "10"))),
+    NORMAL: (int(os.getenv("ADMISSAO_FILA_NORMAL", "100")), float(os.getenv("ADMISSAO_ESPERA_NORMAL_SECONDS", "5"))),
+    BAIXA: (int(os.getenv("ADMISSAO_FILA_BAIXA", "20")), float(os.getenv("ADMISSAO_ESPERA_BAIXA_SECONDS", "2"))),
+}
+
+# Primeira regra que casar (método, caminho) define a prioridade; None = fora do controle
+ROTAS = [
+    ("*", r"^/(health|metrics)$", None),
+    ("GET", r"^/eventos$", None),  # SSE: conexões longas não ocupam vaga
+    ("GET", r"^/documentos/jobs/[^/]+/events$", None),
+    ("*", r"^/auth/", ALTA),
+    ("POST", r"^/documentos$", ALTA),
+    ("PUT", r"^/documentos/[^/]+(/conteudo)?$", ALTA),
+    ("POST", r"^/documentos/(bundle|lote)$", BAIXA),
+    ("GET", r"^/documentos/[^/]+/(render|conteudo)$", BAIXA),
+    ("GET", r"^/(documentos|clientes|usuarios|modelos)$", BAIXA),
+    ("GET", r"^/(relatorios/.*|sync|auditoria)$", BAIXA),
+    ("*", r"", NORMAL),
+]
+_ROTAS = [(metodo, re.compile(padrao), prioridade) for metodo, padrao, prioridade in ROTAS]
+
+_ativos = {p: 0 for p in PRIORIDADES}
+_filas: dict[str, deque] = {p: deque() for p in PRIORIDADES}
+_contadores = {
+    p: {"aceitas": 0, "enfileiradas": 0, "rejeitadas_fila": 0, "rejeitadas_espera": 0, "espera_segundos": 0.0}
+    for p in PRIORIDADES
+}
+
+
+def prioridade(metodo: str, caminho: str) -> str | None:
+    for m, padrao, p in _ROTAS:
+        if (m == "*" or m == metodo) and padrao.search(caminho):
+            return p
+    return NORMAL
+
+
+def _pode_entrar(p: str) -> bool:
+    total = sum(_ativos.values())
+    if p == ALTA:
+        return total < ADMISSAO_MAX_CONCORRENTES
+    if total >= ADMISSAO_MAX_CONCORRENTES - ADMISSAO_RESERVA_ALTA:
+        return False
+    return p != BAIXA or _ativos[BAIXA] < ADMISSAO_MAX_BAIXA
+
+
+def _liberar(p: str):
+    _ativos[p] -= 1
+    # Entrega as vagas livres às filas, da maior para a menor prioridade
+    for q in PRIORIDADES:
+        fila = _filas[q]
+        while fila and _pode_entrar(q):
+            espera = fila.popleft()
+            if not espera.done():
+                _ativos[q] += 1
+                espera.set_result(None)
+
+
+async def _entrar(p: str) -> str | None:
+    # Retorna None se admitida ou o motivo da rejeição
+    fila = _filas[p]
+    if not fila and _pode_entrar(p):
+        _ativos[p] += 1
+        _contadores[p]["aceitas"] += 1
+        return None
+    tamanho, espera_max = FILAS[p]
+    if len(fila) >= tamanho:
+        _contadores[p]["rejeitadas_fila"] += 1
+        return "fila"
+    espera = asyncio.get_running_loop().create_future()
+    fila.append(espera)
+    _contadores[p]["enfileiradas"] += 1
+    inicio = time.monotonic()
+    try:
+        await asyncio.wait_for(asyncio.shield(espera), espera_max)
+    except asyncio.TimeoutError:
+        pass
+    except asyncio.CancelledError:
+        # Cliente desconectou enquanto esperava: devolve a vaga se ela já tinha sido concedida
+        if espera.done() and not espera.cancelled():
+            _liberar(p)
+        else:
+            _desistir(fila, espera)
+        raise
+    finally:
+        _contadores[p]["espera_segundos"] += time.monotonic() - inicio
+    if espera.done() and not espera.cancelled():
+        _contadores[p]["aceitas"] += 1
+        return None
+    _desistir(fila, espera)
+    _contadores[p]["rejeitadas_espera"] += 1
+    return "espera"
+
+
+def _desistir(fila: deque, espera):
+    espera.cancel()
+    try:
+        fila.remove(espera)
+    except ValueError:
+        pass
+
+
+async def _rejeitar(send):
+    corpo = json.dumps({"detail": "Servidor sobrecarregado, tente novamente em instantes"}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(corpo)).encode("ascii")),
+            (b"retry-after", str(ADMISSAO_RETRY_AFTER_SECONDS).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": corpo})
+
+
+class ControleAdmissao:
+    # Middleware ASGI; deve ficar dentro do CORS para que o 503 chegue legível ao navegador
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSAO_ATIVA or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        p = prioridade(scope["method"], scope["path"])
+        if p is None:
+            return await self.app(scope, receive, send)
+        if await _entrar(p) is not None:
+            return await _rejeitar(send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _liberar(p)
+
+
+def estado() -> dict:
+    return {
+        p: {"ativos": _ativos[p], "fila": len(_filas[p]), **_contadores[p]}
+        for p in PRIORIDADES
+    }
@@ -0,0 +1,118 @@
+import os
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import insert
+
+from . import models
+
+# Auditoria de leitura e escrita em clientes/documentos sem custo no caminho da requisição:
+# registrar() só enfileira em memória; uma thread grava em lotes (até AUDITORIA_LOTE eventos
+# ou AUDITORIA_INTERVALO_SECONDS após o primeiro evento do lote, o que vier antes)
+# com um único INSERT multi-linha. Fila cheia aplica backpressure por um prazo curto e,
+# esgotado, descarta o evento (contabilizado) em vez de atrasar a resposta.
+# No encerramento a fila é esvaziada antes de sair.
+
+AUDITORIA_LOTE = int(os.getenv("AUDITORIA_LOTE", "500"))
+AUDITORIA_INTERVALO_SECONDS = float(os.getenv("AUDITORIA_INTERVALO_SECONDS", "1"))
+AUDITORIA_FILA_MAX = int(os.getenv("AUDITORIA_FILA_MAX", "10000"))
+AUDITORIA_ESPERA_SECONDS = float(os.getenv("AUDITORIA_ESPERA_SECONDS", "0.05"))
+
+LISTAR = "listar"
+VISUALIZAR = "visualizar"
+CRIAR = "criar"
+ATUALIZAR = "atualizar"
+EXCLUIR = "excluir"
+
+logger = logging.getLogger(__name__)
+
+_fila: queue.Queue = queue.Queue(maxsize=AUDITORIA_FILA_MAX)
+_engine = None
+_thread: threading.Thread | None = None
+_parar = threading.Event()
+_contadores = {"gravados": 0, "descartados": 0, "falhas": 0}
+
+
+def registrar(usuario_id, acao: str, tabela: str, registro_id=None):
+    evento = {
+        "criadoEm": datetime.utcnow(),
+        "usuarioId": usuario_id,
+        "acao": acao,
+        "tabela": tabela,
+        "registroId": None if registro_id is None else str(registro_id),
+    }
+    try:
+        _fila.put(evento, timeout=AUDITORIA_ESPERA_SECONDS)
+    except queue.Full:
+        _contadores["descartados"] += 1
+
+
+def _gravar(lote: list[dict]) -> bool:
+    try:
+        with _engine.begin() as conn:
+            conn.execute(insert(models.Auditoria.__table__), lote)
+    except Exception:
+        _contadores["falhas"] += 1
+        logger.exception("Falha ao gravar lote de auditoria (%d eventos)", len(lote))
+        return False
+    _contadores["gravados"] += len(lote)
+    return True
+
+
+def _coletar(lote: list[dict], espera: float, janela: float):
+    # Bloqueia até o primeiro evento (ou espera); a partir dele junta eventos até completar
+    # AUDITORIA_LOTE ou passar a janela, para que tráfego baixo também seja gravado em lotes
+    try:
+        lote.append(_fila.get(timeout=espera))
+    except queue.Empty:
+        return
+    limite = time.monotonic() + janela
+    while len(lote) < AUDITORIA_LOTE:
+        try:
+            lote.append(_fila.get(timeout=max(limite - time.monotonic(), 0)))
+        except queue.Empty:
+            return
+
+
+def _loop():
+    lote: list[dict] = []
+    while not _parar.is_set():
+        _coletar(lote, AUDITORIA_INTERVALO_SECONDS, AUDITORIA_INTERVALO_SECONDS)
+        if lote and _gravar(lote):
+            lote = []
+        if lote:
+            # Falha de gravação: o lote é retido e a fila enche, acionando o backpressure
+            _parar.wait(AUDITORIA_INTERVALO_SECONDS)
+    # Encerramento: grava o que restou, sem esperar por novos eventos
+    while True:
+        _coletar(lote, 0, 0)
+        if not lote:
+            break
+        if not _gravar(lote):
+            break
+        lote = []
+
+
+def iniciar(engine):
+    global _engine, _thread
+    if _thread is not None:
+        return
+    _engine = engine
+    _parar.clear()
+    _thread = threading.Thread(target=_loop, name="auditoria", daemon=True)
+    _thread.start()
+
+
+def encerrar(timeout: float = 10):
+    global _thread
+    if _thread is None:
+        return
+    _parar.set()
+    _thread.join(timeout)
+    _thread = None
+
+
+def estado() -> dict:
+    return {"fila": _fila.qsize(), **_contadores}
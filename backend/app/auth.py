@@ -4,10 +4,20 @@ import json
 import time
 import base64
 import hashlib
+import uuid
 from typing import Any, Dict
 
+from . import revogacao
+
 SECRET_KEY = os.getenv("JWT_SECRET", "change-me-secret")
-TOKEN_TTL_SECONDS = int(os.getenv("TOKEN_TTL_SECONDS", "86400"))  # default: 24h
+# Access token curto; a sessão continua com o refresh token (POST /auth/refresh)
+TOKEN_TTL_SECONDS = int(os.getenv("TOKEN_TTL_SECONDS", "900"))  # default: 15min
+REFRESH_TOKEN_TTL_SECONDS = int(os.getenv("REFRESH_TOKEN_TTL_SECONDS", str(14 * 86400)))
+# Tokens emitidos antes dos refresh tokens duravam 24h; revogações por usuário cobrem esse prazo
+TOKEN_DURACAO_MAX_SECONDS = max(TOKEN_TTL_SECONDS, REFRESH_TOKEN_TTL_SECONDS, 86400)
+
+ACCESS = "access"
+REFRESH = "refresh"
 
 
 def _b64url(data: bytes) -> str:
@@ -21,7 +31,9 @@ def _b64url_decode(data: str) -> bytes:
 
 def create_token(payload: Dict[str, Any], ttl_seconds: int | None = None) -> str:
     ttl = ttl_seconds or TOKEN_TTL_SECONDS
-    body = {**payload, "iat": int(time.time()), "exp": int(time.time()) + ttl}
+    agora = time.time()
+    # iat em milissegundos: login logo após uma revogação do usuário (mesmo segundo) continua válido
+    body = {"jti": uuid.uuid4().hex, **payload, "iat": round(agora, 3), "exp": int(agora) + ttl}
     header = {"alg": "HS256", "typ": "JWT"}
     header_b64 = _b64url(json.dumps(header, separators=(",", ":")).encode("utf-8"))
     body_b64 = _b64url(json.dumps(body, separators=(",", ":")).encode("utf-8"))
@@ -31,7 +43,8 @@ def create_token(payload: Dict[str, Any], ttl_seconds: int | None = None) -> str
     return f"{header_b64}.{body_b64}.{signature_b64}"
 
 
-def decode_token(token: str) -> Dict[str, Any] | None:
+def decode_token(token: str, tipo: str = ACCESS) -> Dict[str, Any] | None:
+    # tipo: "access" ou "refresh"; tokens antigos sem "typ" valem como access
     try:
         parts = token.split(".")
         if len(parts) != 3:
@@ -44,6 +57,10 @@ def decode_token(token: str) -> Dict[str, Any] | None:
         body = json.loads(_b64url_decode(body_b64).decode("utf-8"))
         if int(body.get("exp", 0)) < int(time.time()):
             return None
+        if body.get("typ", ACCESS) != tipo:
+            return None
+        if revogacao.revogado(body):
+            return None
         return body
     except Exception:
         return None
\ No newline at end of file
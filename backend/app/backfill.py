@@ -0,0 +1,133 @@
+import time
+from datetime import datetime
+from typing import Any, Callable
+from sqlalchemy import (
+    Table, MetaData, Column, String, BigInteger, Boolean, DateTime, Uuid, select, func, insert, update,
+)
+from sqlalchemy.engine import Engine, Connection
+
+# Framework de backfill: percorre uma tabela em lotes ordenados pela chave (keyset), cada lote
+# em sua própria transação curta, gravando o progresso junto com o lote. Se o processo for
+# interrompido, a próxima execução continua da última chave confirmada.
+
+_metadata = MetaData()
+progresso = Table(
+    "backfill_progresso",
+    _metadata,
+    Column("nome", String(100), primary_key=True),
+    Column("ultimaChave", String(255), nullable=True),
+    Column("processados", BigInteger, nullable=False, default=0),
+    Column("concluido", Boolean, nullable=False, default=False),
+    Column("atualizadoEm", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+def _refletir(engine: Engine, tabela: str) -> Table:
+    # No SQLite colunas declaradas como UUID seriam refletidas como NUMERIC (afinidade de tipo)
+    if engine.dialect.name == "sqlite" and "UUID" not in engine.dialect.ischema_names:
+        engine.dialect.ischema_names = {**engine.dialect.ischema_names, "UUID": Uuid}
+    return Table(tabela, MetaData(), autoload_with=engine)
+
+
+def _converter_chave(coluna, valor: str | None):
+    if valor is None:
+        return None
+    try:
+        tipo = coluna.type.python_type
+    except NotImplementedError:
+        return valor
+    return valor if isinstance(valor, tipo) else tipo(valor)
+
+
+def _gravar_progresso(conn: Connection, nome: str, ultima, processados: int, concluido: bool):
+    valores = {
+        "ultimaChave": None if ultima is None else str(ultima),
+        "processados": processados,
+        "concluido": concluido,
+        "atualizadoEm": datetime.utcnow(),
+    }
+    res = conn.execute(update(progresso).where(progresso.c.nome == nome).values(**valores))
+    if res.rowcount == 0:
+        conn.execute(insert(progresso).values(nome=nome, **valores))
+
+
+def estado(engine: Engine) -> list[dict]:
+    _metadata.create_all(engine, tables=[progresso])
+    with engine.connect() as conn:
+        return [dict(r._mapping) for r in conn.execute(select(progresso).order_by(progresso.c.nome))]
+
+
+def executar(
+    engine: Engine,
+    nome: str,
+    tabela: str,
+    processar: Callable[[Connection, Table, list], Any],
+    filtro: Callable[[Table], Any] | None = None,
+    chave: str = "id",
+    tamanho_lote: int = 1000,
+    pausa: float = 0.0,
+    fator_pausa: float = 0.0,
+    reiniciar: bool = False,
+    relatar: Callable[[str], None] = print,
+) -> int:
+    """
+    Executa processar(conn, tabela, chaves) para cada lote de até `tamanho_lote` chaves
+    (filtradas por filtro(tabela), se informado). Entre lotes dorme `pausa` segundos mais
+    `fator_pausa` vezes a duração do lote, limitando a carga imposta ao banco.
+    Retorna o total de linhas processadas por este backfill (incluindo execuções anteriores).
+    """
+    _metadata.create_all(engine, tables=[progresso])
+    t = _refletir(engine, tabela)
+    coluna = t.c[chave]
+
+    with engine.begin() as conn:
+        atual = conn.execute(select(progresso).where(progresso.c.nome == nome)).first()
+        if reiniciar or atual is None:
+            ultima, processados = None, 0
+            _gravar_progresso(conn, nome, None, 0, False)
+        elif atual.concluido:
+            relatar(f"[backfill:{nome}] já concluído ({atual.processados} linhas)")
+            return atual.processados
+        else:
+            ultima, processados = _converter_chave(coluna, atual.ultimaChave), atual.processados
+            relatar(f"[backfill:{nome}] retomando após {processados} linhas (chave {atual.ultimaChave})")
+
+    with engine.connect() as conn:
+        q = select(func.count()).select_from(t)
+        if filtro is not None:
+            q = q.where(filtro(t))
+        if ultima is not None:
+            q = q.where(coluna > ultima)
+        restantes = conn.execute(q).scalar() or 0
+
+    inicio_geral = time.monotonic()
+    feitos = 0
+    while True:
+        inicio = time.monotonic()
+        with engine.begin() as conn:
+            q = select(coluna).order_by(coluna).limit(tamanho_lote)
+            if filtro is not None:
+                q = q.where(filtro(t))
+            if ultima is not None:
+                q = q.where(coluna > ultima)
+            chaves = list(conn.execute(q).scalars())
+            if not chaves:
+                _gravar_progresso(conn, nome, ultima, processados, True)
+                break
+            processar(conn, t, chaves)
+            ultima = chaves[-1]
+            processados += len(chaves)
+            feitos += len(chaves)
+            _gravar_progresso(conn, nome, ultima, processados, False)
+        duracao = time.monotonic() - inicio
+        decorrido = time.monotonic() - inicio_geral
+        taxa = feitos / decorrido if decorrido > 0 else 0.0
+        faltam = max(restantes - feitos, 0)
+        eta = f", ~{faltam / taxa:.0f}s restantes" if taxa > 0 else ""
+        relatar(f"[backfill:{nome}] {feitos}/{restantes} linhas ({taxa:.0f}/s{eta})")
+        espera = pausa + fator_pausa * duracao
+        if espera > 0:
+            time.sleep(espera)
+
+    relatar(f"[backfill:{nome}] concluído: {processados} linhas")
+    return processados
@@ -0,0 +1,175 @@
+import os
+import io
+import re
+import base64
+import hashlib
+import binascii
+import threading
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+try:
+    from PIL import Image  # opcional: sem Pillow, a miniatura é o próprio arquivo original
+except ImportError:
+    Image = None
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(_BACKEND_DIR, "data", "blobs"))
+BLOB_MAX_BYTES = int(os.getenv("BLOB_MAX_BYTES", str(10 * 1024 * 1024)))
+# Prefixo público das URLs gravadas em imagemUrl (ex.: http://localhost:8000); vazio = caminho relativo
+BLOB_URL_PREFIX = os.getenv("BLOB_URL_PREFIX", "")
+MINIATURA_TAMANHO = int(os.getenv("MINIATURA_TAMANHO", "256"))
+
+HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URL_RE = re.compile(r"^data:([\w.+-]+/[\w.+-]+)?((?:;[\w-]+=[^;,]*)*)(;base64)?,", re.IGNORECASE)
+
+
+class BlobMuitoGrande(Exception):
+    pass
+
+
+class ArmazenamentoLocal:
+    """
+    Backend em sistema de arquivos: <dir>/<hh>/<hash>. O mesmo conteúdo é gravado uma única vez.
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+
+    def caminho(self, hash_: str) -> str:
+        return os.path.join(self.diretorio, hash_[:2], hash_)
+
+    def existe(self, hash_: str) -> bool:
+        return os.path.exists(self.caminho(hash_))
+
+    def _tmp(self) -> str:
+        os.makedirs(self.diretorio, exist_ok=True)
+        return os.path.join(self.diretorio, f".upload.{os.getpid()}.{threading.get_ident()}.{os.urandom(4).hex()}")
+
+    def _publicar(self, tmp: str, hash_: str):
+        destino = self.caminho(hash_)
+        if os.path.exists(destino):
+            os.remove(tmp)
+            return
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(tmp, destino)
+
+    async def gravar_stream(self, chunks, limite: int = BLOB_MAX_BYTES) -> tuple[str, int]:
+        # Grava em arquivo temporário calculando o hash, sem manter o conteúdo em memória
+        h = hashlib.sha256()
+        tamanho = 0
+        tmp = self._tmp()
+        try:
+            with open(tmp, "wb") as f:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    tamanho += len(chunk)
+                    if tamanho > limite:
+                        raise BlobMuitoGrande()
+                    h.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        hash_ = h.hexdigest()
+        self._publicar(tmp, hash_)
+        return hash_, tamanho
+
+    def gravar_bytes(self, dados: bytes) -> str:
+        hash_ = hashlib.sha256(dados).hexdigest()
+        if self.existe(hash_):
+            return hash_
+        tmp = self._tmp()
+        with open(tmp, "wb") as f:
+            f.write(dados)
+        self._publicar(tmp, hash_)
+        return hash_
+
+
+armazenamento = ArmazenamentoLocal(BLOB_DIR)
+
+
+def url_blob(hash_: str) -> str:
+    return f"{BLOB_URL_PREFIX}/blobs/{hash_}"
+
+
+def registrar(db: Session, hash_: str, tamanho: int, mime: str, commit: bool = True):
+    blob = db.get(models.Blob, hash_)
+    if blob is None:
+        # Mesmo arquivo enviado em paralelo: quem perde o INSERT (savepoint) usa o registro do outro
+        try:
+            with db.begin_nested():
+                blob = models.Blob(hash=hash_, tamanho=tamanho, mime=mime or "application/octet-stream")
+                db.add(blob)
+        except IntegrityError:
+            blob = db.get(models.Blob, hash_)
+        if commit:
+            db.commit()
+    return blob
+
+
+def get_blob(db: Session, hash_: str):
+    if not HASH_RE.match(hash_ or ""):
+        return None
+    return db.get(models.Blob, hash_)
+
+
+def extrair_data_url(valor: str | None) -> tuple[str, bytes] | None:
+    # "data:image/png;base64,AAAA" -> ("image/png", b"...")
+    if not valor or not valor.startswith("data:"):
+        return None
+    m = _DATA_URL_RE.match(valor)
+    if not m:
+        return None
+    mime = (m.group(1) or "text/plain").lower()
+    dados = valor[m.end():]
+    try:
+        if m.group(3):
+            conteudo = base64.b64decode(dados, validate=False)
+        else:
+            from urllib.parse import unquote_to_bytes
+            conteudo = unquote_to_bytes(dados)
+    except (binascii.Error, ValueError):
+        return None
+    return mime, conteudo
+
+
+def internalizar_imagem(db: Session, valor: str | None) -> str | None:
+    # Data URLs inline viram blobs; o documento guarda apenas a URL curta
+    extraido = extrair_data_url(valor)
+    if extraido is None:
+        return valor
+    mime, conteudo = extraido
+    hash_ = armazenamento.gravar_bytes(conteudo)
+    registrar(db, hash_, len(conteudo), mime, commit=False)
+    return url_blob(hash_)
+
+
+def gerar_miniatura(db: Session, blob) -> str | None:
+    # Retorna o hash da miniatura (gerando e gravando se necessário); None se não for imagem
+    if blob.miniaturaHash:
+        return blob.miniaturaHash
+    if Image is None or not (blob.mime or "").startswith("image/"):
+        return None
+    try:
+        with Image.open(armazenamento.caminho(blob.hash)) as img:
+            img.thumbnail((MINIATURA_TAMANHO, MINIATURA_TAMANHO))
+            saida = io.BytesIO()
+            if img.mode in ("RGBA", "LA", "P"):
+                img.save(saida, format="PNG", optimize=True)
+                mime = "image/png"
+            else:
+                img.convert("RGB").save(saida, format="JPEG", quality=85)
+                mime = "image/jpeg"
+    except Exception:
+        return None
+    dados = saida.getvalue()
+    hash_ = armazenamento.gravar_bytes(dados)
+    registrar(db, hash_, len(dados), mime, commit=False)
+    blob.miniaturaHash = hash_
+    db.commit()
+    return hash_
@@ -0,0 +1,224 @@
+import io
+import os
+import zlib
+import codecs
+import hashlib
+import tempfile
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+
+from . import models, acesso, eventos
+from .render import CacheRender
+
+# Conteúdo de documentos como texto bruto, sem passar pelo JSON:
+# - upload: o corpo (opcionalmente gzip) é validado como UTF-8 e gravado em arquivo temporário
+#   à medida que chega; só depois de completo vai ao banco, em blocos de CONTEUDO_BLOCO (a
+#   memória por requisição não depende do tamanho do documento). No Postgres os blocos vão
+#   para um large object e a coluna recebe o valor inteiro num único UPDATE (concatenar na
+#   coluna regravaria o valor a cada bloco: E/S quadrática); nos demais bancos (SQLite, só
+#   desenvolvimento) os blocos são concatenados na própria coluna;
+# - download: o texto é lido do banco em blocos (substr) para um arquivo no cache em disco,
+#   endereçado pela versão do documento (atualizadoEm), e servido com Content-Length/Range.
+#   Uma cópia gzip é gerada na mesma passada para clientes que aceitam compressão.
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+CONTEUDO_MAX_BYTES = int(os.getenv("CONTEUDO_MAX_BYTES", str(50 * 1024 * 1024)))  # após descompressão
+CONTEUDO_BLOCO = int(os.getenv("CONTEUDO_BLOCO", str(1024 * 1024)))  # tamanho de cada bloco lido do banco ou gravado nele
+CONTEUDO_CACHE_DIR = os.getenv("CONTEUDO_CACHE_DIR", os.path.join(_BACKEND_DIR, ".cache", "conteudo"))
+CONTEUDO_CACHE_MAX_BYTES = int(os.getenv("CONTEUDO_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+TEXTO = "txt"
+TEXTO_GZIP = "txt.gz"
+_LEITURA_BYTES = 64 * 1024
+
+cache = CacheRender(CONTEUDO_CACHE_DIR, CONTEUDO_CACHE_MAX_BYTES)
+
+
+class ConteudoMuitoGrande(Exception):
+    pass
+
+
+class ConteudoInvalido(Exception):
+    pass
+
+
+class _VersaoAlterada(Exception):
+    pass
+
+
+def obter_versao(db: Session, documento_id, usuario):
+    # Autorização e versão sem carregar a coluna conteudo
+    d = models.Documento
+    q = db.query(d.id, d.usuarioId, d.titulo, d.atualizadoEm).filter(d.id == documento_id)
+    return acesso.filtrar(q, d, acesso.escopo(usuario)).first()
+
+
+def chave(documento_id, atualizado_em) -> str:
+    return hashlib.sha256(f"{documento_id}:{atualizado_em.isoformat()}".encode("utf-8")).hexdigest()
+
+
+async def receber(chunks, codificacao: str | None = None):
+    # Retorna um arquivo temporário com o texto em UTF-8 (posicionado no início)
+    codificacao = (codificacao or "identity").strip().lower()
+    if codificacao not in ("identity", "gzip"):
+        raise ConteudoInvalido(f"Content-Encoding não suportado: {codificacao}")
+    descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if codificacao == "gzip" else None
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    tmp = tempfile.TemporaryFile()
+    tamanho = 0
+
+    def aceitar(dados: bytes):
+        nonlocal tamanho
+        tamanho += len(dados)
+        if tamanho > CONTEUDO_MAX_BYTES:
+            raise ConteudoMuitoGrande()
+        try:
+            texto = decodificador.decode(dados)
+        except UnicodeDecodeError:
+            raise ConteudoInvalido("Conteúdo não é UTF-8 válido")
+        if "\x00" in texto:
+            raise ConteudoInvalido("Conteúdo contém caractere nulo")
+        tmp.write(dados)
+
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            if descompressor is None:
+                aceitar(chunk)
+                continue
+            # max_length limita a memória mesmo com taxas de compressão extremas
+            try:
+                dados = descompressor.decompress(chunk, _LEITURA_BYTES)
+                while dados:
+                    aceitar(dados)
+                    dados = descompressor.decompress(descompressor.unconsumed_tail, _LEITURA_BYTES)
+            except zlib.error:
+                raise ConteudoInvalido("Corpo gzip inválido")
+        if descompressor is not None and not descompressor.eof:
+            raise ConteudoInvalido("Corpo gzip incompleto")
+        try:
+            decodificador.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise ConteudoInvalido("Conteúdo não é UTF-8 válido")
+    except BaseException:
+        tmp.close()
+        raise
+    tmp.seek(0)
+    return tmp
+
+
+def _gravar_large_object(db: Session, documento_id, arquivo):
+    # O large object é transacional: num rollback some junto com o resto
+    d = models.Documento
+    oid = db.execute(select(func.lo_create(0))).scalar_one()
+    posicao = 0
+    while dados := arquivo.read(CONTEUDO_BLOCO):
+        db.execute(select(func.lo_put(oid, posicao, dados)))
+        posicao += len(dados)
+    db.execute(
+        update(d).where(d.id == documento_id)
+        .values(conteudo=func.convert_from(func.lo_get(oid), "UTF8"))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(select(func.lo_unlink(oid)))
+
+
+def _gravar_em_blocos(db: Session, documento_id, arquivo):
+    # Blocos em caracteres (não bytes) para nunca partir um caractere UTF-8 ao meio
+    d = models.Documento
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8", newline="")
+    try:
+        db.execute(update(d).where(d.id == documento_id).values(conteudo="").execution_options(synchronize_session=False))
+        while bloco := texto.read(CONTEUDO_BLOCO):
+            db.execute(
+                update(d).where(d.id == documento_id)
+                .values(conteudo=d.conteudo + bloco)
+                .execution_options(synchronize_session=False)
+            )
+    finally:
+        texto.detach()
+
+
+def gravar(db: Session, documento, arquivo):
+    # documento: linha de obter_versao(); retorna a nova versão (atualizadoEm)
+    d = models.Documento
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            _gravar_large_object(db, documento.id, arquivo)
+        else:
+            _gravar_em_blocos(db, documento.id, arquivo)
+        atualizado_em = db.execute(select(d.atualizadoEm).where(d.id == documento.id)).scalar_one()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    eventos.publicar_mudanca("documentos", "update", [documento.id], documento.usuarioId)
+    return atualizado_em
+
+
+def _materializar(db: Session, documento_id, chave_: str, formato: str) -> str | None:
+    # Copia o conteúdo do banco para o cache (texto e gzip) lendo substr() em blocos.
+    # Retorna o link fixado de formato; None se o documento mudou durante a leitura
+    d = models.Documento
+    tmp_texto = cache.temporario(chave_, TEXTO)
+    tmp_gzip = cache.temporario(chave_, TEXTO_GZIP)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        with open(tmp_texto, "wb") as f_texto, open(tmp_gzip, "wb") as f_gzip:
+            inicio = 1
+            while True:
+                bloco = db.execute(
+                    select(func.substr(d.conteudo, inicio, CONTEUDO_BLOCO)).where(d.id == documento_id)
+                ).scalar()
+                if not bloco:
+                    break
+                dados = bloco.encode("utf-8")
+                f_texto.write(dados)
+                f_gzip.write(compressor.compress(dados))
+                inicio += len(bloco)
+                if len(bloco) < CONTEUDO_BLOCO:
+                    break
+            f_gzip.write(compressor.flush())
+        # Conteúdo alterado durante a leitura: a cópia pode misturar versões
+        atual = db.execute(select(d.atualizadoEm).where(d.id == documento_id)).scalar()
+        db.rollback()
+        if atual is None or chave(documento_id, atual) != chave_:
+            raise _VersaoAlterada()
+    except BaseException as e:
+        for tmp in (tmp_texto, tmp_gzip):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        if isinstance(e, _VersaoAlterada):
+            return None
+        raise
+    # O formato pedido é publicado por último e já fixado, antes de qualquer despejo
+    outro, tmp_outro, tmp_pedido = (
+        (TEXTO, tmp_texto, tmp_gzip) if formato == TEXTO_GZIP else (TEXTO_GZIP, tmp_gzip, tmp_texto)
+    )
+    cache.publicar(chave_, outro, tmp_outro)
+    return cache.publicar(chave_, formato, tmp_pedido, fixar=True)
+
+
+def etag(chave_: str, gzip: bool = False) -> str:
+    # Cada representação tem a sua ETag forte: os bytes da cópia gzip são outros
+    return f'"{chave_}-gzip"' if gzip else f'"{chave_}"'
+
+
+def arquivo(db: Session, documento, gzip: bool = False) -> tuple[str, str] | None:
+    # Retorna (link fixado em cache, chave da versão) da versão atual; None se o documento
+    # sumiu. O chamador libera o link com cache.liberar()
+    formato = TEXTO_GZIP if gzip else TEXTO
+    for _ in range(3):
+        chave_ = chave(documento.id, documento.atualizadoEm)
+        caminho = cache.obter(chave_, formato)
+        if caminho is not None:
+            return caminho, chave_
+        caminho = _materializar(db, documento.id, chave_, formato)
+        if caminho is not None:
+            return caminho, chave_
+        d = models.Documento
+        documento = db.query(d.id, d.atualizadoEm).filter(d.id == documento.id).first()
+        if documento is None:
+            return None
+    raise RuntimeError("Documento alterado continuamente durante a leitura")
@@ -1,18 +1,24 @@
 from sqlalchemy.orm import Session
-from . import models, schemas
-import hashlib
+from . import models, schemas, stats, blobs, eventos, sync, acesso, senhas, sessoes, exclusao, formularios
 
 
-def list_clientes(db: Session):
-    return db.query(models.Cliente).all()
+def list_clientes(db: Session, usuario_id=None):
+    # usuario_id=None: todos os escritórios (ver acesso.escopo)
+    return acesso.filtrar(db.query(models.Cliente), models.Cliente, usuario_id).all()
 
 
-def list_clientes_by_usuario(db: Session, usuario_id):
-    return db.query(models.Cliente).filter(models.Cliente.usuarioId == usuario_id).all()
+def get_cliente(db: Session, cliente_id, usuario_id=None):
+    q = db.query(models.Cliente).filter(models.Cliente.id == cliente_id)
+    return acesso.filtrar(q, models.Cliente, usuario_id).first()
 
 
-def get_cliente(db: Session, cliente_id):
-    return db.query(models.Cliente).filter(models.Cliente.id == cliente_id).first()
+def get_cliente_por_cpf(db: Session, cpf: str, usuario_id):
+    # cpf já normalizado (somente dígitos); usa o índice único (usuarioId, cpf)
+    return (
+        db.query(models.Cliente)
+        .filter(models.Cliente.usuarioId == usuario_id, models.Cliente.cpf == cpf)
+        .first()
+    )
 
 
 def create_cliente(db: Session, payload: schemas.ClienteCreate, usuario_id):
@@ -20,39 +26,49 @@ def create_cliente(db: Session, payload: schemas.ClienteCreate, usuario_id):
     data["usuarioId"] = usuario_id
     cliente = models.Cliente(**data)
     db.add(cliente)
+    stats.aplicar(db, usuario_id, [], stats.chaves_cliente(cliente))
     db.commit()
     db.refresh(cliente)
+    eventos.publicar_mudanca("clientes", "create", [cliente.id], cliente.usuarioId)
     return cliente
 
 
 def update_cliente(db: Session, cliente, payload: schemas.ClienteUpdate):
+    antes = stats.chaves_cliente(cliente)
     for k, v in payload.model_dump().items():
         setattr(cliente, k, v)
+    stats.aplicar(db, cliente.usuarioId, antes, stats.chaves_cliente(cliente))
     db.commit()
     db.refresh(cliente)
+    eventos.publicar_mudanca("clientes", "update", [cliente.id], cliente.usuarioId)
     return cliente
 
 
 def delete_cliente(db: Session, cliente):
+    cliente_id, usuario_id = cliente.id, cliente.usuarioId
+    stats.aplicar(db, usuario_id, stats.chaves_cliente(cliente), [])
+    sync.registrar_remocao(db, "clientes", cliente_id, usuario_id)
     db.delete(cliente)
     db.commit()
+    eventos.publicar_mudanca("clientes", "delete", [cliente_id], usuario_id)
 
 
 # Usuarios
-def get_usuario_por_email(db: Session, email: str):
-    # Mantido apenas por compatibilidade, usa coluna 'login' se necessário
-    return db.query(models.Usuario).filter(models.Usuario.login == email).first()
+def _usuarios(db: Session, incluir_excluidos: bool = False):
+    q = db.query(models.Usuario)
+    return q if incluir_excluidos else q.filter(models.Usuario.excluidoEm.is_(None))
 
-def get_usuario_por_login(db: Session, login: str):
-    return db.query(models.Usuario).filter(models.Usuario.login == login).first()
+
+def get_usuario_por_login(db: Session, login: str, incluir_excluidos: bool = False):
+    # Login de usuário excluído só fica livre quando a remoção em segundo plano termina
+    return _usuarios(db, incluir_excluidos).filter(models.Usuario.login == login).first()
 
 def list_usuarios(db: Session):
-    return db.query(models.Usuario).all()
+    return _usuarios(db).all()
 
 
 def create_usuario(db: Session, payload: schemas.UsuarioCreate):
-    # hashing simples para demo; em produção, usar bcrypt/argon2
-    senha_hash = hashlib.sha256(payload.senha.encode('utf-8')).hexdigest()
+    senha_hash = senhas.gerar_hash(payload.senha)
     perfil = getattr(payload, 'perfil', 'U') or 'U'
     status = getattr(payload, 'status', 'A') or 'A'
     usuario = models.Usuario(nome=payload.nome, login=payload.login, senhaHash=senha_hash, perfil=perfil, status=status)
@@ -61,88 +77,215 @@ def create_usuario(db: Session, payload: schemas.UsuarioCreate):
     db.refresh(usuario)
     return usuario
 
-def get_usuario_por_id(db: Session, usuario_id):
-    return db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
+def get_usuario_por_id(db: Session, usuario_id, incluir_excluidos: bool = False):
+    return _usuarios(db, incluir_excluidos).filter(models.Usuario.id == usuario_id).first()
 
 def update_usuario(db: Session, usuario_id, payload: schemas.UsuarioUpdate):
     usuario = get_usuario_por_id(db, usuario_id)
     if not usuario:
         return None
+    estava_ativo = usuario_ativo(usuario)
     usuario.nome = payload.nome
     usuario.perfil = getattr(payload, 'perfil', usuario.perfil) or usuario.perfil
     if getattr(payload, 'status', None):
         usuario.status = payload.status  # type: ignore
+    revogar = estava_ativo and not usuario_ativo(usuario)
     if getattr(payload, 'senha', None):
-        usuario.senhaHash = hashlib.sha256(payload.senha.encode('utf-8')).hexdigest()
+        usuario.senhaHash = senhas.gerar_hash(payload.senha)
+        revogar = True
+    if revogar:
+        sessoes.revogar_usuario(db, usuario.id, commit=False)
     db.commit()
     db.refresh(usuario)
     return usuario
 
-def delete_usuario(db: Session, usuario_id):
-    usuario = get_usuario_por_id(db, usuario_id)
+def delete_usuario(db: Session, usuario_id, destino_id=None):
+    # Exclusão lógica imediata; clientes/documentos/modelos são apagados (ou reatribuídos a
+    # destino_id) em segundo plano. Retorna a tarefa de exclusão ou None se não encontrado.
+    usuario = get_usuario_por_id(db, usuario_id, incluir_excluidos=True)
     if not usuario:
-        return False
-    db.delete(usuario)
-    db.commit()
-    return True
+        return None
+    if usuario.excluidoEm is not None:
+        tarefa = exclusao.obter(db, usuario.id)
+        if tarefa is not None and tarefa.status == exclusao.FALHOU:
+            return exclusao.reagendar(db, tarefa)
+        return tarefa
+    return exclusao.agendar(db, usuario, destino_id)
 
 
-def verificar_login(db: Session, login: str, senha: str):
-    usuario = get_usuario_por_login(db, login)
-    if not usuario:
-        return None
-    # Bloqueia login de usuário inativo
-    status_val = (getattr(usuario, 'status', 'A') or 'A').upper()
+def usuario_ativo(usuario) -> bool:
     # Compatível com valores antigos ('ATIVO'/'INATIVO')
-    if status_val not in ('A', 'ATIVO'):
-        return None
-    senha_hash = hashlib.sha256(senha.encode('utf-8')).hexdigest()
-    return usuario if usuario.senhaHash == senha_hash else None
+    return (getattr(usuario, 'status', 'A') or 'A').upper() in ('A', 'ATIVO')
 
 
-# Documentos
-def list_documentos(db: Session):
-    return db.query(models.Documento).all()
+def regravar_senha(db: Session, usuario, novo_hash: str):
+    # Só substitui se o hash não mudou desde a verificação (troca de senha concorrente vence)
+    db.query(models.Usuario).filter(
+        models.Usuario.id == usuario.id, models.Usuario.senhaHash == usuario.senhaHash
+    ).update({models.Usuario.senhaHash: novo_hash}, synchronize_session=False)
+    db.commit()
 
 
-def list_documentos_by_usuario(db: Session, usuario_id):
-    return db.query(models.Documento).filter(models.Documento.usuarioId == usuario_id).all()
+# Documentos
+def list_documentos(db: Session, usuario_id=None):
+    return acesso.filtrar(db.query(models.Documento), models.Documento, usuario_id).all()
 
 
-def get_documento(db: Session, documento_id):
-    return db.query(models.Documento).filter(models.Documento.id == documento_id).first()
+def get_documento(db: Session, documento_id, usuario_id=None):
+    q = db.query(models.Documento).filter(models.Documento.id == documento_id)
+    return acesso.filtrar(q, models.Documento, usuario_id).first()
 
 
-def create_documento(db: Session, payload: schemas.DocumentoCreate, usuario_id=None):
-    # serializa dadosFormulario para texto
+def create_documento(db: Session, payload: schemas.DocumentoCreate, usuario_id=None, commit: bool = True, cliente_id=None):
+    # commit=False: só flush, dentro da transação do chamador (que publica o evento depois do commit)
     data = payload.model_dump()
-    if data.get("dadosFormulario") is not None:
-        import json
-        data["dadosFormulario"] = json.dumps(data["dadosFormulario"], ensure_ascii=False)
+    # dadosFormulario vai para a tabela compartilhada; o documento guarda o hash
+    data["dadosFormularioHash"] = formularios.referenciar(db, [data.pop("dadosFormulario", None)])[0]
     # converter geradoPorIA bool -> 'true'/'false'
     data["geradoPorIA"] = "true" if data.get("geradoPorIA") else "false"
+    # imagens inline (data URL) vão para o blob store
+    data["imagemUrl"] = blobs.internalizar_imagem(db, data.get("imagemUrl"))
     if usuario_id:
         data["usuarioId"] = usuario_id
+    if cliente_id:
+        data["clienteId"] = cliente_id
     documento = models.Documento(**data)
     db.add(documento)
+    stats.aplicar(db, documento.usuarioId, [], stats.chaves_documento(documento))
+    if not commit:
+        db.flush()
+        return documento
     db.commit()
     db.refresh(documento)
+    eventos.publicar_mudanca("documentos", "create", [documento.id], documento.usuarioId)
     return documento
 
 
 def update_documento(db: Session, documento, payload: schemas.DocumentoUpdate):
     data = payload.model_dump()
-    if data.get("dadosFormulario") is not None:
-        import json
-        data["dadosFormulario"] = json.dumps(data["dadosFormulario"], ensure_ascii=False)
+    data["dadosFormularioHash"] = formularios.trocar(db, documento.dadosFormularioHash, data.pop("dadosFormulario", None))
     data["geradoPorIA"] = "true" if data.get("geradoPorIA") else "false"
+    data["imagemUrl"] = blobs.internalizar_imagem(db, data.get("imagemUrl"))
+    antes = stats.chaves_documento(documento)
     for k, v in data.items():
         setattr(documento, k, v)
+    stats.aplicar(db, documento.usuarioId, antes, stats.chaves_documento(documento))
     db.commit()
     db.refresh(documento)
+    eventos.publicar_mudanca("documentos", "update", [documento.id], documento.usuarioId)
     return documento
 
 
 def delete_documento(db: Session, documento):
+    documento_id, usuario_id = documento.id, documento.usuarioId
+    stats.aplicar(db, usuario_id, stats.chaves_documento(documento), [])
+    formularios.liberar(db, [documento.dadosFormularioHash])
+    sync.registrar_remocao(db, "documentos", documento_id, usuario_id)
     db.delete(documento)
-    db.commit()
\ No newline at end of file
+    db.commit()
+    eventos.publicar_mudanca("documentos", "delete", [documento_id], usuario_id)
+
+# Modelos de documento
+def list_modelos(db: Session, usuario_id=None):
+    return acesso.filtrar(db.query(models.ModeloDocumento), models.ModeloDocumento, usuario_id).all()
+
+
+def get_modelo(db: Session, modelo_id, usuario_id=None):
+    q = db.query(models.ModeloDocumento).filter(models.ModeloDocumento.id == modelo_id)
+    return acesso.filtrar(q, models.ModeloDocumento, usuario_id).first()
+
+
+def create_modelo(db: Session, payload: schemas.ModeloDocumentoCreate, usuario_id):
+    modelo = models.ModeloDocumento(**payload.model_dump(), usuarioId=usuario_id, versao=1)
+    db.add(modelo)
+    db.commit()
+    db.refresh(modelo)
+    return modelo
+
+
+def update_modelo(db: Session, modelo, payload: schemas.ModeloDocumentoUpdate):
+    for k, v in payload.model_dump().items():
+        setattr(modelo, k, v)
+    modelo.versao = (modelo.versao or 0) + 1
+    db.commit()
+    db.refresh(modelo)
+    return modelo
+
+
+def delete_modelo(db: Session, modelo):
+    db.delete(modelo)
+    db.commit()
+
+
+def get_clientes_por_ids(db: Session, cliente_ids, usuario_id=None):
+    q = db.query(models.Cliente).filter(models.Cliente.id.in_(cliente_ids))
+    return acesso.filtrar(q, models.Cliente, usuario_id).all()
+
+
+def create_documentos_lote(db: Session, modelo, clientes, usuario_id, status: str = "Rascunho"):
+    # Renderiza um documento por cliente (em paralelo para lotes grandes) e insere tudo de uma vez
+    import uuid
+    from datetime import date
+    from types import SimpleNamespace
+    from sqlalchemy import insert
+    from . import modelos
+
+    hoje = date.today()
+    linhas = []
+    for c in clientes:
+        dados = {campo: getattr(c, campo) for campo in modelos.CAMPOS_CLIENTE}
+        dados["dataAtual"] = hoje
+        linhas.append(dados)
+    renderizados = modelos.renderizar_lote(modelo.titulo, modelo.corpo, linhas)
+
+    hashes = formularios.referenciar(db, [
+        {"modeloId": str(modelo.id), "modeloVersao": modelo.versao, "clienteId": str(c.id)} for c in clientes
+    ])
+    registros = []
+    for c, (titulo, conteudo), hash_ in zip(clientes, renderizados, hashes):
+        registros.append({
+            "id": uuid.uuid4(),
+            "tipoDocumento": modelo.tipoDocumento,
+            "titulo": titulo[:255],
+            "tomTexto": modelo.tomTexto,
+            "conteudo": conteudo,
+            "status": status,
+            "dataCreacao": hoje,
+            "dataUltimaEdicao": hoje,
+            "geradoPorIA": "false",
+            "dadosFormularioHash": hash_,
+            "imagemUrl": None,
+            "usuarioId": usuario_id,
+            "clienteId": c.id,
+        })
+    if registros:
+        db.execute(insert(models.Documento), registros)
+        chaves = [k for r in registros for k in stats.chaves_documento(SimpleNamespace(**r))]
+        stats.aplicar(db, usuario_id, [], chaves)
+    db.commit()
+    ids = [r["id"] for r in registros]
+    eventos.publicar_mudanca("documentos", "create", ids, usuario_id)
+    return ids
+
+
+def list_auditoria(db: Session, usuario_id=None, tabela=None, registro_id=None, acao=None,
+                   desde=None, ate=None, antes_de=None, limite: int = 100):
+    # Paginação por id decrescente (cursor = último id da página anterior), apoiada nos índices
+    # (tabela, registroId, id) e (usuarioId, id)
+    a = models.Auditoria
+    q = db.query(a)
+    if usuario_id is not None:
+        q = q.filter(a.usuarioId == usuario_id)
+    if tabela:
+        q = q.filter(a.tabela == tabela)
+    if registro_id:
+        q = q.filter(a.registroId == registro_id)
+    if acao:
+        q = q.filter(a.acao == acao)
+    if desde is not None:
+        q = q.filter(a.criadoEm >= desde)
+    if ate is not None:
+        q = q.filter(a.criadoEm < ate)
+    if antes_de is not None:
+        q = q.filter(a.id < antes_de)
+    return q.order_by(a.id.desc()).limit(limite).all()
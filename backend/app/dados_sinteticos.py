@@ -0,0 +1,365 @@
+import io
+import csv
+import sys
+import math
+import time
+import uuid
+import random
+import argparse
+from datetime import date, datetime, timedelta
+from sqlalchemy import Table, delete, insert, select, text
+from sqlalchemy.orm import Session
+
+from . import models, stats, validacao, senhas, formularios
+
+# Gerador de dados sintéticos para benchmarks e testes de capacidade:
+#   python -m backend.app.dados_sinteticos --usuarios 50 --clientes 1000000 --documentos 3000000
+# Determinístico para a mesma semente. No Postgres carrega via COPY; nos demais bancos
+# usa INSERT em lote (executemany). Cada lote é uma transação própria.
+
+SEMENTE_PADRAO = 20240101
+LOTE_PADRAO = 5000
+LOGIN_PREFIXO = "sintetico_"
+# Documentos consecutivos gerados a partir da mesma ficha de atendimento (mesmo dadosFormulario)
+DOCUMENTOS_POR_FICHA = 4
+# Multiplicador primo (coprimo com 10^n) gera bases de CPF/NIT distintas para cada índice
+_PRIMO = 982451653
+
+NOMES = [
+    "Maria", "José", "Ana", "João", "Antônio", "Francisco", "Carlos", "Paulo", "Pedro", "Lucas",
+    "Luiz", "Marcos", "Luís", "Gabriel", "Rafael", "Francisca", "Daniel", "Marcelo", "Bruno", "Eduardo",
+    "Adriana", "Juliana", "Márcia", "Fernanda", "Patrícia", "Aline", "Sandra", "Camila", "Amanda", "Bruna",
+    "Jéssica", "Letícia", "Júlia", "Luciana", "Vanessa", "Mariana", "Gabriela", "Vera", "Vitória", "Larissa",
+    "Cláudia", "Beatriz", "Raimundo", "Sebastião", "Joaquim", "Manoel", "Geraldo", "Benedito", "Severino", "Raimunda",
+    "Terezinha", "Rosângela", "Conceição", "Aparecida", "Helena", "Sônia", "Lúcia", "Rita", "Fábio", "Rodrigo",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+    "Cardoso", "Ramos", "Gonçalves", "Santana", "Teixeira", "Araújo", "Batista", "Cavalcanti", "Monteiro", "Moura",
+]
+CIDADES = [
+    ("São Paulo", "SP", 12.3), ("Rio de Janeiro", "RJ", 6.7), ("Brasília", "DF", 3.0), ("Salvador", "BA", 2.9),
+    ("Fortaleza", "CE", 2.7), ("Belo Horizonte", "MG", 2.5), ("Manaus", "AM", 2.2), ("Curitiba", "PR", 1.9),
+    ("Recife", "PE", 1.6), ("Goiânia", "GO", 1.5), ("Belém", "PA", 1.5), ("Porto Alegre", "RS", 1.5),
+    ("Guarulhos", "SP", 1.4), ("Campinas", "SP", 1.2), ("São Luís", "MA", 1.1), ("Maceió", "AL", 1.0),
+    ("Teresina", "PI", 0.9), ("Natal", "RN", 0.9), ("Campo Grande", "MS", 0.9), ("João Pessoa", "PB", 0.8),
+    ("Cuiabá", "MT", 0.6), ("Aracaju", "SE", 0.7), ("Florianópolis", "SC", 0.5), ("Vitória", "ES", 0.4),
+    ("Porto Velho", "RO", 0.5), ("Macapá", "AP", 0.5), ("Rio Branco", "AC", 0.4), ("Boa Vista", "RR", 0.4),
+    ("Palmas", "TO", 0.3), ("Juazeiro do Norte", "CE", 0.3), ("Feira de Santana", "BA", 0.6), ("Uberlândia", "MG", 0.7),
+]
+BAIRROS = ["Centro", "Jardim América", "Vila Nova", "Boa Vista", "São José", "Santa Luzia", "Liberdade",
+           "Alto da Boa Vista", "Planalto", "Industrial", "Cidade Nova", "Bela Vista", "Santo Antônio", "Aeroporto"]
+LOGRADOUROS = ["Rua", "Avenida", "Travessa", "Alameda", "Rua", "Rua"]
+ESTADOS_CIVIS = [("Solteiro(a)", 45), ("Casado(a)", 35), ("Divorciado(a)", 9), ("Viúvo(a)", 8), ("União estável", 3)]
+PROFISSOES = ["Aposentado(a)", "Agricultor(a)", "Pedreiro", "Doméstica", "Professor(a)", "Motorista", "Comerciante",
+              "Auxiliar de serviços gerais", "Costureira", "Pescador(a)", "Vigilante", "Do lar", "Cozinheiro(a)",
+              "Eletricista", "Técnico(a) de enfermagem", "Vendedor(a)", "Operador(a) de máquinas", "Servente"]
+ORGAOS = ["SSP", "SSP", "SSP", "SDS", "PC", "DETRAN", "IFP"]
+
+TIPOS_DOCUMENTO = [
+    ("Procuração", 18), ("Contrato de Honorários", 14), ("Petição Inicial", 20), ("Requerimento Administrativo", 16),
+    ("Recurso Inominado", 6), ("Recurso Administrativo", 6), ("Réplica", 5), ("Impugnação", 4), ("Manifestação", 6),
+    ("Mandado de Segurança", 2), ("Embargos de Declaração", 3),
+]
+TONS = ["Técnico", "Simplificado", "Persuasivo", "Formal", "Objetivo"]
+STATUS_DOCUMENTO = [("Rascunho", 30), ("Em Revisão", 15), ("Finalizado", 45), ("Arquivado", 10)]
+BENEFICIOS = ["aposentadoria por idade", "aposentadoria por tempo de contribuição", "auxílio-doença",
+              "benefício de prestação continuada (BPC/LOAS)", "pensão por morte", "salário-maternidade",
+              "aposentadoria por invalidez", "auxílio-acidente", "aposentadoria especial"]
+
+_FRASES = [
+    "Trata-se de pedido de concessão de {b}, indeferido administrativamente pelo Instituto Nacional do Seguro Social.",
+    "A parte autora preenche todos os requisitos legais exigidos para a concessão do benefício pleiteado.",
+    "Conforme documentação anexa, restou comprovada a qualidade de segurado e o cumprimento da carência.",
+    "O art. 201 da Constituição Federal assegura a cobertura dos eventos de doença, invalidez, morte e idade avançada.",
+    "Nos termos da Lei nº 8.213/91, o segurado faz jus ao benefício desde a data do requerimento administrativo.",
+    "A jurisprudência do Superior Tribunal de Justiça é pacífica quanto à matéria ora discutida.",
+    "Requer-se a produção de todas as provas admitidas em direito, em especial a documental e a pericial.",
+    "O laudo médico acostado demonstra a incapacidade laborativa total e permanente da parte autora.",
+    "Ante o exposto, requer a procedência integral dos pedidos, com a condenação da autarquia ao pagamento das parcelas vencidas.",
+    "As parcelas em atraso devem ser corrigidas monetariamente e acrescidas de juros de mora na forma da lei.",
+    "Requer, ainda, a concessão dos benefícios da justiça gratuita, por não possuir condições de arcar com as custas processuais.",
+    "O período de atividade rural encontra-se demonstrado por início de prova material corroborado por prova testemunhal.",
+    "A decisão administrativa carece de fundamentação adequada, violando o princípio da motivação dos atos administrativos.",
+    "Dá-se à causa o valor de R$ {v}, para fins de alçada.",
+    "Pelo presente instrumento, o outorgante nomeia e constitui seu bastante procurador o advogado abaixo qualificado.",
+    "Os honorários advocatícios serão devidos no percentual de {p}% sobre o proveito econômico obtido.",
+]
+
+
+def _paragrafos(rng: random.Random, quantidade: int = 64) -> list[str]:
+    # Reservatório de parágrafos reutilizados na montagem do conteúdo (evita gerar texto por linha)
+    saida = []
+    for _ in range(quantidade):
+        frases = [
+            rng.choice(_FRASES).format(
+                b=rng.choice(BENEFICIOS),
+                v=f"{rng.randint(5, 300) * 1000:,}".replace(",", ".") + ",00",
+                p=rng.choice([20, 25, 30]),
+            )
+            for _ in range(rng.randint(3, 7))
+        ]
+        saida.append(" ".join(frases))
+    return saida
+
+
+def _acumulados(pesos) -> list[float]:
+    total, saida = 0.0, []
+    for p in pesos:
+        total += p
+        saida.append(total)
+    return saida
+
+
+class Gerador:
+    def __init__(self, semente: int = SEMENTE_PADRAO):
+        self.semente = semente
+        self.rng = random.Random(semente)
+        self.paragrafos = _paragrafos(self.rng)
+        self._pesos_cidades = _acumulados(c[2] for c in CIDADES)
+        self._pesos_civil = _acumulados(e[1] for e in ESTADOS_CIVIS)
+        self._pesos_tipos = _acumulados(t[1] for t in TIPOS_DOCUMENTO)
+        self._pesos_status = _acumulados(s[1] for s in STATUS_DOCUMENTO)
+        self._deslocamento = self.rng.randrange(10**9)
+        self.agora = datetime(2024, 11, 1)
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def cpf(self, indice: int) -> str:
+        base = f"{(indice * _PRIMO + self._deslocamento) % 10**9:09d}"
+        return base + validacao.digitos_cpf(base)
+
+    def nit(self, indice: int) -> str:
+        base = f"1{(indice * _PRIMO + self._deslocamento) % 10**9:09d}"
+        return base + validacao.digito_nit(base)
+
+    def nome(self) -> str:
+        r = self.rng
+        meio = f" {r.choice(SOBRENOMES)}" if r.random() < 0.6 else ""
+        return f"{r.choice(NOMES)} {r.choice(SOBRENOMES)}{meio} {r.choice(SOBRENOMES)}"
+
+    def usuarios(self, quantidade: int, senha: str) -> list[dict]:
+        return [
+            dict(id=self.uuid(), nome=f"Usuário Sintético {i + 1}", login=f"{LOGIN_PREFIXO}{i + 1:05d}",
+                 senhaHash=senhas.gerar_hash_local(senha), perfil="A" if i == 0 else "U", status="A")
+            for i in range(quantidade)
+        ]
+
+    def cliente(self, indice: int, usuario_id) -> dict:
+        r = self.rng
+        nome = self.nome()
+        sobrenome = nome.rsplit(" ", 1)[1]
+        cidade, uf, _ = r.choices(CIDADES, cum_weights=self._pesos_cidades)[0]
+        return dict(
+            id=self.uuid(),
+            nomeCompleto=nome,
+            email=f"{nome.split(' ', 1)[0].lower()}.{sobrenome.lower()}.{indice}@example.com",
+            estadoCivil=r.choices(ESTADOS_CIVIS, cum_weights=self._pesos_civil)[0][0],
+            profissao=r.choice(PROFISSOES),
+            cpf=self.cpf(indice),
+            rg=str(r.randint(1_000_000, 99_999_999)),
+            orgaoExpedidor=f"{r.choice(ORGAOS)}/{uf}",
+            nit=self.nit(indice),
+            numeroBeneficio=str(r.randint(100_000_000, 2_199_999_999)),
+            dataNascimento=date(1935, 1, 1) + timedelta(days=r.randrange(365 * 70)),
+            sexo=r.choice("MF"),
+            nomeMae=f"{r.choice(NOMES)} {r.choice(SOBRENOMES)} {sobrenome}",
+            nomePai=f"{r.choice(NOMES)} {sobrenome}",
+            endereco=f"{r.choice(LOGRADOUROS)} {r.choice(NOMES)} {r.choice(SOBRENOMES)}, {r.randint(1, 3000)}",
+            bairro=r.choice(BAIRROS),
+            cidade=cidade,
+            uf=uf,
+            usuarioId=usuario_id,
+            atualizadoEm=self.agora - timedelta(seconds=r.randrange(86400 * 365 * 3)),
+        )
+
+    def conteudo(self) -> str:
+        # Tamanho log-normal (mediana ~4 KB, cauda até 200 KB), como documentos reais
+        r = self.rng
+        alvo = int(min(max(r.lognormvariate(math.log(4000), 0.8), 400), 200_000))
+        inicio = r.randrange(len(self.paragrafos))
+        partes, tamanho, k = [], 0, 0
+        while tamanho < alvo:
+            p = self.paragrafos[(inicio + k) % len(self.paragrafos)]
+            partes.append(p)
+            tamanho += len(p) + 2
+            k += 1
+        return "\n\n".join(partes)[:alvo]
+
+    def ficha(self, indice: int) -> dict | None:
+        # Derivada só do índice (gerador próprio): a carga de dados_formulario não depende dos documentos
+        r = random.Random(self.semente * 1_000_003 + indice)
+        if r.random() >= 0.7:
+            return None
+        return {
+            "nomeCliente": f"{r.choice(NOMES)} {r.choice(SOBRENOMES)} {r.choice(SOBRENOMES)}",
+            "cpfCnpj": validacao.formatar_cpf(self.cpf(10**8 + indice)),
+            "comarca": r.choice(CIDADES)[0],
+            "valorCausa": r.randint(5, 300) * 1000,
+        }
+
+    def dados_formulario(self, indice: int, documentos: int) -> dict | None:
+        # Linha de dados_formulario da ficha, com o número de documentos que apontam para ela
+        serializado = formularios.serializar(self.ficha(indice))
+        if serializado is None:
+            return None
+        return {
+            "hash": serializado[0],
+            "conteudo": serializado[1],
+            "referencias": min(DOCUMENTOS_POR_FICHA, documentos - indice * DOCUMENTOS_POR_FICHA),
+            "criadoEm": self.agora,
+        }
+
+    def documento(self, indice: int, usuario_id) -> dict:
+        r = self.rng
+        tipo = r.choices(TIPOS_DOCUMENTO, cum_weights=self._pesos_tipos)[0][0]
+        criacao = self.agora.date() - timedelta(days=r.randrange(365 * 3))
+        edicao = min(criacao + timedelta(days=int(r.expovariate(1 / 10))), self.agora.date())
+        dados = self.ficha(indice // DOCUMENTOS_POR_FICHA)
+        nome = dados["nomeCliente"] if dados else self.nome()
+        return dict(
+            id=self.uuid(),
+            tipoDocumento=tipo,
+            titulo=f"{tipo} - {nome}",
+            tomTexto=r.choice(TONS),
+            conteudo=self.conteudo(),
+            status=r.choices(STATUS_DOCUMENTO, cum_weights=self._pesos_status)[0][0],
+            dataCreacao=criacao,
+            dataUltimaEdicao=edicao,
+            geradoPorIA="true" if r.random() < 0.6 else "false",
+            dadosFormularioHash=formularios.serializar(dados)[0] if dados else None,
+            imagemUrl=None,
+            usuarioId=usuario_id,
+            atualizadoEm=datetime.combine(edicao, datetime.min.time()) + timedelta(seconds=r.randrange(86400)),
+        )
+
+
+def _valor_csv(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _carregar(conn, tabela: Table, linhas: list[dict]):
+    if conn.dialect.name == "postgresql":
+        colunas = [c.name for c in tabela.columns]
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for linha in linhas:
+            escritor.writerow([_valor_csv(linha.get(c)) for c in colunas])
+        buffer.seek(0)
+        lista = ", ".join(f'"{c}"' for c in colunas)
+        cursor = conn.connection.cursor()
+        try:
+            # Campo vazio sem aspas vira NULL (o gerador não produz strings vazias)
+            cursor.copy_expert(f'COPY {tabela.name} ({lista}) FROM STDIN WITH (FORMAT csv)', buffer)
+        finally:
+            cursor.close()
+    else:
+        conn.execute(insert(tabela), linhas)
+
+
+def _escolher_usuario(rng: random.Random, ids: list, acumulados: list[float]):
+    return rng.choices(ids, cum_weights=acumulados)[0]
+
+
+def _gerar_em_lotes(engine, nome: str, tabela: Table, total: int, fabricar, tamanho_lote: int):
+    inicio = time.monotonic()
+    feitos = 0
+    while feitos < total:
+        n = min(tamanho_lote, total - feitos)
+        linhas = [linha for linha in (fabricar(feitos + i) for i in range(n)) if linha is not None]
+        if linhas:
+            with engine.begin() as conn:
+                _carregar(conn, tabela, linhas)
+        feitos += n
+        decorrido = time.monotonic() - inicio
+        taxa = feitos / decorrido if decorrido > 0 else 0.0
+        eta = f", ~{(total - feitos) / taxa:.0f}s restantes" if taxa > 0 else ""
+        print(f"[sintetico] {nome}: {feitos}/{total} ({taxa:.0f}/s{eta})")
+
+
+def limpar(engine) -> int:
+    # Remove usuários sintéticos (login com LOGIN_PREFIXO) e todos os seus dados
+    U = models.Usuario.__table__
+    ids = select(U.c.id).where(U.c.login.like(f"{LOGIN_PREFIXO}%")).scalar_subquery()
+    with engine.begin() as conn:
+        formularios.liberar_documentos(conn, models.Documento.usuarioId.in_(ids))
+        for modelo in (models.JobGeracao, models.Documento, models.Cliente, models.ModeloDocumento,
+                       models.EstatisticaContador, models.ChaveIdempotencia, models.RegistroRemovido, models.Sessao):
+            conn.execute(delete(modelo.__table__).where(modelo.__table__.c.usuarioId.in_(ids)))
+        removidos = conn.execute(delete(U).where(U.c.login.like(f"{LOGIN_PREFIXO}%"))).rowcount or 0
+    with Session(engine) as db:
+        formularios.coletar(db)
+    return removidos
+
+
+def gerar(engine, session_factory, usuarios: int, clientes: int, documentos: int,
+          semente: int = SEMENTE_PADRAO, tamanho_lote: int = LOTE_PADRAO, senha: str = "123456") -> dict:
+    U = models.Usuario.__table__
+    with engine.connect() as conn:
+        if conn.execute(select(U.c.id).where(U.c.login.like(f"{LOGIN_PREFIXO}%")).limit(1)).first():
+            raise RuntimeError("Já existem dados sintéticos neste banco; use --limpar para removê-los antes.")
+
+    g = Gerador(semente)
+    linhas_usuarios = g.usuarios(max(usuarios, 1), senha)
+    with engine.begin() as conn:
+        _carregar(conn, U, linhas_usuarios)
+    ids = [u["id"] for u in linhas_usuarios]
+    # Distribuição desigual entre usuários (poucos escritórios concentram a maior parte dos dados)
+    acumulados = _acumulados(1 / (i + 1) ** 0.8 for i in range(len(ids)))
+
+    inicio = time.monotonic()
+    _gerar_em_lotes(engine, "clientes", models.Cliente.__table__, clientes,
+                    lambda i: g.cliente(i, _escolher_usuario(g.rng, ids, acumulados)), tamanho_lote)
+    _gerar_em_lotes(engine, "documentos", models.Documento.__table__, documentos,
+                    lambda i: g.documento(i, _escolher_usuario(g.rng, ids, acumulados)), tamanho_lote)
+    _gerar_em_lotes(engine, "dados_formulario", models.DadosFormulario.__table__,
+                    -(-documentos // DOCUMENTOS_POR_FICHA), lambda i: g.dados_formulario(i, documentos), tamanho_lote)
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for tabela in ("usuarios", "clientes", "documentos", "dados_formulario"):
+                conn.execute(text(f"ANALYZE {tabela}"))
+
+    db = session_factory()
+    try:
+        stats.reconstruir(db)
+    finally:
+        db.close()
+    return {"usuarios": len(ids), "clientes": clientes, "documentos": documentos,
+            "segundos": round(time.monotonic() - inicio, 1)}
+
+
+def main(argv: list[str]):
+    from .database import Base, engine, SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m backend.app.dados_sinteticos",
+                                     description="Gera dados sintéticos em volume para benchmarks")
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--clientes", type=int, default=100_000)
+    parser.add_argument("--documentos", type=int, default=300_000)
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="linhas por transação")
+    parser.add_argument("--senha", default="123456", help=f"senha dos usuários {LOGIN_PREFIXO}NNNNN")
+    parser.add_argument("--limpar", action="store_true", help="remove dados sintéticos existentes antes de gerar")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    if args.limpar:
+        print(f"[sintetico] Usuários sintéticos removidos: {limpar(engine)}")
+    try:
+        resumo = gerar(engine, SessionLocal, args.usuarios, args.clientes, args.documentos,
+                       semente=args.semente, tamanho_lote=args.lote, senha=args.senha)
+    except RuntimeError as e:
+        print(f"[sintetico] {e}")
+        return 1
+    print(f"[sintetico] Concluído: {resumo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
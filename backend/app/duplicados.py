@@ -0,0 +1,86 @@
+import sys
+import csv
+import argparse
+from typing import Iterator
+from sqlalchemy import select, func, tuple_
+
+from . import models
+
+# Relatório de clientes duplicados (mesmo CPF ou NIT no mesmo escritório), em lotes:
+#   python -m backend.app.duplicados [--campo cpf|nit] [--lote N] [--usuario UUID]
+# Cada lote é uma consulta agrupada que continua do último (usuarioId, valor) visto,
+# percorrendo o índice (usuarioId, cpf/nit) sem carregar a tabela inteira.
+
+CAMPOS = ("cpf", "nit")
+LOTE_PADRAO = 1000
+
+
+def duplicados(conn, campo: str = "cpf", tamanho_lote: int = LOTE_PADRAO, usuario_id=None) -> Iterator[dict]:
+    if campo not in CAMPOS:
+        raise ValueError(f"campo deve ser um de {CAMPOS}")
+    t = models.Cliente.__table__
+    coluna = t.c[campo]
+    ultimo = None
+    while True:
+        q = (
+            select(t.c.usuarioId, coluna, func.count())
+            .group_by(t.c.usuarioId, coluna)
+            .having(func.count() > 1)
+            .order_by(t.c.usuarioId, coluna)
+            .limit(tamanho_lote)
+        )
+        if usuario_id is not None:
+            q = q.where(t.c.usuarioId == usuario_id)
+        if ultimo is not None:
+            q = q.where(tuple_(t.c.usuarioId, coluna) > tuple_(*ultimo))
+        grupos = conn.execute(q).all()
+        if not grupos:
+            return
+
+        chaves = [(u, v) for u, v, _ in grupos]
+        ids: dict[tuple, list] = {k: [] for k in chaves}
+        linhas = conn.execute(
+            select(t.c.usuarioId, coluna, t.c.id)
+            .where(tuple_(t.c.usuarioId, coluna).in_(chaves))
+            .order_by(t.c.usuarioId, coluna, t.c.id)
+        )
+        for u, v, cliente_id in linhas:
+            ids[(u, v)].append(cliente_id)
+        for u, v, total in grupos:
+            yield {"usuarioId": u, "campo": campo, "valor": v, "quantidade": total, "ids": ids[(u, v)]}
+        ultimo = chaves[-1]
+
+
+def contar(conn, campo: str = "cpf") -> int:
+    # Quantidade de grupos duplicados (usado pela migração antes de criar o índice único)
+    t = models.Cliente.__table__
+    coluna = t.c[campo]
+    grupos = select(t.c.usuarioId).group_by(t.c.usuarioId, coluna).having(func.count() > 1).subquery()
+    return conn.execute(select(func.count()).select_from(grupos)).scalar() or 0
+
+
+def main(argv: list[str]):
+    from uuid import UUID
+    from .database import engine
+
+    parser = argparse.ArgumentParser(prog="python -m backend.app.duplicados",
+                                     description="Relatório de clientes duplicados por CPF/NIT")
+    parser.add_argument("--campo", choices=CAMPOS, default="cpf")
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="grupos por consulta")
+    parser.add_argument("--usuario", type=UUID, default=None, help="restringe a um escritório (usuarioId)")
+    args = parser.parse_args(argv)
+
+    escritor = csv.writer(sys.stdout, delimiter=";")
+    escritor.writerow(["usuarioId", "campo", "valor", "quantidade", "ids"])
+    total = 0
+    with engine.connect() as conn:
+        for grupo in duplicados(conn, args.campo, args.lote, args.usuario):
+            escritor.writerow([grupo["usuarioId"], grupo["campo"], grupo["valor"], grupo["quantidade"],
+                               " ".join(str(i) for i in grupo["ids"])])
+            total += 1
+    print(f"[duplicados] {total} grupos com {args.campo} repetido", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models, acesso
+
+# Triagem de elegibilidade por idade sobre a carteira inteira: as datas de nascimento são
+# carregadas uma única vez em arrays datetime64 e cada regra é resolvida com operações
+# vetoriais do NumPy, sem laço Python por cliente.
+# Só o requisito etário é avaliado: tempo de contribuição e carência não são cadastrados
+# e continuam sendo conferidos caso a caso.
+
+
+@dataclass(frozen=True)
+class Regra:
+    descricao: str
+    # Idade exigida em meses por sexo; "*" vale para ambos
+    idade: dict
+    # Regra de transição: (ano a partir do qual vale, idade em meses) por sexo, em ordem
+    transicao: dict | None = None
+
+
+REGRAS = {
+    "idade_urbana": Regra("Aposentadoria por idade urbana (EC 103/2019, art. 19)", {"M": 65 * 12, "F": 62 * 12}),
+    "transicao_idade": Regra(
+        "Transição da aposentadoria por idade (EC 103/2019, art. 18)",
+        {"M": 65 * 12, "F": 62 * 12},
+        {"F": ((2019, 60 * 12), (2020, 60 * 12 + 6), (2021, 61 * 12), (2022, 61 * 12 + 6), (2023, 62 * 12))},
+    ),
+    "idade_rural": Regra("Aposentadoria por idade rural (CF, art. 201, § 7º, II)", {"M": 60 * 12, "F": 55 * 12}),
+    "bpc_idoso": Regra("Benefício assistencial ao idoso (Lei 8.742/1993, art. 20)", {"*": 65 * 12}),
+}
+
+
+def somar_meses(datas: np.ndarray, meses) -> np.ndarray:
+    # Mesmo dia N meses depois; sem o dia no mês de destino (ex.: 29/02), vale o primeiro
+    # dia do mês seguinte (Lei 810/1949, art. 3º)
+    mes = datas.astype("datetime64[M]")
+    dia = datas - mes.astype("datetime64[D]")
+    destino = mes + np.asarray(meses, dtype="timedelta64[M]")
+    resultado = destino.astype("datetime64[D]") + dia
+    proximo = (destino + 1).astype("datetime64[D]")
+    return np.where(resultado >= proximo, proximo, resultado)
+
+
+def meses_completos(inicio: np.ndarray, fim) -> np.ndarray:
+    # Meses inteiros decorridos de inicio até fim (negativo se fim < inicio)
+    fim = np.asarray(fim, dtype="datetime64[D]")
+    meses = (fim.astype("datetime64[M]") - inicio.astype("datetime64[M]")).astype(np.int64)
+    return meses - (somar_meses(inicio, meses) > fim)
+
+
+def data_elegibilidade(regra: Regra, nascimento: np.ndarray, sexo: np.ndarray) -> np.ndarray:
+    # Data em que a idade exigida é atingida; NaT quando o sexo é necessário e não informado
+    resultado = np.full(nascimento.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+    for chave, meses in regra.idade.items():
+        alvo = np.ones(nascimento.shape, dtype=bool) if chave == "*" else sexo == chave
+        etapas = (regra.transicao or {}).get(chave)
+        if etapas:
+            datas = _data_transicao(nascimento[alvo], etapas)
+        else:
+            datas = somar_meses(nascimento[alvo], meses)
+        resultado[alvo] = datas
+    return resultado
+
+
+def _data_transicao(nascimento: np.ndarray, etapas) -> np.ndarray:
+    # A idade exigida muda conforme o ano: vale a primeira data d em que a idade em d
+    # alcança a exigência vigente em d. Em cada etapa o candidato é max(nascimento + idade,
+    # início da etapa), válido se ainda cair antes da etapa seguinte; como as etapas são
+    # ordenadas e disjuntas, o primeiro candidato válido é o menor. A primeira etapa vale
+    # também para datas anteriores, e a última não tem fim.
+    resultado = np.full(nascimento.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+    for i, (ano, meses) in enumerate(etapas):
+        candidato = somar_meses(nascimento, meses)
+        if i > 0:
+            candidato = np.maximum(candidato, np.datetime64(f"{ano}-01-01"))
+        if i + 1 < len(etapas):
+            valido = candidato < np.datetime64(f"{etapas[i + 1][0]}-01-01")
+        else:
+            valido = True
+        resultado = np.where(np.isnat(resultado) & valido, candidato, resultado)
+    return resultado
+
+
+def carregar(db: Session, usuario_id):
+    # Só as colunas do cálculo; nome/CPF são buscados depois apenas para os itens exibidos
+    c = models.Cliente
+    q = acesso.filtrar(select(c.id, c.dataNascimento, c.sexo, c.numeroBeneficio), c, usuario_id)
+    linhas = db.execute(q).all()
+    ids, nascimento, sexo, beneficio = zip(*linhas) if linhas else ((), (), (), ())
+    return (
+        list(ids),
+        np.array(nascimento, dtype="datetime64[D]"),
+        np.array([x or "" for x in sexo], dtype="U1"),
+        np.array([bool((x or "").strip()) for x in beneficio], dtype=bool),
+    )
+
+
+def _detalhes(db: Session, ids: list) -> dict:
+    c = models.Cliente
+    linhas = db.execute(select(c.id, c.nomeCompleto, c.cpf, c.usuarioId).where(c.id.in_(ids))).all() if ids else []
+    return {r.id: r for r in linhas}
+
+
+def relatorio(
+    db: Session,
+    usuario_id,
+    regra_nome: str,
+    referencia: date,
+    dentro_de_meses: int | None = None,
+    incluir_elegiveis: bool = True,
+    sem_beneficio: bool = False,
+    limite: int = 1000,
+) -> dict:
+    regra = REGRAS[regra_nome]
+    ids, nascimento, sexo, beneficio = carregar(db, usuario_id)
+    ref = np.datetime64(referencia, "D")
+
+    elegivel_em = data_elegibilidade(regra, nascimento, sexo)
+    incompleto = np.isnat(elegivel_em)
+    elegivel = ~incompleto & (elegivel_em <= ref)
+
+    selecao = ~incompleto
+    if dentro_de_meses is not None:
+        selecao &= elegivel_em <= somar_meses(np.array([ref]), dentro_de_meses)[0]
+    if not incluir_elegiveis:
+        selecao &= ~elegivel
+    if sem_beneficio:
+        selecao &= ~beneficio
+
+    idx = np.flatnonzero(selecao)
+    idx = idx[np.argsort(elegivel_em[idx], kind="stable")][:limite]
+    idade = meses_completos(nascimento[idx], ref) // 12
+    # Meses até a data (arredondado para cima); 0 para quem já é elegível
+    referencias = np.full(idx.shape, ref)
+    faltam = meses_completos(referencias, elegivel_em[idx])
+    faltam = np.maximum(faltam + (somar_meses(referencias, faltam) < elegivel_em[idx]), 0)
+
+    detalhes = _detalhes(db, [ids[i] for i in idx.tolist()])
+    itens = []
+    for pos, i in enumerate(idx.tolist()):
+        r = detalhes.get(ids[i])
+        if r is None:
+            continue  # removido entre as duas consultas
+        itens.append({
+            "clienteId": r.id,
+            "nomeCompleto": r.nomeCompleto,
+            "cpf": r.cpf,
+            "sexo": sexo[i] or None,
+            "dataNascimento": nascimento[i].item(),
+            "idadeAnos": int(idade[pos]),
+            "dataElegibilidade": elegivel_em[i].item(),
+            "mesesRestantes": int(faltam[pos]),
+            "elegivel": bool(elegivel[i]),
+            "possuiBeneficio": bool(beneficio[i]),
+            "usuarioId": r.usuarioId,
+        })
+    return {
+        "regra": regra_nome,
+        "descricao": regra.descricao,
+        "referencia": referencia,
+        "total": len(ids),
+        "elegiveis": int(elegivel.sum()),
+        "selecionados": int(selecao.sum()),
+        "dadosIncompletos": int(incompleto.sum()),
+        "itens": itens,
+    }
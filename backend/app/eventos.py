@@ -0,0 +1,153 @@
+import os
+import json
+import asyncio
+import select
+import threading
+from typing import Any, Callable, Dict
+
+# Barramento de eventos: publicar() pode ser chamado de qualquer thread, os assinantes
+# consomem em uma asyncio.Queue no loop em que assinaram.
+# Com EVENTOS_BACKEND=postgres, os eventos passam por NOTIFY/LISTEN e chegam a todos os
+# workers (processos) conectados ao mesmo banco; caso contrário ficam no processo atual.
+
+EVENTOS_FILA_MAX = 256
+EVENTOS_BACKEND = os.getenv("EVENTOS_BACKEND", "local")
+EVENTOS_CANAL = os.getenv("EVENTOS_CANAL", "jurix_eventos")
+# Limite do payload do NOTIFY no Postgres é 8000 bytes
+_NOTIFY_MAX_BYTES = 7500
+
+
+class Assinatura:
+    def __init__(self, filtro: Callable[[Dict[str, Any]], bool] | None, loop: asyncio.AbstractEventLoop):
+        self.filtro = filtro
+        self.loop = loop
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=EVENTOS_FILA_MAX)
+        self.descartados = 0
+
+    def _entregar(self, evento: Dict[str, Any]):
+        try:
+            self.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Assinante lento: descarta em vez de acumular memória
+            self.descartados += 1
+
+
+_assinaturas: set[Assinatura] = set()
+_lock = threading.Lock()
+_engine = None
+_parar: threading.Event | None = None
+
+
+def assinar(filtro: Callable[[Dict[str, Any]], bool] | None = None) -> Assinatura:
+    # Deve ser chamado dentro de um loop asyncio em execução
+    assinatura = Assinatura(filtro, asyncio.get_running_loop())
+    with _lock:
+        _assinaturas.add(assinatura)
+    return assinatura
+
+
+def cancelar(assinatura: Assinatura):
+    with _lock:
+        _assinaturas.discard(assinatura)
+
+
+def _despachar(evento: Dict[str, Any]):
+    with _lock:
+        destinos = list(_assinaturas)
+    for assinatura in destinos:
+        try:
+            if assinatura.filtro and not assinatura.filtro(evento):
+                continue
+            assinatura.loop.call_soon_threadsafe(assinatura._entregar, evento)
+        except RuntimeError:
+            # Loop já encerrado
+            cancelar(assinatura)
+
+
+def publicar(evento: Dict[str, Any]):
+    if _engine is None:
+        _despachar(evento)
+        return
+    try:
+        _notificar(evento)
+    except Exception:
+        # Sem banco disponível, ao menos os assinantes deste processo recebem
+        _despachar(evento)
+
+
+def publicar_mudanca(tabela: str, acao: str, ids, usuario_id):
+    # acao: create/update/delete; ids dos registros afetados, todos do mesmo usuário
+    ids = [str(i) for i in ids]
+    if not ids:
+        return
+    publicar({"tipo": "mudanca", "tabela": tabela, "acao": acao, "ids": ids,
+              "usuarioId": str(usuario_id) if usuario_id else None})
+
+
+# Postgres LISTEN/NOTIFY
+def _notificar(evento: Dict[str, Any]):
+    from sqlalchemy import text
+
+    payloads = []
+    corpo = json.dumps(evento, separators=(",", ":"))
+    if len(corpo.encode("utf-8")) <= _NOTIFY_MAX_BYTES or not evento.get("ids"):
+        payloads.append(corpo)
+    else:
+        # Lotes grandes de ids são divididos em várias notificações
+        ids = evento["ids"]
+        por_msg = max(1, len(ids) * _NOTIFY_MAX_BYTES // len(corpo.encode("utf-8")) - 1)
+        for i in range(0, len(ids), por_msg):
+            payloads.append(json.dumps({**evento, "ids": ids[i:i + por_msg]}, separators=(",", ":")))
+    with _engine.begin() as conn:
+        for p in payloads:
+            conn.execute(text("SELECT pg_notify(:canal, :payload)"), {"canal": EVENTOS_CANAL, "payload": p})
+
+
+def _escutar(engine, parar: threading.Event):
+    while not parar.is_set():
+        raw = None
+        try:
+            raw = engine.raw_connection()
+            dbapi = raw.dbapi_connection
+            dbapi.autocommit = True
+            cur = dbapi.cursor()
+            cur.execute(f'LISTEN "{EVENTOS_CANAL}"')
+            while not parar.is_set():
+                if select.select([dbapi], [], [], 5) == ([], [], []):
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    n = dbapi.notifies.pop(0)
+                    try:
+                        _despachar(json.loads(n.payload))
+                    except ValueError:
+                        pass
+        except Exception:
+            # Conexão caiu: tenta novamente em instantes
+            parar.wait(2)
+        finally:
+            if raw is not None:
+                try:
+                    raw.invalidate()
+                except Exception:
+                    pass
+
+
+def iniciar(engine):
+    global _engine, _parar
+    if EVENTOS_BACKEND != "postgres" or _parar is not None:
+        return
+    if not engine.url.drivername.startswith("postgresql"):
+        print("[eventos] EVENTOS_BACKEND=postgres requer banco Postgres; usando barramento local.")
+        return
+    _parar = threading.Event()
+    threading.Thread(target=_escutar, args=(engine, _parar), name="eventos-listen", daemon=True).start()
+    _engine = engine
+
+
+def encerrar():
+    global _engine, _parar
+    if _parar is not None:
+        _parar.set()
+    _engine = None
+    _parar = None
@@ -0,0 +1,184 @@
+import os
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.orm import Session
+
+from . import models, sync, stats, eventos, sessoes, formularios
+from .database import SessionLocal
+
+# Exclusão de usuários em duas fases: a exclusão lógica (excluidoEm + revogação dos tokens)
+# é imediata; os registros do usuário são apagados ou reatribuídos a outro usuário em
+# segundo plano, em lotes pequenos com commit por lote, sem transações longas nem locks
+# sobre milhares de linhas. O progresso fica em exclusoes_usuario e a tarefa é retomada
+# na subida se o processo cair no meio.
+
+EXCLUSAO_LOTE = int(os.getenv("EXCLUSAO_LOTE", "500"))
+EXCLUSAO_PAUSA_SECONDS = float(os.getenv("EXCLUSAO_PAUSA_SECONDS", "0.05"))
+# Tarefas "executando" sem progresso há mais tempo que isso são consideradas abandonadas
+EXCLUSAO_TIMEOUT_SECONDS = int(os.getenv("EXCLUSAO_TIMEOUT_SECONDS", "300"))
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+
+# (etapa, modelo, tabela da sincronização, pode ser reatribuído); ordem respeita as FKs
+ETAPAS = (
+    ("jobs", models.JobGeracao, None, True),
+    ("documentos", models.Documento, "documentos", True),
+    ("clientes", models.Cliente, "clientes", True),
+    ("modelos", models.ModeloDocumento, None, True),
+    ("idempotencia", models.ChaveIdempotencia, None, False),
+    ("sessoes", models.Sessao, None, False),
+    ("estatisticas", models.EstatisticaContador, None, False),
+)
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_parar = threading.Event()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _parar.clear()
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exclusao")
+    return _executor
+
+
+class ConflitoReatribuicao(Exception):
+    pass
+
+
+def conflitos_cpf(db: Session, usuario_id, destino_id) -> int:
+    # Clientes do usuário cujo CPF já existe no destino (violariam o índice único)
+    c = models.Cliente
+    destino = select(c.cpf).where(c.usuarioId == destino_id)
+    return db.query(func.count(c.id)).filter(c.usuarioId == usuario_id, c.cpf.in_(destino)).scalar() or 0
+
+
+def agendar(db: Session, usuario: models.Usuario, destino_id=None) -> models.ExclusaoUsuario:
+    if destino_id is not None:
+        conflitos = conflitos_cpf(db, usuario.id, destino_id)
+        if conflitos:
+            raise ConflitoReatribuicao(f"{conflitos} cliente(s) com CPF já cadastrado no usuário de destino")
+    usuario.excluidoEm = datetime.utcnow()
+    sessoes.revogar_usuario(db, usuario.id, commit=False)
+    tarefa = models.ExclusaoUsuario(usuarioId=usuario.id, destinoId=destino_id, status=PENDENTE, processados=0)
+    db.add(tarefa)
+    db.commit()
+    db.refresh(tarefa)
+    enfileirar(tarefa.id)
+    return tarefa
+
+
+def reagendar(db: Session, tarefa: models.ExclusaoUsuario) -> models.ExclusaoUsuario:
+    # Tarefa que falhou (ex.: conflito criado depois do agendamento) continua de onde parou
+    tarefa.status = PENDENTE
+    tarefa.erro = None
+    db.commit()
+    enfileirar(tarefa.id)
+    return tarefa
+
+
+def obter(db: Session, usuario_id) -> models.ExclusaoUsuario | None:
+    t = models.ExclusaoUsuario
+    return db.query(t).filter(t.usuarioId == usuario_id).order_by(t.criadoEm.desc()).first()
+
+
+def enfileirar(tarefa_id):
+    _pool().submit(processar, tarefa_id)
+
+
+def _lote(db: Session, tarefa, etapa: str, modelo, tabela_sync, reatribuivel: bool) -> int:
+    uid, destino = tarefa.usuarioId, tarefa.destinoId
+    ids = [r[0] for r in db.execute(select(modelo.id).where(modelo.usuarioId == uid).limit(EXCLUSAO_LOTE))]
+    if not ids:
+        return 0
+    if destino is not None and reatribuivel:
+        valores = {"usuarioId": destino}
+        if tabela_sync:
+            valores["atualizadoEm"] = datetime.utcnow()
+        db.execute(update(modelo).where(modelo.id.in_(ids)).values(**valores).execution_options(synchronize_session=False))
+        acao, dono = "update", destino
+    else:
+        if tabela_sync:
+            sync.registrar_remocoes(db, tabela_sync, ids, uid)
+        if modelo is models.Documento:
+            formularios.liberar_documentos(db, modelo.id.in_(ids))
+        db.execute(delete(modelo).where(modelo.id.in_(ids)).execution_options(synchronize_session=False))
+        acao, dono = "delete", uid
+    tarefa.etapa = etapa
+    tarefa.processados += len(ids)
+    db.commit()
+    if tabela_sync:
+        eventos.publicar_mudanca(tabela_sync, acao, ids, dono)
+    return len(ids)
+
+
+def processar(tarefa_id):
+    db = SessionLocal()
+    try:
+        # Reivindica a tarefa: com vários workers, só um passa de pendente para executando
+        t = models.ExclusaoUsuario
+        res = db.execute(
+            update(t).where(t.id == tarefa_id, t.status == PENDENTE)
+            .values(status=EXECUTANDO, atualizadoEm=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if res.rowcount == 0:
+            return
+        tarefa = db.get(t, tarefa_id)
+        try:
+            for etapa, modelo, tabela_sync, reatribuivel in ETAPAS:
+                while _lote(db, tarefa, etapa, modelo, tabela_sync, reatribuivel):
+                    if _parar.wait(EXCLUSAO_PAUSA_SECONDS):
+                        # Encerrando: volta para a fila e é retomada na próxima subida
+                        tarefa.status = PENDENTE
+                        db.commit()
+                        return
+            if tarefa.destinoId is not None:
+                stats.reconstruir(db, tarefa.destinoId)
+            db.execute(delete(models.Usuario).where(models.Usuario.id == tarefa.usuarioId))
+            tarefa.etapa = None
+            tarefa.status = CONCLUIDO
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception("Falha na exclusão do usuário %s", tarefa.usuarioId)
+            tarefa.status = FALHOU
+            tarefa.erro = str(e)[:1000]
+            db.commit()
+    finally:
+        db.close()
+
+
+def retomar_pendentes():
+    db = SessionLocal()
+    try:
+        t = models.ExclusaoUsuario
+        limite = datetime.utcnow() - timedelta(seconds=EXCLUSAO_TIMEOUT_SECONDS)
+        db.execute(
+            update(t).where(t.status == EXECUTANDO, t.atualizadoEm < limite)
+            .values(status=PENDENTE).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        ids = [r[0] for r in db.query(t.id).filter(t.status == PENDENTE).order_by(t.criadoEm).all()]
+    finally:
+        db.close()
+    for tarefa_id in ids:
+        enfileirar(tarefa_id)
+    return len(ids)
+
+
+def encerrar():
+    global _executor
+    _parar.set()
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+from sqlalchemy import select, update, insert, delete, exists, func
+from sqlalchemy.exc import IntegrityError
+
+from . import models
+
+# dadosFormulario deduplicado: cada JSON distinto é gravado uma única vez em dados_formulario,
+# endereçado pelo SHA-256 da forma canônica (chaves ordenadas), e o documento guarda só o hash.
+# "referencias" conta os documentos que apontam para o conteúdo e é atualizada na mesma
+# transação que grava ou remove o documento. Conteúdos sem referência são apagados pela coleta
+# periódica, que confere os documentos antes (contador defasado nunca apaga conteúdo em uso).
+# O conteúdo de um hash nunca muda: o cache em memória dispensa invalidação.
+# Funções aceitam Session ou Connection (a migração 0011 usa as mesmas rotinas).
+
+FORMULARIO_CACHE_ITENS = int(os.getenv("FORMULARIO_CACHE_ITENS", "5000"))
+FORMULARIO_COLETA_SECONDS = int(os.getenv("FORMULARIO_COLETA_SECONDS", "3600"))
+FORMULARIO_COLETA_LOTE = int(os.getenv("FORMULARIO_COLETA_LOTE", "1000"))
+_CONSULTA_LOTE = 500
+
+_tabela = models.DadosFormulario.__table__
+_documentos = models.Documento.__table__
+
+# hash -> dados já decodificados; objetos compartilhados entre requisições (não alterar)
+_cache: OrderedDict = OrderedDict()
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def serializar(dados) -> tuple[str, str] | None:
+    # (hash, texto) ou None sem dados; mesmos separadores do formato antigo (texto compatível)
+    if dados is None:
+        return None
+    texto = json.dumps(dados, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest(), texto
+
+
+def _guardar(itens: dict):
+    if FORMULARIO_CACHE_ITENS <= 0:
+        return
+    with _lock:
+        for hash_, dados in itens.items():
+            _cache[hash_] = dados
+            _cache.move_to_end(hash_)
+        while len(_cache) > FORMULARIO_CACHE_ITENS:
+            _cache.popitem(last=False)
+
+
+def _somar(db, deltas: dict, textos: dict | None = None):
+    # UPDATE atômico do contador; conteúdo ainda inexistente é inserido num savepoint
+    # (gravação concorrente do mesmo conteúdo: a segunda cai de novo no UPDATE)
+    for hash_, delta in deltas.items():
+        if not delta:
+            continue
+        incremento = update(_tabela).where(_tabela.c.hash == hash_).values(referencias=_tabela.c.referencias + delta)
+        if db.execute(incremento).rowcount or textos is None or delta < 0:
+            continue
+        try:
+            with db.begin_nested():
+                db.execute(insert(_tabela).values(
+                    hash=hash_, conteudo=textos[hash_], referencias=delta, criadoEm=datetime.utcnow(),
+                ))
+        except IntegrityError:
+            db.execute(incremento)
+
+
+def referenciar(db, itens: list) -> list[str | None]:
+    # Uma referência por item (dict ou None); retorna os hashes na mesma ordem
+    hashes, deltas, textos = [], Counter(), {}
+    for dados in itens:
+        serializado = serializar(dados)
+        if serializado is None:
+            hashes.append(None)
+            continue
+        hash_, texto = serializado
+        hashes.append(hash_)
+        deltas[hash_] += 1
+        textos[hash_] = texto
+    _somar(db, deltas, textos)
+    _guardar({h: json.loads(t) for h, t in textos.items()})
+    return hashes
+
+
+def liberar(db, hashes):
+    _somar(db, {h: -n for h, n in Counter(h for h in hashes if h).items()})
+
+
+def trocar(db, atual: str | None, dados) -> str | None:
+    # Edição de um documento: contadores só mudam se o conteúdo mudou
+    serializado = serializar(dados)
+    novo = serializado[0] if serializado else None
+    if novo != atual:
+        liberar(db, [atual])
+        if serializado:
+            referenciar(db, [dados])
+    return novo
+
+
+def liberar_documentos(db, condicao):
+    # Devolve as referências dos documentos que satisfazem condicao (antes de apagá-los em massa)
+    h = _documentos.c.dadosFormularioHash
+    linhas = db.execute(select(h, func.count()).where(condicao, h.isnot(None)).group_by(h)).all()
+    _somar(db, {hash_: -n for hash_, n in linhas})
+
+
+def carregar(db, hashes) -> dict:
+    # hash -> dados para uma página de documentos: cache e, para o que faltar, uma consulta por lote
+    resultado, faltam = {}, []
+    with _lock:
+        for hash_ in set(h for h in hashes if h):
+            if hash_ in _cache:
+                _cache.move_to_end(hash_)
+                resultado[hash_] = _cache[hash_]
+            else:
+                faltam.append(hash_)
+    novos = {}
+    for i in range(0, len(faltam), _CONSULTA_LOTE):
+        lote = faltam[i:i + _CONSULTA_LOTE]
+        for hash_, texto in db.execute(select(_tabela.c.hash, _tabela.c.conteudo).where(_tabela.c.hash.in_(lote))):
+            try:
+                novos[hash_] = json.loads(texto)
+            except ValueError:
+                novos[hash_] = None
+    _guardar(novos)
+    resultado.update(novos)
+    return resultado
+
+
+def coletar(db, limite: int = FORMULARIO_COLETA_LOTE) -> int:
+    # Apaga conteúdos sem referência em lotes, com commit por lote
+    sem_documento = ~exists().where(_documentos.c.dadosFormularioHash == _tabela.c.hash)
+    total = 0
+    while True:
+        hashes = db.execute(
+            select(_tabela.c.hash).where(_tabela.c.referencias <= 0, sem_documento).limit(limite)
+        ).scalars().all()
+        if not hashes:
+            break
+        # Condições repetidas no DELETE: referência criada depois da seleção mantém o conteúdo
+        res = db.execute(delete(_tabela).where(_tabela.c.hash.in_(hashes), _tabela.c.referencias <= 0, sem_documento))
+        db.commit()
+        total += res.rowcount or 0
+        if len(hashes) < limite:
+            break
+    return total
+
+
+def recontar(db) -> int:
+    # Recalcula os contadores a partir dos documentos; retorna quantos estavam defasados
+    contagem = (
+        select(func.count()).select_from(_documentos)
+        .where(_documentos.c.dadosFormularioHash == _tabela.c.hash).scalar_subquery()
+    )
+    res = db.execute(update(_tabela).where(_tabela.c.referencias != contagem).values(referencias=contagem))
+    db.commit()
+    return res.rowcount or 0
+
+
+def estado(db) -> dict:
+    linhas = db.execute(select(
+        func.count(), func.coalesce(func.sum(_tabela.c.referencias), 0),
+        func.coalesce(func.sum(func.length(_tabela.c.conteudo)), 0),
+    )).one()
+    return {"conteudos": linhas[0], "referencias": int(linhas[1]), "caracteres": int(linhas[2]), "cache": len(_cache)}
+
+
+def iniciar_coleta_periodica(session_factory, intervalo: int | None = None) -> threading.Event:
+    # Thread daemon que apaga conteúdos sem referência periodicamente; retorna o evento de parada
+    parar = threading.Event()
+    intervalo = intervalo or FORMULARIO_COLETA_SECONDS
+
+    def _loop():
+        while not parar.wait(intervalo):
+            db = session_factory()
+            try:
+                coletar(db)
+            except Exception:
+                logger.exception("Falha na coleta de dados de formulário")
+            finally:
+                db.close()
+
+    threading.Thread(target=_loop, name="formularios-coleta", daemon=True).start()
+    return parar
+
+
+def main(argv: list[str]):
+    from .database import Base, engine, SessionLocal
+
+    if not argv or argv[0] not in ("coletar", "recontar", "estado"):
+        print("Uso: python -m backend.app.formularios coletar|recontar|estado")
+        return 1
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if argv[0] == "recontar":
+            print(f"[formularios] Contadores corrigidos: {recontar(db)}")
+        elif argv[0] == "coletar":
+            print(f"[formularios] Conteúdos sem referência removidos: {coletar(db)}")
+        else:
+            print(f"[formularios] {estado(db)}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,205 @@
+import os
+import json
+import importlib
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from . import models, schemas, crud, eventos, acesso
+from .database import SessionLocal
+
+GERACAO_WORKERS = int(os.getenv("GERACAO_WORKERS", "2"))
+# "local" (stub determinístico) ou caminho "pacote.modulo:Classe" de um gerador externo
+GERADOR_DOCUMENTOS = os.getenv("GERADOR_DOCUMENTOS", "local")
+# Jobs "executando" há mais tempo que isso são considerados abandonados (processo caiu)
+GERACAO_TIMEOUT_SECONDS = int(os.getenv("GERACAO_TIMEOUT_SECONDS", "600"))
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+FINAIS = (CONCLUIDO, FALHOU)
+
+
+class GeradorLocal:
+    """
+    Gerador determinístico sem dependências externas, usado em desenvolvimento e testes.
+    Geradores reais implementam o mesmo método gerar(parametros, cliente) -> str.
+    """
+
+    def gerar(self, parametros: dict, cliente: dict | None) -> str:
+        linhas = [
+            f"{parametros.get('tipoDocumento', '')}: {parametros.get('titulo', '')}",
+            f"Tom: {parametros.get('tomTexto', '')}",
+        ]
+        if cliente:
+            linhas.append(
+                f"Cliente: {cliente.get('nomeCompleto', '')}, CPF {cliente.get('cpf', '')}, "
+                f"NIT {cliente.get('nit', '')}, benefício {cliente.get('numeroBeneficio', '')}"
+            )
+            linhas.append(f"Endereço: {cliente.get('endereco', '')}, {cliente.get('bairro', '')}, "
+                          f"{cliente.get('cidade', '')}/{cliente.get('uf', '')}")
+        dados = parametros.get("dadosFormulario") or {}
+        for chave in sorted(dados):
+            linhas.append(f"{chave}: {dados[chave]}")
+        return "\n".join(linhas)
+
+
+def carregar_gerador(nome: str | None = None):
+    nome = nome or GERADOR_DOCUMENTOS
+    if nome == "local":
+        return GeradorLocal()
+    modulo, _, classe = nome.partition(":")
+    return getattr(importlib.import_module(modulo), classe)()
+
+
+_gerador = None
+_executor: ThreadPoolExecutor | None = None
+
+
+def obter_gerador():
+    global _gerador
+    if _gerador is None:
+        _gerador = carregar_gerador()
+    return _gerador
+
+
+def definir_gerador(gerador):
+    # Permite trocar o gerador em tempo de execução (ex.: testes)
+    global _gerador
+    _gerador = gerador
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=GERACAO_WORKERS, thread_name_prefix="geracao")
+    return _executor
+
+
+def _publicar(job):
+    eventos.publicar({
+        "tipo": "job",
+        "usuarioId": str(job.usuarioId),
+        **schemas.JobGeracao.model_validate(job).model_dump(mode="json"),
+    })
+
+
+def criar_job(db: Session, payload: schemas.GeracaoDocumentoRequest, usuario_id):
+    parametros = payload.model_dump(mode="json", exclude={"clienteId"})
+    job = models.JobGeracao(
+        usuarioId=usuario_id,
+        clienteId=payload.clienteId,
+        status=PENDENTE,
+        parametros=json.dumps(parametros, ensure_ascii=False),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    enfileirar(job.id)
+    return job
+
+
+def get_job(db: Session, job_id, usuario_id=None):
+    q = db.query(models.JobGeracao).filter(models.JobGeracao.id == job_id)
+    return acesso.filtrar(q, models.JobGeracao, usuario_id).first()
+
+
+def enfileirar(job_id):
+    _pool().submit(processar, job_id)
+
+
+def _dados_cliente(cliente) -> dict | None:
+    if cliente is None:
+        return None
+    return {c.key: getattr(cliente, c.key) for c in cliente.__table__.columns}
+
+
+def processar(job_id):
+    db = SessionLocal()
+    try:
+        # Reivindica o job: só um worker consegue passar de pendente para executando
+        tabela = models.JobGeracao
+        res = db.execute(
+            update(tabela)
+            .where(tabela.id == job_id, tabela.status == PENDENTE)
+            .values(status=EXECUTANDO, atualizadoEm=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if res.rowcount == 0:
+            return
+        job = get_job(db, job_id)
+        _publicar(job)
+        try:
+            parametros = json.loads(job.parametros)
+            cliente = crud.get_cliente(db, job.clienteId) if job.clienteId else None
+            conteudo = obter_gerador().gerar(parametros, _dados_cliente(cliente))
+            hoje = date.today()
+            payload = schemas.DocumentoCreate(
+                tipoDocumento=parametros["tipoDocumento"],
+                titulo=parametros["titulo"],
+                tomTexto=parametros["tomTexto"],
+                conteudo=conteudo,
+                status=parametros.get("status") or "Rascunho",
+                dataCreacao=hoje,
+                dataUltimaEdicao=hoje,
+                geradoPorIA=True,
+                dadosFormulario=parametros.get("dadosFormulario"),
+            )
+            # Documento e conclusão do job na mesma transação: se o processo cair antes do commit,
+            # nada fica gravado e o job retomado gera o documento uma única vez
+            documento = crud.create_documento(db, payload, job.usuarioId, commit=False, cliente_id=job.clienteId)
+            documento_id, usuario_id = documento.id, documento.usuarioId
+            concluiu = db.execute(
+                update(tabela)
+                .where(tabela.id == job_id, tabela.status == EXECUTANDO, tabela.documentoId.is_(None))
+                .values(status=CONCLUIDO, documentoId=documento_id, atualizadoEm=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if concluiu:
+                db.commit()
+                eventos.publicar_mudanca("documentos", "create", [documento_id], usuario_id)
+            else:
+                # Outro worker retomou o job (timeout) e concluiu primeiro: descarta esta cópia
+                db.rollback()
+            job = get_job(db, job_id)
+        except Exception as e:
+            db.rollback()
+            job = get_job(db, job_id)
+            job.status = FALHOU
+            job.erro = str(e) or e.__class__.__name__
+            db.commit()
+        _publicar(job)
+    finally:
+        db.close()
+
+
+def retomar_pendentes():
+    # Na subida: devolve à fila jobs pendentes e os abandonados por um processo que caiu
+    db = SessionLocal()
+    try:
+        tabela = models.JobGeracao
+        limite = datetime.utcnow() - timedelta(seconds=GERACAO_TIMEOUT_SECONDS)
+        db.execute(
+            update(tabela)
+            .where(tabela.status == EXECUTANDO, tabela.atualizadoEm < limite)
+            .values(status=PENDENTE)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        ids = [r[0] for r in db.query(tabela.id).filter(tabela.status == PENDENTE).order_by(tabela.criadoEm).all()]
+    finally:
+        db.close()
+    for job_id in ids:
+        enfileirar(job_id)
+    return len(ids)
+
+
+def encerrar():
+    # Jobs ainda na fila continuam "pendente" no banco e são retomados na próxima subida
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))  # default: 24h
+# Reserva de uma chave cuja requisição original não terminou (ex.: processo caiu no meio).
+# Até lá, retentativas recebem 409; o prazo precisa ser maior que o de qualquer requisição,
+# senão uma reserva ainda em andamento seria retomada e a criação executada duas vezes.
+IDEMPOTENCY_PENDING_SECONDS = int(os.getenv("IDEMPOTENCY_PENDING_SECONDS", "900"))
+IDEMPOTENCY_CLEANUP_SECONDS = int(os.getenv("IDEMPOTENCY_CLEANUP_SECONDS", "3600"))
+MAX_KEY_LENGTH = 255
+
+
+def hash_requisicao(dados) -> str:
+    corpo = json.dumps(dados, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(corpo.encode("utf-8")).hexdigest()
+
+
+def _buscar(db: Session, usuario_id, chave: str):
+    tabela = models.ChaveIdempotencia
+    return db.query(tabela).filter(tabela.usuarioId == usuario_id, tabela.chave == chave).first()
+
+
+def reservar(db: Session, usuario_id, chave: str, rota: str, hash_req: str):
+    """
+    Reserva a chave para esta requisição. Retorna (registro, novo): se novo for False,
+    o registro pertence a uma requisição anterior e deve ser reaproveitado.
+    """
+    agora = datetime.utcnow()
+    existente = _buscar(db, usuario_id, chave)
+    if existente is not None:
+        pendente_abandonada = existente.statusCode is None and existente.expiraEm < agora
+        if existente.expiraEm >= agora and not pendente_abandonada:
+            return existente, False
+        # Expirada: libera a chave para um novo uso. Exclusão condicional: uma conclusão que acabou
+        # de estender o prazo mantém o registro, e de duas retentativas só uma vence o INSERT abaixo
+        tabela = models.ChaveIdempotencia
+        db.execute(delete(tabela).where(tabela.id == existente.id, tabela.expiraEm < agora))
+        db.commit()
+
+    registro = models.ChaveIdempotencia(
+        usuarioId=usuario_id,
+        chave=chave,
+        rota=rota,
+        hashRequisicao=hash_req,
+        expiraEm=agora + timedelta(seconds=IDEMPOTENCY_PENDING_SECONDS),
+    )
+    db.add(registro)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Outra requisição com a mesma chave reservou primeiro
+        db.rollback()
+        return _buscar(db, usuario_id, chave), False
+    return registro, True
+
+
+def concluir(db: Session, registro, status_code: int, corpo):
+    registro.statusCode = status_code
+    registro.resposta = json.dumps(corpo, separators=(",", ":"), ensure_ascii=False)
+    registro.expiraEm = datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+    db.commit()
+
+
+def liberar(db: Session, registro):
+    # Requisição original falhou: remove a reserva para permitir nova tentativa
+    try:
+        db.rollback()
+        db.delete(registro)
+        db.commit()
+    except Exception:
+        db.rollback()
+
+
+def limpar_expiradas(db: Session) -> int:
+    tabela = models.ChaveIdempotencia
+    res = db.execute(delete(tabela).where(tabela.expiraEm < datetime.utcnow()))
+    db.commit()
+    return res.rowcount or 0
+
+
+def iniciar_limpeza_periodica(session_factory, intervalo: int | None = None) -> threading.Event:
+    # Thread daemon que remove chaves expiradas periodicamente; retorna o evento de parada
+    parar = threading.Event()
+    intervalo = intervalo or IDEMPOTENCY_CLEANUP_SECONDS
+
+    def _loop():
+        while not parar.wait(intervalo):
+            db = session_factory()
+            try:
+                limpar_expiradas(db)
+            except Exception:
+                pass
+            finally:
+                db.close()
+
+    threading.Thread(target=_loop, name="idempotency-cleanup", daemon=True).start()
+    return parar
+
+
+def main(argv: list[str]):
+    from .database import Base, engine, SessionLocal
+
+    if not argv or argv[0] != "cleanup":
+        print("Uso: python -m backend.app.idempotency cleanup")
+        return 1
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        n = limpar_expiradas(db)
+        print(f"[idempotency] Chaves expiradas removidas: {n}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,12 +1,18 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Request, BackgroundTasks, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from uuid import UUID
+from datetime import date, datetime, timezone
+import math
 
 from .database import Base, engine, get_db, SessionLocal
-from . import schemas, crud
-from .auth import create_token, decode_token
+from . import schemas, crud, stats, idempotency, geracao, eventos, modelos, render, blobs, sync, validacao, acesso, models, senhas, revogacao, sessoes, auditoria, exclusao, conteudo, pacote, elegibilidade, admissao, metricas, tentativas, formularios
+from .auth import decode_token
 
 # Create tables if they don't exist and ensure default admin user
 Base.metadata.create_all(bind=engine)
@@ -14,12 +20,11 @@ Base.metadata.create_all(bind=engine)
 def _ensure_default_admin():
     try:
         from .models import Usuario
-        import hashlib
         db = SessionLocal()
         try:
             admin = db.query(Usuario).filter(Usuario.login == "admin").first()
             if not admin:
-                pwd_hash = hashlib.sha256("admin123".encode("utf-8")).hexdigest()
+                pwd_hash = senhas.gerar_hash_local("admin123")
                 novo = Usuario(
                     nome="Administrador",
                     login="admin",
@@ -37,8 +42,24 @@ def _ensure_default_admin():
 
 _ensure_default_admin()
 
+
+def _ensure_stats():
+    try:
+        db = SessionLocal()
+        try:
+            stats.garantir_inicializado(db)
+        finally:
+            db.close()
+    except Exception:
+        pass
+
+_ensure_stats()
+
 app = FastAPI(title="JurixPrev API")
 
+# Controle de admissão: adicionado antes do CORS para ficar dentro dele (o 503 também leva os cabeçalhos CORS)
+app.add_middleware(admissao.ControleAdmissao)
+
 # CORS for Angular dev server
 app.add_middleware(
     CORSMiddleware,
@@ -56,12 +77,53 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+def _iniciar_tarefas():
+    app.state.parar_limpeza_idempotencia = idempotency.iniciar_limpeza_periodica(SessionLocal)
+    app.state.parar_revogacao = revogacao.iniciar_sincronizacao(SessionLocal)
+    app.state.parar_coleta_formularios = formularios.iniciar_coleta_periodica(SessionLocal)
+    auditoria.iniciar(engine)
+    eventos.iniciar(engine)
+    geracao.retomar_pendentes()
+    exclusao.retomar_pendentes()
+
+
+@app.on_event("shutdown")
+def _encerrar_tarefas():
+    for nome in ("parar_limpeza_idempotencia", "parar_revogacao", "parar_coleta_formularios"):
+        parar = getattr(app.state, nome, None)
+        if parar:
+            parar.set()
+    geracao.encerrar()
+    exclusao.encerrar()
+    eventos.encerrar()
+    modelos.encerrar()
+    render.encerrar()
+    senhas.encerrar()
+    auditoria.encerrar()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
-bearer_scheme = HTTPBearer()
+
+def _ip_cliente(request: Request) -> str | None:
+    # Endereço do cliente para o limite de login e o acesso local a /metrics. Atrás de um proxy
+    # reverso, o uvicorn só o substitui pelo X-Forwarded-For quando a conexão vem de um proxy
+    # confiável (SERVIDOR_PROXIES em `python -m backend.app serve`, --forwarded-allow-ips no
+    # uvicorn direto); fora disso é o endereço do proxy, o mesmo para todos os clientes
+    return request.client.host if request.client else None
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(request: Request, authorization: str | None = Header(None)):
+    if not metricas.autorizado(_ip_cliente(request), authorization, request.headers):
+        raise HTTPException(status_code=403, detail="Sem permissão")
+    return metricas.texto()
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+oauth2_scheme_opcional = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
@@ -76,7 +138,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         try:
             from uuid import UUID as _UUID
             uid = _UUID(data.get("sub"))
-            usuario = db.query(crud.models.Usuario).filter(crud.models.Usuario.id == uid).first()  # type: ignore
+            usuario = crud.get_usuario_por_id(db, uid)
         except Exception:
             usuario = None
     if not usuario:
@@ -84,49 +146,142 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     return usuario
 
 
+def get_current_user_stream(
+    token: str | None = Depends(oauth2_scheme_opcional),
+    access_token: str | None = Query(None),
+    db: Session = Depends(get_db),
+):
+    # EventSource não envia cabeçalhos: aceita também ?access_token=
+    return get_current_user(token or access_token, db)
+
+
+def _criar_idempotente(db: Session, current_user, chave: str, rota: str, payload, criar, schema):
+    # Executa criar() uma única vez por (usuário, Idempotency-Key); retentativas recebem a resposta gravada
+    if len(chave) > idempotency.MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key muito longa")
+    hash_req = idempotency.hash_requisicao({"rota": rota, "payload": payload.model_dump(mode="json")})
+    registro, novo = idempotency.reservar(db, current_user.id, chave, rota, hash_req)
+    if not novo:
+        if registro.hashRequisicao != hash_req:
+            raise HTTPException(status_code=422, detail="Idempotency-Key já utilizada com outra requisição")
+        if registro.statusCode is None:
+            raise HTTPException(status_code=409, detail="Requisição com esta Idempotency-Key ainda em processamento")
+        import json
+        return JSONResponse(
+            status_code=registro.statusCode,
+            content=json.loads(registro.resposta),
+            headers={"Idempotent-Replayed": "true"},
+        )
+    try:
+        corpo = jsonable_encoder(schema.model_validate(criar()))
+    except Exception:
+        idempotency.liberar(db, registro)
+        raise
+    idempotency.concluir(db, registro, 200, corpo)
+    return corpo
+
+
+def _documentos_saida(db: Session, docs) -> list[schemas.Documento]:
+    # dadosFormulario de todos os documentos resolvidos de uma vez (cache ou uma consulta por lote)
+    formularios_docs = formularios.carregar(db, [d.dadosFormularioHash for d in docs])
+    return [_documento_saida(d, formularios_docs.get(d.dadosFormularioHash)) for d in docs]
+
+
+def _documento_saida(doc, dados_formulario=None) -> schemas.Documento:
+    # converter campos serializados sem alterar o objeto da sessão
+    dados = {c.key: getattr(doc, c.key) for c in doc.__table__.columns}
+    dados["dadosFormulario"] = dados_formulario
+    dados["geradoPorIA"] = str(doc.geradoPorIA).lower() == "true"
+    return schemas.Documento.model_validate(dados)
+
+
+def _salvar_cliente(db: Session, usuario_id, salvar, cpf: str, cliente_id=None):
+    # CPF é único por escritório: confere antes pelo índice e trata a corrida pela constraint
+    existente = crud.get_cliente_por_cpf(db, cpf, usuario_id)
+    if existente is not None and existente.id != cliente_id:
+        raise HTTPException(status_code=409, detail="CPF já cadastrado para outro cliente")
+    try:
+        return salvar()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="CPF já cadastrado para outro cliente")
+
+
 @app.get("/clientes", response_model=list[schemas.Cliente])
 def listar_clientes(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    if (current_user.perfil or "U").upper() in ("A", "ADMINISTRATIVO"):
-        return crud.list_clientes(db)
-    return crud.list_clientes_by_usuario(db, current_user.id)
+    auditoria.registrar(current_user.id, auditoria.LISTAR, "clientes")
+    return crud.list_clientes(db, acesso.escopo(current_user))
 
 
 @app.post("/clientes", response_model=schemas.Cliente)
-def criar_cliente(payload: schemas.ClienteCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    return crud.create_cliente(db, payload, current_user.id)
+def criar_cliente(
+    payload: schemas.ClienteCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+):
+    # Id lido antes do commit, que expira o usuário (evita relê-lo só para a auditoria)
+    usuario_id = current_user.id
 
+    def criar():
+        cliente = _salvar_cliente(db, usuario_id, lambda: crud.create_cliente(db, payload, usuario_id), payload.cpf)
+        auditoria.registrar(usuario_id, auditoria.CRIAR, "clientes", cliente.id)
+        return cliente
 
-@app.get("/clientes/{cliente_id}", response_model=schemas.Cliente)
-def obter_cliente(cliente_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    cliente = crud.get_cliente(db, cliente_id)
+    if idempotency_key:
+        return _criar_idempotente(db, current_user, idempotency_key, "POST /clientes", payload, criar, schemas.Cliente)
+    return criar()
+
+
+@app.get("/clientes/by-cpf/{cpf}", response_model=schemas.Cliente)
+def obter_cliente_por_cpf(
+    cpf: str,
+    usuario_id: UUID | None = Query(None, alias="usuarioId"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    # Busca no escritório do usuário logado; administrador pode informar outro usuarioId
+    if not validacao.cpf_valido(cpf):
+        raise HTTPException(status_code=422, detail="CPF inválido")
+    if not acesso.dono_permitido(current_user, usuario_id):
+        raise HTTPException(status_code=403, detail="Sem acesso ao recurso")
+    cliente = crud.get_cliente_por_cpf(db, validacao.somente_digitos(cpf), usuario_id or current_user.id)
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
-    if (current_user.perfil or "USUARIO").upper() != "ADMINISTRATIVO" and getattr(cliente, "usuarioId", None) != current_user.id:
-        raise HTTPException(status_code=403, detail="Sem acesso ao recurso")
+    auditoria.registrar(current_user.id, auditoria.VISUALIZAR, "clientes", cliente.id)
+    return cliente
+
+
+@app.get("/clientes/{cliente_id}", response_model=schemas.Cliente)
+def obter_cliente(cliente_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    cliente = acesso.obter(db, models.Cliente, cliente_id, current_user, "Cliente não encontrado")
+    auditoria.registrar(current_user.id, auditoria.VISUALIZAR, "clientes", cliente.id)
     return cliente
 
 
 @app.put("/clientes/{cliente_id}", response_model=schemas.Cliente)
 def atualizar_cliente(cliente_id: UUID, payload: schemas.ClienteUpdate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    cliente = crud.get_cliente(db, cliente_id)
-    if not cliente:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
-    if (current_user.perfil or "U").upper() not in ("A", "ADMINISTRATIVO") and getattr(cliente, "usuarioId", None) != current_user.id:
-        raise HTTPException(status_code=403, detail="Sem acesso ao recurso")
-    return crud.update_cliente(db, cliente, payload)
+    cliente = acesso.obter(db, models.Cliente, cliente_id, current_user, "Cliente não encontrado")
+    usuario_id = current_user.id
+    atualizado = _salvar_cliente(db, cliente.usuarioId, lambda: crud.update_cliente(db, cliente, payload), payload.cpf, cliente.id)
+    auditoria.registrar(usuario_id, auditoria.ATUALIZAR, "clientes", cliente_id)
+    return atualizado
 
 
 @app.delete("/clientes/{cliente_id}")
 def remover_cliente(cliente_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    cliente = crud.get_cliente(db, cliente_id)
-    if not cliente:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
-    if (current_user.perfil or "USUARIO").upper() != "ADMINISTRATIVO" and getattr(cliente, "usuarioId", None) != current_user.id:
-        raise HTTPException(status_code=403, detail="Sem acesso ao recurso")
+    cliente = acesso.obter(db, models.Cliente, cliente_id, current_user, "Cliente não encontrado")
+    usuario_id = current_user.id
     crud.delete_cliente(db, cliente)
+    auditoria.registrar(usuario_id, auditoria.EXCLUIR, "clientes", cliente_id)
     return {"ok": True}
 
 
+def _servidor_ocupado() -> HTTPException:
+    # Fila de cálculo de hash de senha cheia (senhas.SenhaSobrecarregada)
+    return HTTPException(status_code=503, detail="Servidor ocupado, tente novamente", headers={"Retry-After": "1"})
+
+
 # Usuários
 @app.post("/usuarios/register", response_model=schemas.Usuario)
 def registrar_usuario(
@@ -135,12 +290,14 @@ def registrar_usuario(
     current_user=Depends(get_current_user)
 ):
     # Apenas administrador pode cadastrar usuários
-    if (current_user.perfil or "U").upper() not in ("A", "ADMINISTRATIVO"):
-        raise HTTPException(status_code=403, detail="Sem permissão para cadastrar usuários")
-    existente = crud.get_usuario_por_login(db, payload.login)
+    acesso.exigir_admin(current_user, "Sem permissão para cadastrar usuários")
+    existente = crud.get_usuario_por_login(db, payload.login, incluir_excluidos=True)
     if existente:
         raise HTTPException(status_code=400, detail="Login já cadastrado")
-    criado = crud.create_usuario(db, payload)
+    try:
+        criado = crud.create_usuario(db, payload)
+    except senhas.SenhaSobrecarregada:
+        raise _servidor_ocupado()
     return schemas.Usuario(id=criado.id, nome=criado.nome, login=criado.login, perfil=criado.perfil, status=criado.status)
 
 @app.get("/usuarios/by-login/{login}", response_model=schemas.Usuario)
@@ -152,118 +309,598 @@ def obter_usuario_por_login(login: str, db: Session = Depends(get_db)):
 
 @app.get("/usuarios", response_model=list[schemas.Usuario])
 def listar_usuarios(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    if (current_user.perfil or "U").upper() not in ("A", "ADMINISTRATIVO"):
-        raise HTTPException(status_code=403, detail="Sem permissão para listar usuários")
+    acesso.exigir_admin(current_user, "Sem permissão para listar usuários")
     usuarios = crud.list_usuarios(db)
     return [schemas.Usuario(id=u.id, nome=u.nome, login=u.login, perfil=u.perfil, status=u.status) for u in usuarios]
 
 
 @app.put("/usuarios/{usuario_id}", response_model=schemas.Usuario)
 def atualizar_usuario(usuario_id: UUID, payload: schemas.UsuarioUpdate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    if (current_user.perfil or "U").upper() not in ("A", "ADMINISTRATIVO"):
-        raise HTTPException(status_code=403, detail="Sem permissão para editar usuários")
-    atualizado = crud.update_usuario(db, usuario_id, payload)
+    acesso.exigir_admin(current_user, "Sem permissão para editar usuários")
+    try:
+        atualizado = crud.update_usuario(db, usuario_id, payload)
+    except senhas.SenhaSobrecarregada:
+        raise _servidor_ocupado()
     if not atualizado:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return schemas.Usuario(id=atualizado.id, nome=atualizado.nome, login=atualizado.login, perfil=atualizado.perfil, status=atualizado.status)
 
 
-@app.delete("/usuarios/{usuario_id}")
-def remover_usuario(usuario_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    if (current_user.perfil or "U").upper() not in ("A", "ADMINISTRATIVO"):
-        raise HTTPException(status_code=403, detail="Sem permissão para excluir usuários")
-    ok = crud.delete_usuario(db, usuario_id)
-    if not ok:
+@app.delete("/usuarios/{usuario_id}", status_code=202)
+def remover_usuario(
+    usuario_id: UUID,
+    reatribuir_para: UUID | None = Query(None, alias="reatribuirPara", description="Usuário que recebe clientes, documentos e modelos"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    # Exclusão lógica imediata; a remoção/reatribuição dos registros segue em segundo plano
+    # (acompanhar em GET /usuarios/{id}/exclusao)
+    acesso.exigir_admin(current_user, "Sem permissão para excluir usuários")
+    if usuario_id == current_user.id:
+        raise HTTPException(status_code=400, detail="Não é possível excluir o próprio usuário")
+    if reatribuir_para is not None and (reatribuir_para == usuario_id or not crud.get_usuario_por_id(db, reatribuir_para)):
+        raise HTTPException(status_code=400, detail="Usuário de destino inválido")
+    try:
+        tarefa = crud.delete_usuario(db, usuario_id, reatribuir_para)
+    except exclusao.ConflitoReatribuicao as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not tarefa:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
-    return {"ok": True}
+    return {"ok": True, "exclusao": schemas.ExclusaoUsuario.model_validate(tarefa)}
+
+
+@app.get("/usuarios/{usuario_id}/exclusao", response_model=schemas.ExclusaoUsuario)
+def acompanhar_exclusao(usuario_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    acesso.exigir_admin(current_user, "Sem permissão para excluir usuários")
+    tarefa = exclusao.obter(db, usuario_id)
+    if not tarefa:
+        raise HTTPException(status_code=404, detail="Exclusão não encontrada")
+    return tarefa
+
+
+async def _autenticar(db: Session, login: str, senha: str):
+    # A KDF roda no pool de processos de senhas; consultas ao banco no threadpool
+    usuario = await run_in_threadpool(crud.get_usuario_por_login, db, login)
+    ativo = usuario is not None and crud.usuario_ativo(usuario)
+    try:
+        ok, regravar = await senhas.verificar_async(senha, usuario.senhaHash if ativo else None)
+    except senhas.SenhaSobrecarregada:
+        raise _servidor_ocupado()
+    if not ok:
+        return None
+    if regravar:
+        try:
+            novo_hash = await senhas.gerar_hash_async(senha)
+        except senhas.SenhaSobrecarregada:
+            # Regravação fica para o próximo login
+            return usuario
+        await run_in_threadpool(crud.regravar_senha, db, usuario, novo_hash)
+    return usuario
+
+
+def _limitar_tentativas(request: Request, login: str):
+    # Antes de qualquer acesso ao banco ou cálculo de hash
+    espera = tentativas.verificar(_ip_cliente(request), login)
+    if espera:
+        segundos = max(1, math.ceil(espera))
+        raise HTTPException(
+            status_code=429,
+            detail=f"Muitas tentativas de login. Tente novamente em {segundos} s",
+            headers={"Retry-After": str(segundos)},
+        )
 
 
 @app.post("/auth/login", response_model=schemas.AuthTokenResponse)
-def autenticar(payload: schemas.AuthLoginRequest, db: Session = Depends(get_db)):
-    usuario = crud.verificar_login(db, payload.login, payload.senha)
+async def autenticar(payload: schemas.AuthLoginRequest, request: Request, db: Session = Depends(get_db)):
+    _limitar_tentativas(request, payload.login)
+    usuario = await _autenticar(db, payload.login, payload.senha)
     if not usuario:
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
-    token = create_token({"sub": str(usuario.id), "login": usuario.login, "perfil": usuario.perfil})
-    # Retorna dict explícito para evitar qualquer inconsistência de serialização
-    return {
-        "access_token": token,
-        "token_type": "bearer",
-        "usuario": {
-            "id": str(usuario.id),
-            "nome": usuario.nome,
-            "login": usuario.login,
-            "perfil": usuario.perfil,
-            "status": usuario.status,
-        },
-        }
+    tentativas.sucesso(payload.login)
+    # Retorna dict explícito para evitar qualquer inconsistência de serialização;
+    # lido antes de emitir, cujo commit expira o usuário
+    dados_usuario = {
+        "id": str(usuario.id),
+        "nome": usuario.nome,
+        "login": usuario.login,
+        "perfil": usuario.perfil,
+        "status": usuario.status,
+    }
+    tokens = await run_in_threadpool(sessoes.emitir, db, usuario)
+    return {**tokens, "usuario": dados_usuario}
 
 @app.post("/auth/token")
-def obter_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    usuario = crud.verificar_login(db, form_data.username, form_data.password)
+async def obter_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    _limitar_tentativas(request, form_data.username)
+    usuario = await _autenticar(db, form_data.username, form_data.password)
     if not usuario:
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
-    token = create_token({"sub": str(usuario.id), "login": usuario.login, "perfil": usuario.perfil})
-    return {
-        "access_token": token,
-        "token_type": "bearer",
-    }
+    tentativas.sucesso(form_data.username)
+    return await run_in_threadpool(sessoes.emitir, db, usuario)
+
+
+@app.post("/auth/refresh", response_model=schemas.AuthTokenPar)
+def renovar_token(payload: schemas.AuthRefreshRequest, db: Session = Depends(get_db)):
+    tokens = sessoes.renovar(db, payload.refresh_token)
+    if not tokens:
+        raise HTTPException(status_code=401, detail="Sessão inválida ou expirada")
+    return tokens
+
+
+@app.post("/auth/logout")
+def sair(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    dados = decode_token(token)
+    if not dados:
+        raise HTTPException(status_code=401, detail="Token inválido")
+    if dados.get("sid"):
+        sessoes.encerrar_por_id(db, dados["sid"])
+    elif dados.get("jti"):
+        # Token sem sessão: revoga apenas ele até expirar
+        revogacao.registrar(db, revogacao.TOKEN, dados["jti"], datetime.utcfromtimestamp(int(dados["exp"])))
+    return {"ok": True}
 
 
 # Documentos
 @app.get("/documentos", response_model=list[schemas.Documento])
 def listar_documentos(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    # converter campos serializados
-    if (current_user.perfil or "USUARIO").upper() == "ADMINISTRATIVO":
-        docs = crud.list_documentos(db)
-    else:
-        docs = crud.list_documentos_by_usuario(db, current_user.id)
-    import json
-    for d in docs:
-        try:
-            d.dadosFormulario = json.loads(d.dadosFormulario) if d.dadosFormulario else None
-        except Exception:
-            d.dadosFormulario = None
-        d.geradoPorIA = str(d.geradoPorIA).lower() == "true"
-    return docs
+    docs = crud.list_documentos(db, acesso.escopo(current_user))
+    auditoria.registrar(current_user.id, auditoria.LISTAR, "documentos")
+    return _documentos_saida(db, docs)
 
 
 @app.post("/documentos", response_model=schemas.Documento)
-def criar_documento(payload: schemas.DocumentoCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    return crud.create_documento(db, payload, current_user.id)
+def criar_documento(
+    payload: schemas.DocumentoCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+):
+    usuario_id = current_user.id
+
+    def criar():
+        documento = crud.create_documento(db, payload, usuario_id)
+        auditoria.registrar(usuario_id, auditoria.CRIAR, "documentos", documento.id)
+        return _documentos_saida(db, [documento])[0]
+
+    if idempotency_key:
+        return _criar_idempotente(db, current_user, idempotency_key, "POST /documentos", payload, criar, schemas.Documento)
+    return criar()
+
+
+# Geração em lote a partir de modelo (mala direta)
+MAX_LOTE_DOCUMENTOS = 5000
+
+
+@app.post("/documentos/lote", response_model=schemas.LoteDocumentosResponse)
+def gerar_documentos_lote(payload: schemas.LoteDocumentosRequest, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    modelo = _obter_modelo_autorizado(db, payload.modeloId, current_user)
+    ids = list(dict.fromkeys(payload.clienteIds))
+    if not ids:
+        raise HTTPException(status_code=400, detail="Nenhum cliente informado")
+    if len(ids) > MAX_LOTE_DOCUMENTOS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_LOTE_DOCUMENTOS} clientes por lote")
+    clientes = {c.id: c for c in crud.get_clientes_por_ids(db, ids, acesso.escopo(current_user))}
+    if len(clientes) != len(ids):
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    try:
+        documento_ids = crud.create_documentos_lote(db, modelo, [clientes[i] for i in ids], current_user.id, payload.status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for documento_id in documento_ids:
+        auditoria.registrar(current_user.id, auditoria.CRIAR, "documentos", documento_id)
+    return {"total": len(documento_ids), "documentoIds": documento_ids}
+
+
+# Exportação em ZIP
+@app.post("/documentos/bundle")
+def exportar_documentos(payload: schemas.PacoteDocumentosRequest, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    criterios = {
+        "ids": list(dict.fromkeys(payload.ids or [])),
+        "cliente_id": payload.clienteId,
+        "status": payload.status,
+        "tipo_documento": payload.tipoDocumento,
+    }
+    if not any(criterios.values()):
+        raise HTTPException(status_code=400, detail="Informe ids ou ao menos um filtro")
+    usuario_id = acesso.escopo(current_user)
+    total = pacote.contar(db, usuario_id, **criterios)
+    if criterios["ids"] and total != len(criterios["ids"]) and not any(criterios[k] for k in ("cliente_id", "status", "tipo_documento")):
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    if total > pacote.PACOTE_MAX_DOCUMENTOS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {pacote.PACOTE_MAX_DOCUMENTOS} documentos por pacote")
+    formatos = list(dict.fromkeys(payload.formatos)) or ["txt"]
+    nome = f"documentos-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.zip"
+    return StreamingResponse(
+        pacote.gerar_zip(SessionLocal, current_user.id, usuario_id, criterios, formatos),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{nome}"', "X-Total-Documentos": str(total)},
+    )
+
+
+# Geração assíncrona (IA)
+@app.post("/documentos/generate", response_model=schemas.JobGeracao, status_code=202)
+def gerar_documento(payload: schemas.GeracaoDocumentoRequest, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    if payload.clienteId:
+        acesso.obter(db, models.Cliente, payload.clienteId, current_user, "Cliente não encontrado")
+    return geracao.criar_job(db, payload, current_user.id)
+
+
+def _obter_job_autorizado(db: Session, job_id, current_user):
+    return acesso.obter(db, models.JobGeracao, job_id, current_user, "Job não encontrado")
+
+
+@app.get("/documentos/jobs/{job_id}", response_model=schemas.JobGeracao)
+def obter_job(job_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    return _obter_job_autorizado(db, job_id, current_user)
+
+
+@app.get("/documentos/jobs/{job_id}/events")
+async def acompanhar_job(job_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user_stream)):
+    # Server-Sent Events com as mudanças de status do job até ele terminar
+    import json
+    import asyncio
+    assinatura = eventos.assinar(lambda e: e.get("tipo") == "job" and e.get("id") == str(job_id))
+    try:
+        job = await run_in_threadpool(_obter_job_autorizado, db, job_id, current_user)
+        inicial = schemas.JobGeracao.model_validate(job).model_dump(mode="json")
+    except Exception:
+        eventos.cancelar(assinatura)
+        raise
+
+    async def stream():
+        try:
+            yield f"event: status\ndata: {json.dumps(inicial)}\n\n"
+            if inicial["status"] in geracao.FINAIS:
+                return
+            while True:
+                try:
+                    evento = await asyncio.wait_for(assinatura.fila.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(evento)}\n\n"
+                if evento.get("status") in geracao.FINAIS:
+                    return
+        finally:
+            eventos.cancelar(assinatura)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @app.get("/documentos/{documento_id}", response_model=schemas.Documento)
 def obter_documento(documento_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    doc = crud.get_documento(db, documento_id)
+    documento = _obter_documento_autorizado(db, documento_id, current_user)
+    auditoria.registrar(current_user.id, auditoria.VISUALIZAR, "documentos", documento_id)
+    return _documentos_saida(db, [documento])[0]
+
+
+def _obter_documento_autorizado(db: Session, documento_id, current_user):
+    return acesso.obter(db, models.Documento, documento_id, current_user, "Documento não encontrado")
+
+
+class _RespostaCache(FileResponse):
+    # Serve um link fixado por CacheRender.obter() e o libera ao terminar, mesmo com erro,
+    # Range inválido ou cliente desconectado
+    def __init__(self, cache, caminho: str, **kwargs):
+        super().__init__(caminho, **kwargs)
+        self._cache = cache
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._cache.liberar(self.path)
+
+
+@app.get("/documentos/{documento_id}/render")
+async def renderizar_documento(
+    documento_id: UUID,
+    formato: str = Query("pdf", alias="format", pattern="^(pdf|docx)$"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    # Renderiza em pool de processos e serve do cache em disco (com suporte a Range)
+    doc = await run_in_threadpool(_obter_documento_autorizado, db, documento_id, current_user)
+    auditoria.registrar(current_user.id, auditoria.VISUALIZAR, "documentos", documento_id)
+    caminho, chave = await render.obter_ou_renderizar(formato, doc.titulo, doc.conteudo)
+    return _RespostaCache(
+        render.cache,
+        caminho,
+        media_type=render.FORMATOS[formato],
+        filename=f"{doc.titulo or 'documento'}.{formato}",
+        headers={"ETag": f'"{chave}"', "Cache-Control": "private, no-cache"},
+    )
+
+
+@app.put("/documentos/{documento_id}/conteudo")
+async def enviar_conteudo(documento_id: UUID, request: Request, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    # Corpo text/plain UTF-8 (opcionalmente Content-Encoding: gzip), gravado sem passar pelo JSON
+    doc = await run_in_threadpool(conteudo.obter_versao, db, documento_id, current_user)
     if not doc:
         raise HTTPException(status_code=404, detail="Documento não encontrado")
-    if (current_user.perfil or "USUARIO").upper() != "ADMINISTRATIVO" and getattr(doc, "usuarioId", None) != current_user.id:
-        raise HTTPException(status_code=403, detail="Sem acesso ao recurso")
-    import json
+    codificacao = request.headers.get("content-encoding")
+    declarado = request.headers.get("content-length")
+    if (not codificacao or codificacao == "identity") and declarado and declarado.isdigit() and int(declarado) > conteudo.CONTEUDO_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Conteúdo excede o tamanho máximo")
     try:
-        doc.dadosFormulario = json.loads(doc.dadosFormulario) if doc.dadosFormulario else None
-    except Exception:
-        doc.dadosFormulario = None
-    doc.geradoPorIA = str(doc.geradoPorIA).lower() == "true"
-    return doc
+        arquivo = await conteudo.receber(request.stream(), codificacao)
+    except conteudo.ConteudoMuitoGrande:
+        raise HTTPException(status_code=413, detail="Conteúdo excede o tamanho máximo")
+    except conteudo.ConteudoInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        tamanho = arquivo.seek(0, 2)
+        arquivo.seek(0)
+        atualizado_em = await run_in_threadpool(conteudo.gravar, db, doc, arquivo)
+    finally:
+        arquivo.close()
+    auditoria.registrar(current_user.id, auditoria.ATUALIZAR, "documentos", documento_id)
+    return JSONResponse(
+        {"ok": True, "tamanho": tamanho},
+        headers={"ETag": conteudo.etag(conteudo.chave(documento_id, atualizado_em))},
+    )
+
+
+@app.get("/documentos/{documento_id}/conteudo")
+def baixar_conteudo(documento_id: UUID, request: Request, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    # Texto bruto servido do cache em disco: Content-Length, Range e gzip sem carregar tudo em memória
+    doc = conteudo.obter_versao(db, documento_id, current_user)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    auditoria.registrar(current_user.id, auditoria.VISUALIZAR, "documentos", documento_id)
+    headers = {"Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    gzip = "gzip" in (request.headers.get("accept-encoding") or "").lower() and "range" not in request.headers
+    etag = conteudo.etag(conteudo.chave(doc.id, doc.atualizadoEm), gzip)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+    resultado = conteudo.arquivo(db, doc, gzip)
+    if resultado is None:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    caminho, chave = resultado
+    headers["ETag"] = conteudo.etag(chave, gzip)
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return _RespostaCache(conteudo.cache, caminho, media_type="text/plain; charset=utf-8", headers=headers)
 
 
 @app.put("/documentos/{documento_id}", response_model=schemas.Documento)
 def atualizar_documento(documento_id: UUID, payload: schemas.DocumentoUpdate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    doc = crud.get_documento(db, documento_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Documento não encontrado")
-    if (current_user.perfil or "U").upper() not in ("A", "ADMINISTRATIVO") and getattr(doc, "usuarioId", None) != current_user.id:
-        raise HTTPException(status_code=403, detail="Sem acesso ao recurso")
-    return crud.update_documento(db, doc, payload)
+    doc = _obter_documento_autorizado(db, documento_id, current_user)
+    usuario_id = current_user.id
+    atualizado = crud.update_documento(db, doc, payload)
+    auditoria.registrar(usuario_id, auditoria.ATUALIZAR, "documentos", documento_id)
+    return _documentos_saida(db, [atualizado])[0]
 
 
 @app.delete("/documentos/{documento_id}")
 def remover_documento(documento_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    doc = crud.get_documento(db, documento_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Documento não encontrado")
-    if (current_user.perfil or "USUARIO").upper() != "ADMINISTRATIVO" and getattr(doc, "usuarioId", None) != current_user.id:
-        raise HTTPException(status_code=403, detail="Sem acesso ao recurso")
+    doc = _obter_documento_autorizado(db, documento_id, current_user)
+    usuario_id = current_user.id
     crud.delete_documento(db, doc)
-    return {"ok": True}
\ No newline at end of file
+    auditoria.registrar(usuario_id, auditoria.EXCLUIR, "documentos", documento_id)
+    return {"ok": True}
+
+
+# Auditoria
+@app.get("/auditoria", response_model=schemas.AuditoriaPagina)
+def consultar_auditoria(
+    usuario_id: UUID | None = Query(None, alias="usuarioId"),
+    tabela: str | None = Query(None, pattern="^(clientes|documentos)$"),
+    registro_id: str | None = Query(None, alias="registroId"),
+    acao: str | None = None,
+    desde: datetime | None = None,
+    ate: datetime | None = None,
+    antes_de: int | None = Query(None, alias="cursor", description="Valor de 'proximo' da página anterior"),
+    limite: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    acesso.exigir_admin(current_user, "Sem permissão para consultar a auditoria")
+    itens = crud.list_auditoria(db, usuario_id, tabela, registro_id, acao, desde, ate, antes_de, limite)
+    return {"itens": itens, "proximo": itens[-1].id if len(itens) == limite else None}
+
+
+# Estatísticas (dashboard)
+@app.get("/stats", response_model=schemas.Estatisticas)
+def obter_estatisticas(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    return stats.obter(db, acesso.escopo(current_user))
+
+
+# Relatórios
+@app.get("/relatorios/elegibilidade", response_model=schemas.RelatorioElegibilidade)
+def relatorio_elegibilidade(
+    regra: str = Query("idade_urbana", pattern="^(" + "|".join(elegibilidade.REGRAS) + ")$"),
+    dentro_de_meses: int | None = Query(None, alias="dentroDeMeses", ge=0, le=600),
+    incluir_elegiveis: bool = Query(True, alias="incluirElegiveis"),
+    sem_beneficio: bool = Query(False, alias="semBeneficio"),
+    referencia: date | None = None,
+    usuario_id: UUID | None = Query(None, alias="usuarioId"),
+    limite: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    if not acesso.dono_permitido(current_user, usuario_id):
+        raise HTTPException(status_code=403, detail="Sem permissão para consultar clientes de outro usuário")
+    escopo = usuario_id if usuario_id is not None else acesso.escopo(current_user)
+    return elegibilidade.relatorio(
+        db, escopo, regra, referencia or date.today(),
+        dentro_de_meses, incluir_elegiveis, sem_beneficio, limite,
+    )
+
+
+@app.get("/relatorios/documentos", response_model=schemas.SerieDocumentos)
+def relatorio_documentos(
+    campo: str = Query("criacao", pattern="^(criacao|edicao)$", description="dataCreacao ou dataUltimaEdicao"),
+    periodo: str = Query("mes", pattern="^(dia|semana|mes|ano)$"),
+    inicio: date | None = None,
+    fim: date | None = None,
+    agrupar_por: str | None = Query(None, alias="agruparPor", pattern="^(status|tipoDocumento)$"),
+    status: str | None = None,
+    tipo_documento: str | None = Query(None, alias="tipoDocumento"),
+    usuario_id: UUID | None = Query(None, alias="usuarioId"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    if not acesso.dono_permitido(current_user, usuario_id):
+        raise HTTPException(status_code=403, detail="Sem permissão para consultar documentos de outro usuário")
+    fim = fim or date.today()
+    inicio = inicio or date(fim.year - 1, fim.month, 1)
+    if inicio > fim:
+        raise HTTPException(status_code=400, detail="inicio deve ser anterior a fim")
+    escopo = usuario_id if usuario_id is not None else acesso.escopo(current_user)
+    try:
+        return stats.serie_documentos(db, escopo, campo, periodo, inicio, fim, agrupar_por, status, tipo_documento)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Modelos de documento
+
+def _validar_modelo(payload):
+    try:
+        modelos.compilar(payload.titulo)
+        modelos.compilar(payload.corpo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _obter_modelo_autorizado(db: Session, modelo_id, current_user):
+    return acesso.obter(db, models.ModeloDocumento, modelo_id, current_user, "Modelo não encontrado")
+
+
+@app.get("/modelos", response_model=list[schemas.ModeloDocumento])
+def listar_modelos(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    return crud.list_modelos(db, acesso.escopo(current_user))
+
+
+@app.post("/modelos", response_model=schemas.ModeloDocumento)
+def criar_modelo(payload: schemas.ModeloDocumentoCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    _validar_modelo(payload)
+    return crud.create_modelo(db, payload, current_user.id)
+
+
+@app.get("/modelos/{modelo_id}", response_model=schemas.ModeloDocumento)
+def obter_modelo(modelo_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    return _obter_modelo_autorizado(db, modelo_id, current_user)
+
+
+@app.put("/modelos/{modelo_id}", response_model=schemas.ModeloDocumento)
+def atualizar_modelo(modelo_id: UUID, payload: schemas.ModeloDocumentoUpdate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    modelo = _obter_modelo_autorizado(db, modelo_id, current_user)
+    _validar_modelo(payload)
+    return crud.update_modelo(db, modelo, payload)
+
+
+@app.delete("/modelos/{modelo_id}")
+def remover_modelo(modelo_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    modelo = _obter_modelo_autorizado(db, modelo_id, current_user)
+    crud.delete_modelo(db, modelo)
+    return {"ok": True}
+
+
+# Blobs (imagens dos documentos)
+def _gerar_miniatura_em_segundo_plano(blob_hash: str):
+    db = SessionLocal()
+    try:
+        blob = blobs.get_blob(db, blob_hash)
+        if blob:
+            blobs.gerar_miniatura(db, blob)
+    finally:
+        db.close()
+
+
+@app.post("/blobs", response_model=schemas.Blob, status_code=201)
+async def enviar_blob(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    # Corpo bruto da requisição, gravado em disco à medida que chega
+    declarado = request.headers.get("content-length")
+    if declarado and declarado.isdigit() and int(declarado) > blobs.BLOB_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Arquivo excede o tamanho máximo")
+    mime = (request.headers.get("content-type") or "application/octet-stream").split(";")[0].strip().lower()
+    try:
+        blob_hash, tamanho = await blobs.armazenamento.gravar_stream(request.stream())
+    except blobs.BlobMuitoGrande:
+        raise HTTPException(status_code=413, detail="Arquivo excede o tamanho máximo")
+    if tamanho == 0:
+        raise HTTPException(status_code=400, detail="Arquivo vazio")
+    blob = await run_in_threadpool(blobs.registrar, db, blob_hash, tamanho, mime)
+    background_tasks.add_task(_gerar_miniatura_em_segundo_plano, blob_hash)
+    return {"hash": blob.hash, "url": blobs.url_blob(blob.hash), "tamanho": blob.tamanho, "mime": blob.mime}
+
+
+def _servir_blob(request: Request, blob):
+    # Conteúdo imutável: a URL muda se o conteúdo mudar. Só o navegador guarda a cópia (private):
+    # caches compartilhados não podem servir o arquivo a quem não se autenticou
+    etag = f'"{blob.hash}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(blobs.armazenamento.caminho(blob.hash), media_type=blob.mime, headers=headers)
+
+
+# <img src> não envia cabeçalhos: como no feed de eventos, aceita também ?access_token=
+@app.get("/blobs/{blob_hash}")
+def baixar_blob(blob_hash: str, request: Request, db: Session = Depends(get_db), current_user=Depends(get_current_user_stream)):
+    blob = blobs.get_blob(db, blob_hash)
+    if not blob or not blobs.armazenamento.existe(blob.hash):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    return _servir_blob(request, blob)
+
+
+@app.get("/blobs/{blob_hash}/thumb")
+def baixar_miniatura(blob_hash: str, request: Request, db: Session = Depends(get_db), current_user=Depends(get_current_user_stream)):
+    blob = blobs.get_blob(db, blob_hash)
+    if not blob or not blobs.armazenamento.existe(blob.hash):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    miniatura_hash = blobs.gerar_miniatura(db, blob)
+    miniatura = blobs.get_blob(db, miniatura_hash) if miniatura_hash else None
+    return _servir_blob(request, miniatura or blob)
+
+
+# Feed de mudanças (Server-Sent Events)
+@app.get("/eventos")
+async def feed_eventos(current_user=Depends(get_current_user_stream)):
+    import json
+    import asyncio
+    admin = acesso.is_admin(current_user)
+    usuario_id = str(current_user.id)
+
+    def visivel(evento):
+        if evento.get("tipo") not in ("mudanca", "job"):
+            return False
+        return admin or evento.get("usuarioId") == usuario_id
+
+    assinatura = eventos.assinar(visivel)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    evento = await asyncio.wait_for(assinatura.fila.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {evento['tipo']}\ndata: {json.dumps(evento)}\n\n"
+        finally:
+            eventos.cancelar(assinatura)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+# Sincronização incremental
+@app.get("/sync", response_model=schemas.SyncResponse)
+def sincronizar(
+    since: datetime | None = Query(None, description="Valor de 'ate' devolvido na sincronização anterior"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    resultado = sync.alteracoes_desde(db, since, acesso.escopo(current_user))
+    resultado["documentos"] = _documentos_saida(db, resultado["documentos"])
+    return resultado
@@ -0,0 +1,68 @@
+import os
+
+from . import admissao, auditoria, tentativas
+
+# Métricas no formato texto do Prometheus. Os valores são do processo que respondeu: com
+# vários workers, cada raspagem vê um deles (o rótulo pid identifica qual).
+
+# Sem token configurado, /metrics só responde a conexões locais e só quando o servidor
+# escuta apenas em loopback (SERVIDOR_HOST, repassado por `python -m backend.app serve`):
+# atrás de um proxy reverso todas as conexões chegam do endereço do proxy, então com o
+# servidor exposto o token é obrigatório. Requisições com cabeçalhos de encaminhamento
+# (passaram por um proxy) também são recusadas.
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")
+SERVIDOR_HOST = os.getenv("SERVIDOR_HOST", "0.0.0.0")
+_LOCAIS = ("127.0.0.1", "::1", "localhost")
+_ENCAMINHAMENTO = ("forwarded", "x-forwarded-for", "x-real-ip")
+
+
+def autorizado(cliente: str | None, authorization: str | None, cabecalhos) -> bool:
+    if METRICAS_TOKEN:
+        return authorization == f"Bearer {METRICAS_TOKEN}"
+    if SERVIDOR_HOST not in _LOCAIS or any(c in cabecalhos for c in _ENCAMINHAMENTO):
+        return False
+    return cliente in _LOCAIS
+
+
+def _linhas(nome: str, tipo: str, ajuda: str, valores: list[tuple[dict, float]]) -> list[str]:
+    linhas = [f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}"]
+    for rotulos, valor in valores:
+        texto = ",".join(f'{k}="{v}"' for k, v in {"pid": os.getpid(), **rotulos}.items())
+        linhas.append(f"{nome}{{{texto}}} {valor}")
+    return linhas
+
+
+def texto() -> str:
+    adm = admissao.estado()
+    aud = auditoria.estado()
+    linhas = []
+    for chave, tipo, ajuda in (
+        ("ativos", "gauge", "Requisições em execução"),
+        ("fila", "gauge", "Requisições aguardando vaga"),
+        ("aceitas", "counter", "Requisições admitidas"),
+        ("enfileiradas", "counter", "Requisições que precisaram esperar vaga"),
+        ("espera_segundos", "counter", "Tempo total de espera na fila"),
+    ):
+        sufixo = "_total" if tipo == "counter" else ""
+        linhas += _linhas(f"jurix_admissao_{chave}{sufixo}", tipo, ajuda,
+                          [({"prioridade": p}, adm[p][chave]) for p in admissao.PRIORIDADES])
+    linhas += _linhas("jurix_admissao_rejeitadas_total", "counter", "Requisições recusadas com 503", [
+        ({"prioridade": p, "motivo": motivo}, adm[p][f"rejeitadas_{motivo}"])
+        for p in admissao.PRIORIDADES for motivo in ("fila", "espera")
+    ])
+    linhas += _linhas("jurix_admissao_limite", "gauge", "Máximo de requisições simultâneas", [
+        ({}, admissao.ADMISSAO_MAX_CONCORRENTES),
+    ])
+    linhas += _linhas("jurix_auditoria_fila", "gauge", "Eventos de auditoria aguardando gravação", [({}, aud["fila"])])
+    for chave in ("gravados", "descartados", "falhas"):
+        linhas += _linhas(f"jurix_auditoria_{chave}_total", "counter", f"Auditoria: {chave}", [({}, aud[chave])])
+    tent = tentativas.estado()
+    linhas += _linhas("jurix_login_baldes", "gauge", "Baldes de tentativas de login em uso", [({}, tent["chaves"])])
+    linhas += _linhas("jurix_login_tentativas_total", "counter", "Tentativas de login por resultado do limite", [
+        ({"resultado": "permitida"}, tent["permitidas"]),
+        ({"resultado": "bloqueada_ip"}, tent["bloqueadas_ip"]),
+        ({"resultado": "bloqueada_login"}, tent["bloqueadas_login"]),
+    ])
+    linhas += _linhas("jurix_login_limite_falhas_total", "counter", "Falhas do armazenamento compartilhado do limite",
+                      [({}, tent["falhas"])])
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,84 @@
+import os
+import sys
+import argparse
+
+from alembic import command
+from alembic.config import Config
+
+from .database import engine, Base
+from . import models  # noqa: F401  (registra as tabelas em Base.metadata)
+from . import backfill
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+ALEMBIC_INI = os.path.join(_BACKEND_DIR, "alembic.ini")
+
+
+def _config(conn=None) -> Config:
+    cfg = Config(ALEMBIC_INI)
+    cfg.attributes["configure_logger"] = False
+    cfg.attributes["target_metadata"] = Base.metadata
+    if conn is not None:
+        cfg.attributes["connection"] = conn
+    return cfg
+
+
+def _alembic(func, *args, **kwargs):
+    with engine.connect() as conn:
+        func(_config(conn), *args, **kwargs)
+        conn.commit()
+
+
+# Backfills de dados executáveis sob demanda (fora das revisões de schema)
+def _backfill_imagens_inline(args):
+    from .migrations.extract_inline_images import extract_inline_images
+    return extract_inline_images(
+        tamanho_lote=args.lote or 50, pausa=args.pausa, fator_pausa=args.fator_pausa, reiniciar=args.reiniciar
+    )
+
+
+BACKFILLS = {
+    "imagens_inline": _backfill_imagens_inline,
+}
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog="python -m backend.app.migrate", description="Migrações versionadas e backfills")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("upgrade", help="aplica revisões (padrão: head)")
+    p.add_argument("revisao", nargs="?", default="head")
+    p = sub.add_parser("downgrade", help="reverte até a revisão informada")
+    p.add_argument("revisao")
+    p = sub.add_parser("stamp", help="marca a revisão sem executar (bancos já atualizados)")
+    p.add_argument("revisao")
+    sub.add_parser("current", help="revisão atual do banco")
+    sub.add_parser("history", help="lista as revisões")
+    p = sub.add_parser("backfill", help="executa um backfill de dados: " + ", ".join(BACKFILLS))
+    p.add_argument("nome", choices=sorted(BACKFILLS))
+    p.add_argument("--lote", type=int, default=None, help="linhas por lote")
+    p.add_argument("--pausa", type=float, default=0.0, help="segundos de pausa entre lotes")
+    p.add_argument("--fator-pausa", type=float, default=0.0, help="pausa extra proporcional à duração do lote")
+    p.add_argument("--reiniciar", action="store_true", help="ignora o progresso salvo e recomeça")
+    sub.add_parser("status", help="progresso dos backfills")
+    args = parser.parse_args(argv)
+
+    if args.comando == "upgrade":
+        _alembic(command.upgrade, args.revisao)
+    elif args.comando == "downgrade":
+        _alembic(command.downgrade, args.revisao)
+    elif args.comando == "stamp":
+        _alembic(command.stamp, args.revisao)
+    elif args.comando == "current":
+        _alembic(command.current, verbose=True)
+    elif args.comando == "history":
+        command.history(_config())
+    elif args.comando == "backfill":
+        BACKFILLS[args.nome](args)
+    elif args.comando == "status":
+        for linha in backfill.estado(engine):
+            situacao = "concluído" if linha["concluido"] else "em andamento"
+            print(f"{linha['nome']}: {linha['processados']} linhas, {situacao} (última chave {linha['ultimaChave']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
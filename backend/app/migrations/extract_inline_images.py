@@ -0,0 +1,49 @@
+import sys
+from datetime import datetime
+from sqlalchemy import select, bindparam
+from ..database import engine, SessionLocal
+from .. import blobs, backfill
+
+# Move data URLs de documentos.imagemUrl para o blob store em lotes ordenados por id,
+# com progresso salvo (retomável). Também disponível como:
+#   python -m backend.app.migrate backfill imagens_inline
+
+BATCH_SIZE = 50
+
+
+def _converter_lote(conn, t, ids):
+    # Sessão na mesma conexão/transação do lote, usada só para registrar os blobs
+    db = SessionLocal(bind=conn)
+    try:
+        novos = [
+            {"_id": doc_id, "_url": blobs.internalizar_imagem(db, url)}
+            for doc_id, url in conn.execute(select(t.c.id, t.c.imagemUrl).where(t.c.id.in_(ids)))
+        ]
+        db.flush()
+        # atualizadoEm avança: clientes de /sync recebem a URL nova no lugar da data URL
+        conn.execute(
+            t.update().where(t.c.id == bindparam("_id")).values(imagemUrl=bindparam("_url"), atualizadoEm=datetime.utcnow()),
+            novos,
+        )
+    finally:
+        db.close()
+
+
+def extract_inline_images(
+    tamanho_lote: int = BATCH_SIZE, pausa: float = 0.0, fator_pausa: float = 0.0, reiniciar: bool = False
+):
+    return backfill.executar(
+        engine,
+        "imagens_inline",
+        "documentos",
+        _converter_lote,
+        filtro=lambda t: t.c.imagemUrl.like("data:%"),
+        tamanho_lote=tamanho_lote,
+        pausa=pausa,
+        fator_pausa=fator_pausa,
+        reiniciar=reiniciar,
+    )
+
+
+if __name__ == "__main__":
+    extract_inline_images(int(sys.argv[1]) if len(sys.argv) > 1 else BATCH_SIZE)
@@ -0,0 +1,41 @@
+import sqlalchemy as sa
+from alembic import op
+
+# Utilitários para revisões do Alembic idempotentes: bancos criados pelo create_all da
+# aplicação já podem ter as tabelas/colunas que uma revisão adiciona.
+
+
+def tem_tabela(nome: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(nome)
+
+
+def colunas(tabela: str) -> set[str]:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(tabela)}
+
+
+def coluna_opcional(tabela: str, coluna: str) -> bool:
+    for c in sa.inspect(op.get_bind()).get_columns(tabela):
+        if c["name"] == coluna:
+            return bool(c["nullable"])
+    return False
+
+
+def indices(tabela: str) -> set[str]:
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(tabela)}
+
+
+def criar_indice(nome: str, tabela: str, cols: list[str], **kw):
+    if nome not in indices(tabela):
+        op.create_index(nome, tabela, cols, **kw)
+
+
+def engine():
+    # Engine para backfills em conexões próprias (usar dentro de autocommit_block)
+    return op.get_bind().engine
+
+
+def limpar_backfill(*nomes: str):
+    # No downgrade: sem isso o progresso "concluído" sobrevive e um novo upgrade pula o backfill
+    if tem_tabela("backfill_progresso"):
+        progresso = sa.table("backfill_progresso", sa.column("nome", sa.String()))
+        op.execute(progresso.delete().where(progresso.c.nome.in_(nomes)))
@@ -0,0 +1,84 @@
+import os
+import re
+from datetime import date
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+# Este módulo não importa banco/ORM: as funções de renderização rodam em processos filhos.
+
+# Marcadores aceitos nos modelos: {{nomeCompleto}}, {{ cpf }}, ...
+CAMPOS_CLIENTE = (
+    "nomeCompleto", "email", "estadoCivil", "profissao", "cpf", "rg", "orgaoExpedidor",
+    "nit", "numeroBeneficio", "dataNascimento", "nomeMae", "nomePai", "endereco",
+    "bairro", "cidade", "uf",
+)
+CAMPOS_EXTRAS = ("dataAtual",)
+
+MODELOS_WORKERS = int(os.getenv("MODELOS_WORKERS", str(os.cpu_count() or 2)))
+# Abaixo deste número de clientes, renderiza no próprio processo (criar processos custa mais)
+MODELOS_LOTE_MIN_PARALELO = int(os.getenv("MODELOS_LOTE_MIN_PARALELO", "200"))
+MODELOS_LOTE_CHUNK = int(os.getenv("MODELOS_LOTE_CHUNK", "100"))
+
+_MARCADOR = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+@lru_cache(maxsize=256)
+def compilar(texto: str) -> tuple:
+    # Compila o texto em (literal, campo, literal, campo, ..., literal); campo inválido -> ValueError
+    partes = _MARCADOR.split(texto)
+    for campo in partes[1::2]:
+        if campo not in CAMPOS_CLIENTE and campo not in CAMPOS_EXTRAS:
+            raise ValueError(f"Marcador desconhecido: {{{{{campo}}}}}")
+    return tuple(partes)
+
+
+def _formatar(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, date):
+        return valor.strftime("%d/%m/%Y")
+    return str(valor)
+
+
+def renderizar(compilado: tuple, dados: dict) -> str:
+    saida = list(compilado)
+    for i in range(1, len(saida), 2):
+        saida[i] = _formatar(dados.get(saida[i]))
+    return "".join(saida)
+
+
+def _renderizar_chunk(titulo: tuple, corpo: tuple, linhas: list[dict]) -> list[tuple[str, str]]:
+    return [(renderizar(titulo, d), renderizar(corpo, d)) for d in linhas]
+
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MODELOS_WORKERS)
+    return _executor
+
+
+def renderizar_lote(titulo: str, corpo: str, linhas: list[dict]) -> list[tuple[str, str]]:
+    """
+    Renderiza (titulo, corpo) para cada dicionário de dados, preservando a ordem.
+    Lotes grandes são divididos em chunks e processados em paralelo no pool de processos.
+    """
+    titulo_c, corpo_c = compilar(titulo), compilar(corpo)
+    if len(linhas) < MODELOS_LOTE_MIN_PARALELO or MODELOS_WORKERS <= 1:
+        return _renderizar_chunk(titulo_c, corpo_c, linhas)
+    chunks = [linhas[i:i + MODELOS_LOTE_CHUNK] for i in range(0, len(linhas), MODELOS_LOTE_CHUNK)]
+    futuros = [_pool().submit(_renderizar_chunk, titulo_c, corpo_c, chunk) for chunk in chunks]
+    resultado: list[tuple[str, str]] = []
+    for f in futuros:
+        resultado.extend(f.result())
+    return resultado
+
+
+def encerrar():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -1,13 +1,19 @@
-from sqlalchemy import Column, String, Date, Enum, Text, ForeignKey
+from sqlalchemy import Column, String, Date, DateTime, Enum, Text, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import mapped_column
-from sqlalchemy.types import Integer
+from sqlalchemy.types import Integer, BigInteger
 import uuid
+from datetime import datetime
 from .database import Base
 
 
 class Cliente(Base):
     __tablename__ = "clientes"
+    # CPF/NIT armazenados só com dígitos (ver validacao.py); CPF único por escritório (usuário)
+    __table_args__ = (
+        Index("uq_clientes_usuario_cpf", "usuarioId", "cpf", unique=True),
+        Index("ix_clientes_usuario_nit", "usuarioId", "nit"),
+    )
 
     id = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     nomeCompleto = Column(String(255), nullable=False)
@@ -20,6 +26,7 @@ class Cliente(Base):
     nit = Column(String(50), nullable=False)
     numeroBeneficio = Column(String(50), nullable=False)
     dataNascimento = Column(Date, nullable=False)
+    sexo = Column(String(1), nullable=True)  # 'M'/'F'; regras de aposentadoria por idade dependem dele
     nomeMae = Column(String(255), nullable=False)
     nomePai = Column(String(255), nullable=False)
     endereco = Column(Text, nullable=False)
@@ -27,6 +34,7 @@ class Cliente(Base):
     cidade = Column(String(100), nullable=False)
     uf = Column(String(2), nullable=False)
     usuarioId = Column(UUID(as_uuid=True), ForeignKey('usuarios.id'), nullable=False)
+    atualizadoEm = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
 
 class Usuario(Base):
@@ -38,6 +46,8 @@ class Usuario(Base):
     senhaHash = Column(String(255), nullable=False)
     perfil = Column(String(30), nullable=False, default="U")
     status = Column(String(20), nullable=False, default="A")
+    # Exclusão lógica: preenchido ao excluir; a remoção dos dados é feita por exclusao.py
+    excluidoEm = Column(DateTime, nullable=True, index=True)
 
 
 class Documento(Base):
@@ -52,6 +62,158 @@ class Documento(Base):
     dataCreacao = Column(Date, nullable=False)
     dataUltimaEdicao = Column(Date, nullable=False)
     geradoPorIA = Column(String(5), nullable=False, default="false")  # armazenar 'true'/'false'
-    dadosFormulario = Column(Text, nullable=True)  # JSON serializado como texto
+    # JSON do formulário fica em dados_formulario, compartilhado entre documentos (ver formularios.py)
+    dadosFormularioHash = Column(String(64), nullable=True, index=True)
     imagemUrl = Column(Text, nullable=True)
-    usuarioId = Column(UUID(as_uuid=True), ForeignKey('usuarios.id'), nullable=False)
\ No newline at end of file
+    usuarioId = Column(UUID(as_uuid=True), ForeignKey('usuarios.id'), nullable=False)
+    # Cliente para quem o documento foi gerado (job de geração ou mala direta)
+    clienteId = Column(UUID(as_uuid=True), nullable=True, index=True)
+    atualizadoEm = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+
+class EstatisticaContador(Base):
+    # Contadores agregados mantidos incrementalmente pelo crud (ver stats.py)
+    __tablename__ = "estatisticas_contadores"
+    __table_args__ = (
+        UniqueConstraint("usuarioId", "dimensao", "chave", name="uq_estatisticas_contadores"),
+        # Faixas de chave sem usuário (relatórios por período de todos os escritórios)
+        Index("ix_estatisticas_contadores_dimensao_chave", "dimensao", "chave"),
+    )
+
+    id = mapped_column(Integer, primary_key=True, autoincrement=True)
+    usuarioId = Column(UUID(as_uuid=True), ForeignKey('usuarios.id'), nullable=False)
+    dimensao = Column(String(50), nullable=False)
+    chave = Column(String(255), nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+
+
+class ChaveIdempotencia(Base):
+    # Primeira resposta de um POST com Idempotency-Key, reaproveitada em retentativas
+    __tablename__ = "chaves_idempotencia"
+    __table_args__ = (UniqueConstraint("usuarioId", "chave", name="uq_chaves_idempotencia"),)
+
+    id = mapped_column(Integer, primary_key=True, autoincrement=True)
+    usuarioId = Column(UUID(as_uuid=True), ForeignKey('usuarios.id'), nullable=False)
+    chave = Column(String(255), nullable=False)
+    rota = Column(String(100), nullable=False)
+    hashRequisicao = Column(String(64), nullable=False)
+    statusCode = Column(Integer, nullable=True)  # nulo enquanto a requisição original está em andamento
+    resposta = Column(Text, nullable=True)  # JSON compacto
+    expiraEm = Column(DateTime, nullable=False, index=True)
+
+
+class JobGeracao(Base):
+    # Geração assíncrona de documentos por IA (ver geracao.py)
+    __tablename__ = "jobs_geracao"
+
+    id = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    usuarioId = Column(UUID(as_uuid=True), ForeignKey('usuarios.id'), nullable=False, index=True)
+    clienteId = Column(UUID(as_uuid=True), ForeignKey('clientes.id', ondelete="SET NULL"), nullable=True)
+    status = Column(String(20), nullable=False, default="pendente", index=True)  # pendente/executando/concluido/falhou
+    parametros = Column(Text, nullable=False)  # JSON serializado como texto
+    documentoId = Column(UUID(as_uuid=True), ForeignKey('documentos.id', ondelete="SET NULL"), nullable=True)
+    erro = Column(Text, nullable=True)
+    criadoEm = Column(DateTime, nullable=False, default=datetime.utcnow)
+    atualizadoEm = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ModeloDocumento(Base):
+    # Modelo com marcadores {{campo}} ligados aos campos de Cliente (ver modelos.py)
+    __tablename__ = "modelos_documento"
+
+    id = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    usuarioId = Column(UUID(as_uuid=True), ForeignKey('usuarios.id'), nullable=False, index=True)
+    nome = Column(String(255), nullable=False)
+    tipoDocumento = Column(String(100), nullable=False)
+    titulo = Column(String(255), nullable=False)
+    tomTexto = Column(String(50), nullable=False)
+    corpo = Column(Text, nullable=False)
+    versao = Column(Integer, nullable=False, default=1)
+
+
+class Blob(Base):
+    # Arquivo binário armazenado fora do banco, endereçado pelo SHA-256 do conteúdo (ver blobs.py)
+    __tablename__ = "blobs"
+
+    hash = Column(String(64), primary_key=True)
+    tamanho = Column(BigInteger, nullable=False)
+    mime = Column(String(100), nullable=False)
+    miniaturaHash = Column(String(64), nullable=True)
+    criadoEm = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class DadosFormulario(Base):
+    # dadosFormulario dos documentos, uma linha por conteúdo distinto (SHA-256 do JSON canônico)
+    __tablename__ = "dados_formulario"
+
+    hash = Column(String(64), primary_key=True)
+    conteudo = Column(Text, nullable=False)
+    referencias = Column(Integer, nullable=False, default=0)  # documentos que apontam para o conteúdo
+    criadoEm = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class RegistroRemovido(Base):
+    # Marca de exclusão (tombstone) para a sincronização incremental (ver sync.py)
+    __tablename__ = "registros_removidos"
+    __table_args__ = (Index("ix_registros_removidos_usuario_data", "usuarioId", "removidoEm"),)
+
+    id = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tabela = Column(String(30), nullable=False)
+    registroId = Column(UUID(as_uuid=True), nullable=False)
+    usuarioId = Column(UUID(as_uuid=True), nullable=True)
+    removidoEm = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class Sessao(Base):
+    # Sessão de login: uma família de refresh tokens (rotacionados a cada renovação)
+    __tablename__ = "sessoes"
+
+    id = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    usuarioId = Column(UUID(as_uuid=True), ForeignKey('usuarios.id', ondelete="CASCADE"), nullable=False, index=True)
+    refreshJti = Column(String(64), nullable=False)
+    criadoEm = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expiraEm = Column(DateTime, nullable=False, index=True)
+    revogadoEm = Column(DateTime, nullable=True)
+
+
+class Revogacao(Base):
+    # Log de revogações compartilhado entre workers (cada um mantém a cópia em memória)
+    __tablename__ = "revogacoes"
+
+    id = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tipo = Column(String(10), nullable=False)  # token | sessao | usuario
+    valor = Column(String(64), nullable=False)
+    desde = Column(BigInteger, nullable=True)  # usuario: tokens emitidos antes deste instante (epoch em ms)
+    expiraEm = Column(DateTime, nullable=False, index=True)
+
+
+class Auditoria(Base):
+    # Log de auditoria somente de inserção; gravado em lotes por auditoria.py.
+    # Sem FK para usuarios: o histórico sobrevive à exclusão do usuário.
+    __tablename__ = "auditoria"
+    __table_args__ = (
+        Index("ix_auditoria_registro", "tabela", "registroId", "id"),
+        Index("ix_auditoria_usuario", "usuarioId", "id"),
+    )
+
+    id = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    criadoEm = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    usuarioId = Column(UUID(as_uuid=True), nullable=True)
+    acao = Column(String(20), nullable=False)  # listar | visualizar | criar | atualizar | excluir
+    tabela = Column(String(30), nullable=False)
+    registroId = Column(String(64), nullable=True)
+
+
+class ExclusaoUsuario(Base):
+    # Progresso da remoção em segundo plano dos dados de um usuário excluído (ver exclusao.py)
+    __tablename__ = "exclusoes_usuario"
+
+    id = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    usuarioId = Column(UUID(as_uuid=True), nullable=False, index=True)
+    destinoId = Column(UUID(as_uuid=True), nullable=True)  # reatribui os registros em vez de apagar
+    status = Column(String(20), nullable=False, default="pendente")
+    etapa = Column(String(30), nullable=True)
+    processados = Column(Integer, nullable=False, default=0)
+    erro = Column(Text, nullable=True)
+    criadoEm = Column(DateTime, nullable=False, default=datetime.utcnow)
+    atualizadoEm = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,154 @@
+import io
+import os
+import re
+import json
+import hashlib
+import zipfile
+import unicodedata
+from datetime import datetime
+from sqlalchemy.orm import Session
+
+from . import models, acesso, render, auditoria
+
+# Exportação de vários documentos num único ZIP gerado durante o envio: cada entrada é escrita
+# num buffer que é esvaziado para a resposta a cada bloco, sem arquivo temporário. Os documentos
+# são lidos em lotes por id (keyset) e os formatos renderizados vêm do cache de render.py.
+# O gerador é síncrono: o StreamingResponse o consome no threadpool, e a compressão não
+# ocupa o event loop.
+# O manifest.json (último arquivo) lista documentos, arquivos e hashes SHA-256.
+
+PACOTE_MAX_DOCUMENTOS = int(os.getenv("PACOTE_MAX_DOCUMENTOS", "5000"))
+PACOTE_LOTE = int(os.getenv("PACOTE_LOTE", "50"))
+FORMATOS = ("txt", "pdf", "docx")
+_BLOCO = 64 * 1024
+
+
+class _Saida(io.RawIOBase):
+    # Destino não posicionável: o zipfile grava descritores de dados após cada entrada
+    def __init__(self):
+        self._partes: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    @property
+    def pendente(self) -> bool:
+        return bool(self._partes)
+
+    def esvaziar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def _nome_arquivo(indice: int, titulo: str) -> str:
+    base = unicodedata.normalize("NFKD", titulo or "documento").encode("ascii", "ignore").decode("ascii")
+    base = re.sub(r"[^A-Za-z0-9._-]+", "_", base).strip("._")[:80] or "documento"
+    return f"{indice:04d}-{base}"
+
+
+def filtrar(q, ids=None, cliente_id=None, status=None, tipo_documento=None):
+    d = models.Documento
+    if ids:
+        q = q.filter(d.id.in_(ids))
+    if cliente_id is not None:
+        # Documentos gerados para o cliente (job de geração ou mala direta)
+        q = q.filter(d.clienteId == cliente_id)
+    if status:
+        q = q.filter(d.status == status)
+    if tipo_documento:
+        q = q.filter(d.tipoDocumento == tipo_documento)
+    return q
+
+
+def contar(db: Session, usuario_id, **criterios) -> int:
+    d = models.Documento
+    return acesso.filtrar(filtrar(db.query(d.id), **criterios), d, usuario_id).count()
+
+
+def _lote(session_factory, usuario_id, criterios: dict, depois_de):
+    d = models.Documento
+    db = session_factory()
+    try:
+        q = acesso.filtrar(filtrar(db.query(d), **criterios), d, usuario_id)
+        if depois_de is not None:
+            q = q.filter(d.id > depois_de)
+        docs = q.order_by(d.id).limit(PACOTE_LOTE).all()
+        db.expunge_all()
+        return docs
+    finally:
+        db.close()
+
+
+def _info(nome: str, momento: datetime | None) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(nome, date_time=(momento or datetime.utcnow()).timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def gerar_zip(session_factory, solicitante_id, usuario_id, criterios: dict, formatos: list[str]):
+    saida = _Saida()
+    zf = zipfile.ZipFile(saida, "w", compression=zipfile.ZIP_DEFLATED)
+    manifesto = []
+    indice = 0
+    ultimo = None
+    while True:
+        docs = _lote(session_factory, usuario_id, criterios, ultimo)
+        if not docs:
+            break
+        for doc in docs:
+            indice += 1
+            nome = _nome_arquivo(indice, doc.titulo)
+            arquivos = []
+            for formato in formatos:
+                h = hashlib.sha256()
+                tamanho = 0
+                with zf.open(_info(f"{nome}.{formato}", doc.atualizadoEm), "w") as entrada:
+                    if formato == "txt":
+                        texto = doc.conteudo or ""
+                        for i in range(0, len(texto), _BLOCO):
+                            dados = texto[i:i + _BLOCO].encode("utf-8")
+                            h.update(dados)
+                            tamanho += len(dados)
+                            entrada.write(dados)
+                            if saida.pendente:
+                                yield saida.esvaziar()
+                    else:
+                        caminho, _ = render.obter_ou_renderizar_sincrono(formato, doc.titulo, doc.conteudo)
+                        try:
+                            with open(caminho, "rb") as f:
+                                while dados := f.read(_BLOCO):
+                                    h.update(dados)
+                                    tamanho += len(dados)
+                                    entrada.write(dados)
+                                    if saida.pendente:
+                                        yield saida.esvaziar()
+                        finally:
+                            render.cache.liberar(caminho)
+                arquivos.append({"nome": f"{nome}.{formato}", "tamanho": tamanho, "sha256": h.hexdigest()})
+                if saida.pendente:
+                    yield saida.esvaziar()
+            auditoria.registrar(solicitante_id, auditoria.VISUALIZAR, "documentos", doc.id)
+            manifesto.append({
+                "id": str(doc.id),
+                "titulo": doc.titulo,
+                "tipoDocumento": doc.tipoDocumento,
+                "status": doc.status,
+                "dataCreacao": doc.dataCreacao.isoformat() if doc.dataCreacao else None,
+                "atualizadoEm": doc.atualizadoEm.isoformat() if doc.atualizadoEm else None,
+                "usuarioId": str(doc.usuarioId),
+                "arquivos": arquivos,
+            })
+        ultimo = docs[-1].id
+    dados = json.dumps(
+        {"geradoEm": datetime.utcnow().isoformat() + "Z", "total": len(manifesto), "documentos": manifesto},
+        ensure_ascii=False, indent=2,
+    ).encode("utf-8")
+    zf.writestr(_info("manifest.json", None), dados)
+    zf.close()
+    if saida.pendente:
+        yield saida.esvaziar()
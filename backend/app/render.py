@@ -0,0 +1,358 @@
+import os
+import io
+import time
+import uuid
+import asyncio
+import hashlib
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, Future
+from xml.sax.saxutils import escape
+
+# Renderização de documentos em PDF/DOCX sem dependências externas, com cache em disco
+# endereçado pelo hash do conteúdo. Alterar o layout exige incrementar VERSAO_TEMPLATE.
+
+VERSAO_TEMPLATE = "1"
+FORMATOS = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", os.path.join(_BACKEND_DIR, ".cache", "render"))
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+_ORFAO_SECONDS = 24 * 3600
+
+
+# PDF
+_PAGINA_LARGURA, _PAGINA_ALTURA = 595, 842  # A4 em pontos
+_MARGEM = 56
+_FONTE, _FONTE_TITULO = 11, 14
+_ENTRELINHA = 15
+
+
+def _quebrar_linhas(texto: str, tamanho_fonte: int) -> list[str]:
+    # Aproximação da largura média da Helvetica (~0,5 em por caractere)
+    max_chars = max(20, int((_PAGINA_LARGURA - 2 * _MARGEM) / (tamanho_fonte * 0.5)))
+    linhas: list[str] = []
+    for paragrafo in texto.replace("\r\n", "\n").split("\n"):
+        atual = ""
+        for palavra in paragrafo.split(" "):
+            while len(palavra) > max_chars:
+                if atual:
+                    linhas.append(atual)
+                    atual = ""
+                linhas.append(palavra[:max_chars])
+                palavra = palavra[max_chars:]
+            candidato = f"{atual} {palavra}" if atual else palavra
+            if len(candidato) > max_chars:
+                linhas.append(atual)
+                atual = palavra
+            else:
+                atual = candidato
+        linhas.append(atual)
+    return linhas
+
+
+def _pdf_texto(s: str) -> bytes:
+    dados = s.encode("cp1252", errors="replace")
+    return dados.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def renderizar_pdf(titulo: str, conteudo: str) -> bytes:
+    linhas = [("F2", _FONTE_TITULO, l) for l in _quebrar_linhas(titulo, _FONTE_TITULO)] + [("F1", _FONTE, "")]
+    linhas += [("F1", _FONTE, l) for l in _quebrar_linhas(conteudo, _FONTE)]
+    por_pagina = int((_PAGINA_ALTURA - 2 * _MARGEM) / _ENTRELINHA)
+    paginas = [linhas[i:i + por_pagina] for i in range(0, len(linhas), por_pagina)] or [[]]
+
+    objetos: list[bytes] = []
+    # 1: catálogo, 2: árvore de páginas, 3/4: fontes; depois pares (página, conteúdo)
+    objetos.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{5 + 2 * i} 0 R" for i in range(len(paginas)))
+    objetos.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(paginas)} >>".encode())
+    objetos.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    objetos.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+    for i, pagina in enumerate(paginas):
+        fluxo = io.BytesIO()
+        y = _PAGINA_ALTURA - _MARGEM
+        for fonte, tamanho, texto in pagina:
+            if texto:
+                fluxo.write(b"BT /%s %d Tf %d %d Td (" % (fonte.encode(), tamanho, _MARGEM, y))
+                fluxo.write(_pdf_texto(texto))
+                fluxo.write(b") Tj ET\n")
+            y -= _ENTRELINHA
+        dados = fluxo.getvalue()
+        objetos.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_PAGINA_LARGURA} {_PAGINA_ALTURA}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {6 + 2 * i} 0 R >>".encode()
+        )
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(dados) + dados + b"\nendstream")
+
+    saida = io.BytesIO()
+    saida.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for n, obj in enumerate(objetos, start=1):
+        offsets.append(saida.tell())
+        saida.write(b"%d 0 obj\n" % n + obj + b"\nendobj\n")
+    xref = saida.tell()
+    saida.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1))
+    for off in offsets:
+        saida.write(b"%010d 00000 n \n" % off)
+    saida.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref))
+    return saida.getvalue()
+
+
+# DOCX
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xml_texto(s: str) -> str:
+    # Remove caracteres de controle não permitidos em XML 1.0
+    limpo = "".join(ch for ch in s if ch in "\t\n\r" or ord(ch) >= 0x20)
+    return escape(limpo)
+
+
+def renderizar_docx(titulo: str, conteudo: str) -> bytes:
+    paragrafos = [
+        f'<w:p><w:r><w:rPr><w:b/><w:sz w:val="28"/></w:rPr>'
+        f'<w:t xml:space="preserve">{_xml_texto(titulo)}</w:t></w:r></w:p>'
+    ]
+    for linha in conteudo.replace("\r\n", "\n").split("\n"):
+        paragrafos.append(f'<w:p><w:r><w:t xml:space="preserve">{_xml_texto(linha)}</w:t></w:r></w:p>')
+    documento = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        + "".join(paragrafos)
+        + '</w:body></w:document>'
+    )
+    saida = io.BytesIO()
+    with zipfile.ZipFile(saida, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        z.writestr("_rels/.rels", _DOCX_RELS)
+        z.writestr("word/document.xml", documento)
+    return saida.getvalue()
+
+
+def renderizar(formato: str, titulo: str, conteudo: str) -> bytes:
+    if formato == "pdf":
+        return renderizar_pdf(titulo, conteudo)
+    if formato == "docx":
+        return renderizar_docx(titulo, conteudo)
+    raise ValueError(f"Formato não suportado: {formato}")
+
+
+def chave_cache(formato: str, titulo: str, conteudo: str) -> str:
+    h = hashlib.sha256()
+    for parte in (VERSAO_TEMPLATE, formato, titulo, conteudo):
+        dados = parte.encode("utf-8")
+        h.update(b"%d:" % len(dados))
+        h.update(dados)
+    return h.hexdigest()
+
+
+class CacheRender:
+    """
+    Cache em disco endereçado por hash. Acessos atualizam o mtime do arquivo, e ao
+    ultrapassar limite_bytes os arquivos com mtime mais antigo são removidos (LRU).
+
+    obter() devolve um hard link do arquivo (fixado), não o caminho no cache: o despejo
+    pode remover o arquivo do cache a qualquer momento, mas o conteúdo continua acessível
+    pelo link até liberar(). O total em disco é recontado do diretório a cada
+    intervalo_recontagem segundos, de modo que o limite vale para o diretório inteiro,
+    compartilhado entre workers; entre recontagens só as gravações do próprio processo
+    são somadas, e o limite pode ser excedido pelo que os outros gravarem nesse intervalo.
+    """
+
+    def __init__(self, diretorio: str, limite_bytes: int, intervalo_recontagem: float = 30):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.intervalo_recontagem = intervalo_recontagem
+        self._lock = threading.Lock()
+        self._total: int | None = None
+        self._contado_em = 0.0
+
+    def caminho(self, chave: str, formato: str) -> str:
+        return os.path.join(self.diretorio, chave[:2], f"{chave}.{formato}")
+
+    def obter(self, chave: str, formato: str) -> str | None:
+        # Retorna um link fixado (chamar liberar() ao terminar) ou None se não está no cache
+        caminho = self.caminho(chave, formato)
+        fixado = f"{caminho}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.utime(caminho)
+            os.link(caminho, fixado)
+        except FileNotFoundError:
+            return None
+        return fixado
+
+    def liberar(self, fixado: str):
+        try:
+            os.remove(fixado)
+        except FileNotFoundError:
+            pass
+
+    def temporario(self, chave: str, formato: str) -> str:
+        caminho = self.caminho(chave, formato)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        return f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def gravar(self, chave: str, formato: str, dados: bytes) -> str:
+        tmp = self.temporario(chave, formato)
+        with open(tmp, "wb") as f:
+            f.write(dados)
+        return self.publicar(chave, formato, tmp)
+
+    def publicar(self, chave: str, formato: str, tmp: str, fixar: bool = False) -> str:
+        # Move para o cache um arquivo gravado em temporario() (ex.: escrito em partes).
+        # Com fixar, retorna um link fixado criado antes do despejo (liberar() ao terminar)
+        caminho = self.caminho(chave, formato)
+        tamanho = os.path.getsize(tmp)
+        os.replace(tmp, caminho)
+        if fixar:
+            fixado = f"{caminho}.{uuid.uuid4().hex}.tmp"
+            os.link(caminho, fixado)
+        with self._lock:
+            agora = time.monotonic()
+            if self._total is None or agora - self._contado_em >= self.intervalo_recontagem:
+                self._total = self._tamanho_total()
+                self._contado_em = agora
+            else:
+                self._total += tamanho
+            if self._total > self.limite_bytes:
+                self._despejar(manter=caminho)
+        return fixado if fixar else caminho
+
+    def _arquivos(self):
+        if not os.path.isdir(self.diretorio):
+            return
+        for raiz, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                if nome.endswith(".tmp"):
+                    continue
+                caminho = os.path.join(raiz, nome)
+                try:
+                    st = os.stat(caminho)
+                except FileNotFoundError:
+                    continue
+                yield caminho, st.st_size, st.st_mtime
+
+    def _tamanho_total(self) -> int:
+        return sum(tamanho for _, tamanho, _ in self._arquivos())
+
+    def _remover_orfaos(self):
+        # Temporários e links fixados deixados por um processo encerrado no meio do caminho
+        limite = time.time() - _ORFAO_SECONDS
+        for raiz, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                if not nome.endswith(".tmp"):
+                    continue
+                caminho = os.path.join(raiz, nome)
+                try:
+                    if os.stat(caminho).st_mtime < limite:
+                        os.remove(caminho)
+                except OSError:
+                    pass
+
+    def _despejar(self, manter: str):
+        # Remove os menos usados até ficar abaixo de 90% do limite. Arquivos em uso continuam
+        # acessíveis pelos links fixados; no Windows a remoção de um arquivo aberto falha e ele fica
+        self._remover_orfaos()
+        arquivos = sorted(self._arquivos(), key=lambda a: a[2])
+        total = sum(a[1] for a in arquivos)
+        alvo = int(self.limite_bytes * 0.9)
+        for caminho, tamanho, _ in arquivos:
+            if total <= alvo:
+                break
+            if caminho == manter:
+                continue
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError:
+                pass
+        self._total = total
+
+
+cache = CacheRender(RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES)
+
+_executor: ProcessPoolExecutor | None = None
+_em_andamento: dict[str, Future] = {}
+_em_andamento_lock = threading.Lock()
+_TENTATIVAS = 3
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+    return _executor
+
+
+def _renderizar_e_gravar(chave: str, formato: str, titulo: str, conteudo: str) -> Future:
+    # Um único render por chave, mesmo com várias requisições simultâneas
+    with _em_andamento_lock:
+        futuro = _em_andamento.get(chave)
+        if futuro is not None:
+            return futuro
+        futuro = Future()
+        _em_andamento[chave] = futuro
+
+    def _concluir(f: Future):
+        try:
+            futuro.set_result(cache.gravar(chave, formato, f.result()))
+        except Exception as e:
+            futuro.set_exception(e)
+        finally:
+            with _em_andamento_lock:
+                _em_andamento.pop(chave, None)
+
+    _pool().submit(renderizar, formato, titulo, conteudo).add_done_callback(_concluir)
+    return futuro
+
+
+async def obter_ou_renderizar(formato: str, titulo: str, conteudo: str) -> tuple[str, str]:
+    # Retorna (link fixado do arquivo em cache, chave); o chamador libera com cache.liberar().
+    # A renderização não ocupa o loop nem o threadpool
+    chave = chave_cache(formato, titulo, conteudo)
+    for _ in range(_TENTATIVAS):
+        caminho = cache.obter(chave, formato)
+        if caminho is not None:
+            return caminho, chave
+        # Despejado logo após a renderização (cache pequeno sob carga): renderiza de novo
+        await asyncio.wrap_future(_renderizar_e_gravar(chave, formato, titulo, conteudo))
+    raise RuntimeError("Arquivo renderizado removido do cache antes de ser servido")
+
+
+def obter_ou_renderizar_sincrono(formato: str, titulo: str, conteudo: str) -> tuple[str, str]:
+    # Para geradores executados no threadpool (ex.: exportação em ZIP)
+    chave = chave_cache(formato, titulo, conteudo)
+    for _ in range(_TENTATIVAS):
+        caminho = cache.obter(chave, formato)
+        if caminho is not None:
+            return caminho, chave
+        _renderizar_e_gravar(chave, formato, titulo, conteudo).result()
+    raise RuntimeError("Arquivo renderizado removido do cache antes de ser servido")
+
+
+def encerrar():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,148 @@
+import os
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, event
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Lista de revogação consultada em decode_token sem acesso ao banco: três dicionários em
+# memória (jti, sessão e usuário -> expiração), cada verificação é O(1). A tabela
+# revogacoes é o log compartilhado: quem revoga grava nela e aplica localmente, e cada
+# worker lê periodicamente apenas as linhas novas (id > último visto).
+
+REVOGACAO_SYNC_SECONDS = float(os.getenv("REVOGACAO_SYNC_SECONDS", "2"))
+REVOGACAO_CLEANUP_SECONDS = int(os.getenv("REVOGACAO_CLEANUP_SECONDS", "3600"))
+
+TOKEN = "token"
+SESSAO = "sessao"
+USUARIO = "usuario"
+
+# valor -> expiração (epoch); para usuários, valor -> (desde em ms, expiração)
+_tokens: dict[str, int] = {}
+_sessoes: dict[str, int] = {}
+_usuarios: dict[str, tuple[int, int]] = {}
+_ultimo_id = 0
+_PENDENTES = "revogacoes_pendentes"  # chave em Session.info
+_lock = threading.Lock()
+
+
+def _epoch(momento: datetime) -> int:
+    # Datas do banco são UTC sem fuso
+    return int(momento.replace(tzinfo=timezone.utc).timestamp())
+
+
+def revogado(claims: dict) -> bool:
+    jti = claims.get("jti")
+    if jti and jti in _tokens:
+        return True
+    sid = claims.get("sid")
+    if sid and sid in _sessoes:
+        return True
+    usuario = _usuarios.get(str(claims.get("sub")))
+    # Estritamente anterior: token emitido depois da revogação vale mesmo no mesmo segundo
+    return usuario is not None and round(float(claims.get("iat", 0)) * 1000) < usuario[0]
+
+
+def _aplicar(tipo: str, valor: str, expira: int, desde: int | None = None):
+    if tipo == TOKEN:
+        _tokens[valor] = expira
+    elif tipo == SESSAO:
+        _sessoes[valor] = expira
+    elif tipo == USUARIO:
+        anterior = _usuarios.get(valor)
+        if anterior is None or (desde or 0) >= anterior[0]:
+            _usuarios[valor] = (desde or 0, expira)
+
+
+def registrar(db: Session, tipo: str, valor, expira_em: datetime, desde: int | None = None, commit: bool = True):
+    # Grava no log compartilhado e vale neste processo assim que a transação é confirmada
+    # (com commit=False, no commit do chamador; num rollback é descartada); os demais workers
+    # veem na próxima sincronização
+    valor = str(valor)
+    db.add(models.Revogacao(tipo=tipo, valor=valor, desde=desde, expiraEm=expira_em))
+    db.info.setdefault(_PENDENTES, []).append((tipo, valor, _epoch(expira_em), desde))
+    if commit:
+        db.commit()
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_pendentes(db: Session):
+    for pendente in db.info.pop(_PENDENTES, ()):
+        _aplicar(*pendente)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _descartar_pendentes(db: Session, transacao):
+    # Transação externa encerrada sem commit (rollback ou close): a revogação não existe no banco
+    if transacao.parent is None:
+        db.info.pop(_PENDENTES, None)
+
+
+def revogar_usuario(db: Session, usuario_id, duracao_max_seconds: int, commit: bool = True):
+    # Invalida todos os tokens já emitidos para o usuário (exclusão, desativação, troca de senha)
+    agora = int(time.time() * 1000)
+    registrar(db, USUARIO, usuario_id, datetime.utcnow() + timedelta(seconds=duracao_max_seconds),
+              desde=agora, commit=commit)
+
+
+def sincronizar(db: Session) -> int:
+    global _ultimo_id
+    r = models.Revogacao
+    with _lock:
+        linhas = (
+            db.query(r.id, r.tipo, r.valor, r.desde, r.expiraEm)
+            .filter(r.id > _ultimo_id, r.expiraEm > datetime.utcnow())
+            .order_by(r.id)
+            .all()
+        )
+        for linha in linhas:
+            _aplicar(linha.tipo, linha.valor, _epoch(linha.expiraEm), linha.desde)
+        if linhas:
+            _ultimo_id = linhas[-1].id
+    return len(linhas)
+
+
+def _podar():
+    # Entradas expiradas não protegem mais nada (o token já expirou por conta própria)
+    global _tokens, _sessoes, _usuarios
+    agora = int(time.time())
+    _tokens = {k: v for k, v in _tokens.items() if v > agora}
+    _sessoes = {k: v for k, v in _sessoes.items() if v > agora}
+    _usuarios = {k: v for k, v in _usuarios.items() if v[1] > agora}
+
+
+def limpar_expiradas(db: Session) -> int:
+    _podar()
+    res = db.execute(delete(models.Revogacao).where(models.Revogacao.expiraEm < datetime.utcnow()))
+    res_sessoes = db.execute(delete(models.Sessao).where(models.Sessao.expiraEm < datetime.utcnow()))
+    db.commit()
+    return (res.rowcount or 0) + (res_sessoes.rowcount or 0)
+
+
+def iniciar_sincronizacao(session_factory) -> threading.Event:
+    # Carga inicial síncrona (o worker não atende sem conhecer as revogações) e thread periódica
+    parar = threading.Event()
+    db = session_factory()
+    try:
+        sincronizar(db)
+    finally:
+        db.close()
+
+    def _loop():
+        proxima_limpeza = time.monotonic() + REVOGACAO_CLEANUP_SECONDS
+        while not parar.wait(REVOGACAO_SYNC_SECONDS):
+            db = session_factory()
+            try:
+                sincronizar(db)
+                if time.monotonic() >= proxima_limpeza:
+                    limpar_expiradas(db)
+                    proxima_limpeza = time.monotonic() + REVOGACAO_CLEANUP_SECONDS
+            except Exception:
+                pass
+            finally:
+                db.close()
+
+    threading.Thread(target=_loop, name="revogacao-sync", daemon=True).start()
+    return parar
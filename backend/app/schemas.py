@@ -1,7 +1,10 @@
-from pydantic import BaseModel, EmailStr
-from datetime import date
+from pydantic import BaseModel, EmailStr, field_validator
+from datetime import date, datetime
+from typing import Literal
 from uuid import UUID
 
+from . import validacao
+
 
 class ClienteBase(BaseModel):
     nomeCompleto: str
@@ -14,6 +17,7 @@ class ClienteBase(BaseModel):
     nit: str
     numeroBeneficio: str
     dataNascimento: date
+    sexo: str | None = None
     nomeMae: str
     nomePai: str
     endereco: str
@@ -23,16 +27,40 @@ class ClienteBase(BaseModel):
 
 
 class ClienteCreate(ClienteBase):
-    pass
+    # Aceita CPF/NIT com ou sem máscara; armazena apenas os dígitos
+    @field_validator("cpf")
+    @classmethod
+    def _normalizar_cpf(cls, valor: str) -> str:
+        if not validacao.cpf_valido(valor):
+            raise ValueError("CPF inválido")
+        return validacao.somente_digitos(valor)
+
+    @field_validator("nit")
+    @classmethod
+    def _normalizar_nit(cls, valor: str) -> str:
+        if not validacao.nit_valido(valor):
+            raise ValueError("NIT inválido")
+        return validacao.somente_digitos(valor)
 
+    @field_validator("sexo")
+    @classmethod
+    def _normalizar_sexo(cls, valor: str | None) -> str | None:
+        valor = (valor or "").strip().upper()
+        if not valor:
+            return None
+        if valor not in ("M", "F", "MASCULINO", "FEMININO"):
+            raise ValueError("Sexo inválido (use M ou F)")
+        return valor[0]
 
-class ClienteUpdate(ClienteBase):
+
+class ClienteUpdate(ClienteCreate):
     pass
 
 
 class Cliente(ClienteBase):
     id: UUID
     usuarioId: UUID | None = None
+    atualizadoEm: datetime | None = None
 
     class Config:
         from_attributes = True
@@ -62,6 +90,21 @@ class Usuario(UsuarioBase):
         from_attributes = True
 
 
+class ExclusaoUsuario(BaseModel):
+    id: UUID
+    usuarioId: UUID
+    destinoId: UUID | None = None
+    status: str
+    etapa: str | None = None
+    processados: int
+    erro: str | None = None
+    criadoEm: datetime
+    atualizadoEm: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class AuthLoginRequest(BaseModel):
     login: str
     senha: str
@@ -70,9 +113,22 @@ class AuthLoginRequest(BaseModel):
 class AuthTokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
+    expires_in: int | None = None
     usuario: "Usuario"
 
 
+class AuthRefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class AuthTokenPar(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+
 class DocumentoBase(BaseModel):
     tipoDocumento: str
     titulo: str
@@ -97,6 +153,165 @@ class DocumentoUpdate(DocumentoBase):
 class Documento(DocumentoBase):
     id: UUID
     usuarioId: UUID | None = None
+    atualizadoEm: datetime | None = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class EstatisticasDocumentos(BaseModel):
+    total: int = 0
+    porStatus: dict[str, int] = {}
+    porTipo: dict[str, int] = {}
+    geradosPorIA: int = 0
+    manuais: int = 0
+
+
+class EstatisticasClientes(BaseModel):
+    total: int = 0
+    porCidade: dict[str, int] = {}
+
+
+class Estatisticas(BaseModel):
+    documentos: EstatisticasDocumentos
+    clientes: EstatisticasClientes
+
+
+class ItemElegibilidade(BaseModel):
+    clienteId: UUID
+    nomeCompleto: str
+    cpf: str
+    sexo: str | None = None
+    dataNascimento: date
+    idadeAnos: int
+    dataElegibilidade: date
+    mesesRestantes: int
+    elegivel: bool
+    possuiBeneficio: bool
+    usuarioId: UUID
+
+
+class RelatorioElegibilidade(BaseModel):
+    regra: str
+    descricao: str
+    referencia: date
+    total: int
+    elegiveis: int
+    selecionados: int
+    # Clientes sem o dado exigido pela regra (ex.: sexo não informado)
+    dadosIncompletos: int
+    itens: list[ItemElegibilidade]
+
+
+class SerieDocumentos(BaseModel):
+    campo: str
+    periodo: str
+    inicio: date
+    fim: date
+    # Início de cada período; cada série tem um valor por período, na mesma ordem
+    baldes: list[date]
+    series: dict[str, list[int]]
+    total: int
+
+
+class GeracaoDocumentoRequest(BaseModel):
+    tipoDocumento: str
+    titulo: str
+    tomTexto: str
+    status: str = "Rascunho"
+    clienteId: UUID | None = None
+    dadosFormulario: dict | None = None
+
+
+class JobGeracao(BaseModel):
+    id: UUID
+    status: str
+    clienteId: UUID | None = None
+    documentoId: UUID | None = None
+    erro: str | None = None
+    criadoEm: datetime
+    atualizadoEm: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ModeloDocumentoBase(BaseModel):
+    nome: str
+    tipoDocumento: str
+    titulo: str
+    tomTexto: str
+    corpo: str
+
+
+class ModeloDocumentoCreate(ModeloDocumentoBase):
+    pass
+
+
+class ModeloDocumentoUpdate(ModeloDocumentoBase):
+    pass
+
+
+class ModeloDocumento(ModeloDocumentoBase):
+    id: UUID
+    usuarioId: UUID | None = None
+    versao: int
+
+    class Config:
+        from_attributes = True
+
+
+class LoteDocumentosRequest(BaseModel):
+    modeloId: UUID
+    clienteIds: list[UUID]
+    status: str = "Rascunho"
+
+
+class LoteDocumentosResponse(BaseModel):
+    total: int
+    documentoIds: list[UUID]
+
+
+class PacoteDocumentosRequest(BaseModel):
+    # Lista de ids e/ou filtros (combinados com E); ao menos um critério é obrigatório
+    ids: list[UUID] | None = None
+    clienteId: UUID | None = None
+    status: str | None = None
+    tipoDocumento: str | None = None
+    formatos: list[Literal["txt", "pdf", "docx"]] = ["txt"]
+
+
+class Blob(BaseModel):
+    hash: str
+    url: str
+    tamanho: int
+    mime: str
+
+
+class Auditoria(BaseModel):
+    id: int
+    criadoEm: datetime
+    usuarioId: UUID | None = None
+    acao: str
+    tabela: str
+    registroId: str | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class AuditoriaPagina(BaseModel):
+    itens: list[Auditoria]
+    proximo: int | None = None
+
+
+class SyncRemovidos(BaseModel):
+    clientes: list[UUID] = []
+    documentos: list[UUID] = []
+
+
+class SyncResponse(BaseModel):
+    ate: datetime
+    completo: bool
+    clientes: list[Cliente]
+    documentos: list[Documento]
+    removidos: SyncRemovidos
@@ -3,8 +3,7 @@ import json
 
 from .database import engine, SessionLocal
 from .models import Base, Cliente, Documento, Usuario
-from . import crud, schemas
-import hashlib
+from . import crud, schemas, senhas
 from uuid import UUID
 from datetime import date
 
@@ -19,7 +18,7 @@ def seed():
         admin_login = "admin"
         existente = db.query(Usuario).filter(Usuario.login == admin_login).first()
         # senha desejada para o admin
-        nova_senha_hash = hashlib.sha256("123456".encode('utf-8')).hexdigest()
+        nova_senha_hash = senhas.gerar_hash_local("123456")
         if not existente:
             # cria admin com senha 123456
             admin = Usuario(
@@ -47,12 +46,13 @@ def seed():
                 email="joao.silva@example.com",
                 estadoCivil="Solteiro",
                 profissao="Advogado",
-                cpf="12345678901",
+                cpf="12345678909",
                 rg="1234567",
                 orgaoExpedidor="SSP",
-                nit="1234567890",
+                nit="12345678900",
                 numeroBeneficio="987654321",
                 dataNascimento=date(1990, 5, 20),
+                sexo="M",
                 nomeMae="Maria Silva",
                 nomePai="Carlos Silva",
                 endereco="Rua A, 123",
@@ -68,9 +68,10 @@ def seed():
                 cpf="98765432100",
                 rg="7654321",
                 orgaoExpedidor="SSP",
-                nit="0987654321",
+                nit="10987654320",
                 numeroBeneficio="123456789",
                 dataNascimento=date(1985, 8, 15),
+                sexo="F",
                 nomeMae="Paula Souza",
                 nomePai="Roberto Souza",
                 endereco="Avenida B, 456",
@@ -94,7 +95,7 @@ def seed():
                 geradoPorIA=True,
                 dadosFormulario={
                     "nomeCliente": "João Silva",
-                    "cpfCnpj": "123.456.789-01",
+                    "cpfCnpj": "123.456.789-09",
                     "valorCausa": 15000,
                 },
                 imagemUrl=None,
@@ -137,7 +138,7 @@ def seed_kelson_data():
         # Garante usuário 'kelsoncsm' com senha 123123 e perfil ADMINISTRATIVO
         login = "kelsoncsm"
         usuario = db.query(Usuario).filter(Usuario.login == login).first()
-        nova_senha_hash = hashlib.sha256("123123".encode('utf-8')).hexdigest()
+        nova_senha_hash = senhas.gerar_hash_local("123123")
         if not usuario:
             usuario = Usuario(
                 nome="Kelson",
@@ -164,12 +165,13 @@ def seed_kelson_data():
                 email="cliente.a.kelson@example.com",
                 estadoCivil="Solteiro",
                 profissao="Analista",
-                cpf="11111111111",
+                cpf="11144477735",
                 rg="1111111",
                 orgaoExpedidor="SSP",
-                nit="1111111111",
+                nit="11111111124",
                 numeroBeneficio="A1",
                 dataNascimento=date(1992, 2, 2),
+                sexo="F",
                 nomeMae="Mae A",
                 nomePai="Pai A",
                 endereco="Rua Exemplo, 100",
@@ -182,12 +184,13 @@ def seed_kelson_data():
                 email="cliente.b.kelson@example.com",
                 estadoCivil="Casado",
                 profissao="Engenheiro",
-                cpf="22222222222",
+                cpf="22255588846",
                 rg="2222222",
                 orgaoExpedidor="SSP",
-                nit="2222222222",
+                nit="22222222213",
                 numeroBeneficio="B2",
                 dataNascimento=date(1988, 8, 8),
+                sexo="M",
                 nomeMae="Mae B",
                 nomePai="Pai B",
                 endereco="Av Modelo, 200",
@@ -212,7 +215,7 @@ def seed_kelson_data():
                 geradoPorIA=True,
                 dadosFormulario={
                     "nomeCliente": "Cliente A (Kelson)",
-                    "cpfCnpj": "111.111.111-11",
+                    "cpfCnpj": "111.444.777-35",
                     "valorCausa": 5000,
                 },
                 imagemUrl=None,
@@ -0,0 +1,126 @@
+import os
+import hmac
+import base64
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Hash de senhas com scrypt (stdlib) e sal aleatório por usuário. Formato armazenado:
+#   scrypt$<n>$<r>$<p>$<sal base64>$<hash base64>
+# Hashes antigos (SHA-256 hex sem sal) continuam aceitos e são regravados no próximo login.
+# O cálculo roda num pool de processos limitado: o event loop e o threadpool não ficam
+# presos na KDF, e o excesso de requisições simultâneas é recusado em vez de enfileirado.
+
+SENHA_SCRYPT_N = int(os.getenv("SENHA_SCRYPT_N", str(2**14)))
+SENHA_SCRYPT_R = int(os.getenv("SENHA_SCRYPT_R", "8"))
+SENHA_SCRYPT_P = int(os.getenv("SENHA_SCRYPT_P", "1"))
+SENHA_WORKERS = int(os.getenv("SENHA_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Máximo de cálculos aguardando ou em execução; acima disso, SenhaSobrecarregada
+SENHA_FILA_MAX = int(os.getenv("SENHA_FILA_MAX", str(SENHA_WORKERS * 16)))
+
+_SAL_BYTES = 16
+_HASH_BYTES = 32
+_PREFIXO = "scrypt"
+
+
+class SenhaSobrecarregada(Exception):
+    pass
+
+
+def _b64(dados: bytes) -> str:
+    return base64.b64encode(dados).decode("ascii")
+
+
+def _scrypt(senha: str, sal: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(senha.encode("utf-8"), salt=sal, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=_HASH_BYTES)
+
+
+def _gerar(senha: str, n: int, r: int, p: int) -> str:
+    sal = os.urandom(_SAL_BYTES)
+    return f"{_PREFIXO}${n}${r}${p}${_b64(sal)}${_b64(_scrypt(senha, sal, n, r, p))}"
+
+
+def _legado(armazenado: str) -> bool:
+    return len(armazenado) == 64 and all(ch in "0123456789abcdef" for ch in armazenado.lower())
+
+
+def _verificar(senha: str, armazenado: str, n_atual: int, r_atual: int, p_atual: int) -> tuple[bool, bool]:
+    # Retorna (confere, precisa_regravar)
+    armazenado = armazenado or ""
+    if _legado(armazenado):
+        calculado = hashlib.sha256(senha.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(calculado, armazenado.lower()), True
+    try:
+        prefixo, n, r, p, sal, esperado = armazenado.split("$")
+        n, r, p = int(n), int(r), int(p)
+        if prefixo != _PREFIXO:
+            return False, False
+        calculado = _scrypt(senha, base64.b64decode(sal), n, r, p)
+    except (ValueError, TypeError):
+        return False, False
+    ok = hmac.compare_digest(calculado, base64.b64decode(esperado))
+    # Custo alterado na configuração: regrava com os parâmetros atuais
+    return ok, ok and (n, r, p) != (n_atual, r_atual, p_atual)
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_vagas = threading.BoundedSemaphore(SENHA_FILA_MAX)
+# Hash de referência para logins com usuário inexistente (mesmo custo, evita distinguir pelo tempo)
+_HASH_FICTICIO = f"{_PREFIXO}${SENHA_SCRYPT_N}${SENHA_SCRYPT_R}${SENHA_SCRYPT_P}${_b64(bytes(_SAL_BYTES))}${_b64(bytes(_HASH_BYTES))}"
+
+
+def _obter_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SENHA_WORKERS)
+        return _pool
+
+
+def _submeter(func, *args):
+    if not _vagas.acquire(blocking=False):
+        raise SenhaSobrecarregada()
+    try:
+        futuro = _obter_pool().submit(func, *args)
+    except Exception:
+        _vagas.release()
+        raise
+    futuro.add_done_callback(lambda _: _vagas.release())
+    return futuro
+
+
+def gerar_hash_local(senha: str) -> str:
+    # No próprio processo: scripts de seed/CLI e inicialização da aplicação
+    return _gerar(senha, SENHA_SCRYPT_N, SENHA_SCRYPT_R, SENHA_SCRYPT_P)
+
+
+def gerar_hash(senha: str) -> str:
+    return _submeter(_gerar, senha, SENHA_SCRYPT_N, SENHA_SCRYPT_R, SENHA_SCRYPT_P).result()
+
+
+def verificar(senha: str, armazenado: str | None) -> tuple[bool, bool]:
+    ok, regravar = _submeter(_verificar, senha, armazenado or _HASH_FICTICIO,
+                             SENHA_SCRYPT_N, SENHA_SCRYPT_R, SENHA_SCRYPT_P).result()
+    return (ok and armazenado is not None), regravar
+
+
+async def gerar_hash_async(senha: str) -> str:
+    return await asyncio.wrap_future(_submeter(_gerar, senha, SENHA_SCRYPT_N, SENHA_SCRYPT_R, SENHA_SCRYPT_P))
+
+
+async def verificar_async(senha: str, armazenado: str | None) -> tuple[bool, bool]:
+    # armazenado=None (usuário inexistente) ainda paga o custo de um hash e retorna False
+    ok, regravar = await asyncio.wrap_future(_submeter(
+        _verificar, senha, armazenado or _HASH_FICTICIO, SENHA_SCRYPT_N, SENHA_SCRYPT_R, SENHA_SCRYPT_P))
+    return (ok and armazenado is not None), regravar
+
+
+def encerrar():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
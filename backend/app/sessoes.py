@@ -0,0 +1,93 @@
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+
+from . import models, revogacao
+from .auth import create_token, decode_token, TOKEN_TTL_SECONDS, REFRESH_TOKEN_TTL_SECONDS, TOKEN_DURACAO_MAX_SECONDS, ACCESS, REFRESH
+
+# Registro de sessões: cada login cria uma sessão com um refresh token rotacionado a cada
+# renovação. Apenas o jti do refresh token atual fica gravado; apresentar um refresh
+# anterior (reuso de token vazado) encerra a sessão inteira.
+
+
+def _tokens(usuario, sessao: models.Sessao) -> dict:
+    base = {"sub": str(usuario.id), "login": usuario.login, "perfil": usuario.perfil, "sid": str(sessao.id)}
+    access = create_token({**base, "typ": ACCESS})
+    refresh = create_token({**base, "typ": REFRESH, "jti": sessao.refreshJti}, REFRESH_TOKEN_TTL_SECONDS)
+    return {
+        "access_token": access,
+        "refresh_token": refresh,
+        "token_type": "bearer",
+        "expires_in": TOKEN_TTL_SECONDS,
+    }
+
+
+def emitir(db: Session, usuario) -> dict:
+    sessao = models.Sessao(
+        usuarioId=usuario.id,
+        refreshJti=uuid.uuid4().hex,
+        expiraEm=datetime.utcnow() + timedelta(seconds=REFRESH_TOKEN_TTL_SECONDS),
+    )
+    db.add(sessao)
+    db.flush()
+    # Tokens montados antes do commit: depois dele usuário e sessão expiram e seriam relidos
+    tokens = _tokens(usuario, sessao)
+    db.commit()
+    return tokens
+
+
+def renovar(db: Session, refresh_token: str) -> dict | None:
+    from .crud import get_usuario_por_id, usuario_ativo
+
+    dados = decode_token(refresh_token, REFRESH)
+    if not dados or not dados.get("sid"):
+        return None
+    try:
+        sid = uuid.UUID(dados["sid"])
+    except (ValueError, TypeError):
+        return None
+    sessao = db.query(models.Sessao).filter(models.Sessao.id == sid).first()
+    if sessao is None or sessao.revogadoEm is not None:
+        return None
+    usuario = get_usuario_por_id(db, sessao.usuarioId)
+    if usuario is None or not usuario_ativo(usuario):
+        encerrar(db, sessao)
+        return None
+
+    # Troca condicional: de duas renovações concorrentes com o mesmo token, só uma vence
+    novo_jti = uuid.uuid4().hex
+    trocou = db.query(models.Sessao).filter(
+        models.Sessao.id == sid, models.Sessao.refreshJti == dados.get("jti")
+    ).update({models.Sessao.refreshJti: novo_jti}, synchronize_session=False)
+    if not trocou:
+        db.rollback()
+        encerrar(db, sessao)
+        return None
+    db.commit()
+    sessao.refreshJti = novo_jti
+    return _tokens(usuario, sessao)
+
+
+def encerrar(db: Session, sessao: models.Sessao):
+    sessao.revogadoEm = datetime.utcnow()
+    revogacao.registrar(db, revogacao.SESSAO, sessao.id, sessao.expiraEm)
+
+
+def encerrar_por_id(db: Session, sid) -> bool:
+    try:
+        sid = uuid.UUID(str(sid))
+    except ValueError:
+        return False
+    sessao = db.query(models.Sessao).filter(models.Sessao.id == sid).first()
+    if sessao is None or sessao.revogadoEm is not None:
+        return False
+    encerrar(db, sessao)
+    return True
+
+
+def revogar_usuario(db: Session, usuario_id, commit: bool = True):
+    # Todos os tokens já emitidos (inclusive anteriores às sessões) deixam de valer
+    db.query(models.Sessao).filter(
+        models.Sessao.usuarioId == usuario_id, models.Sessao.revogadoEm.is_(None)
+    ).update({models.Sessao.revogadoEm: datetime.utcnow()}, synchronize_session=False)
+    revogacao.revogar_usuario(db, usuario_id, TOKEN_DURACAO_MAX_SECONDS, commit=commit)
@@ -0,0 +1,290 @@
+import sys
+from datetime import date, timedelta
+from sqlalchemy import func, update, delete, insert, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, acesso
+
+# Dimensões mantidas em estatisticas_contadores
+DOC_TOTAL = "documentos_total"
+DOC_STATUS = "documentos_status"
+DOC_TIPO = "documentos_tipo"
+DOC_IA = "documentos_ia"
+CLI_TOTAL = "clientes_total"
+CLI_CIDADE = "clientes_cidade"
+# Resumos diários de documentos (chave "AAAA-MM-DD|status|tipo"), base dos relatórios por período
+DOC_DIA_CRIACAO = "documentos_dia_criacao"
+DOC_DIA_EDICAO = "documentos_dia_edicao"
+DIMENSOES_DIA = {"criacao": DOC_DIA_CRIACAO, "edicao": DOC_DIA_EDICAO}
+PERIODOS = ("dia", "semana", "mes", "ano")
+SERIE_MAX_BALDES = 3700
+
+
+def _gerado_por_ia(valor) -> str:
+    # Coluna guarda 'true'/'false', mas o objeto pode ter sido convertido para bool
+    return "true" if str(valor).lower() == "true" else "false"
+
+
+def _chave_cidade(cidade, uf) -> str:
+    return f"{cidade or ''}/{uf or ''}"
+
+
+def _chave_dia(dia, status, tipo) -> str:
+    dia = dia.isoformat() if hasattr(dia, "isoformat") else str(dia or "")
+    return f"{dia[:10]}|{status or ''}|{tipo or ''}"
+
+
+def chaves_documento(documento) -> list[tuple[str, str]]:
+    return [
+        (DOC_TOTAL, "total"),
+        (DOC_STATUS, documento.status or ""),
+        (DOC_TIPO, documento.tipoDocumento or ""),
+        (DOC_IA, _gerado_por_ia(documento.geradoPorIA)),
+        (DOC_DIA_CRIACAO, _chave_dia(documento.dataCreacao, documento.status, documento.tipoDocumento)),
+        (DOC_DIA_EDICAO, _chave_dia(documento.dataUltimaEdicao, documento.status, documento.tipoDocumento)),
+    ]
+
+
+def chaves_cliente(cliente) -> list[tuple[str, str]]:
+    return [
+        (CLI_TOTAL, "total"),
+        (CLI_CIDADE, _chave_cidade(cliente.cidade, cliente.uf)),
+    ]
+
+
+def incrementar(db: Session, usuario_id, dimensao: str, chave: str, delta: int):
+    # UPDATE atômico (total = total + delta); contador ainda inexistente é inserido num savepoint
+    # (duas gravações criando a mesma chave, ex.: o primeiro documento do dia: a segunda cai no UPDATE)
+    tabela = models.EstatisticaContador
+    incremento = (
+        update(tabela)
+        .where(tabela.usuarioId == usuario_id, tabela.dimensao == dimensao, tabela.chave == chave)
+        .values(total=tabela.total + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(incremento).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(tabela).values(usuarioId=usuario_id, dimensao=dimensao, chave=chave, total=delta))
+    except IntegrityError:
+        db.execute(incremento)
+
+
+def aplicar(db: Session, usuario_id, antes: list[tuple[str, str]], depois: list[tuple[str, str]]):
+    # Aplica somente a diferença entre as chaves antigas e novas do registro
+    if not usuario_id:
+        return
+    deltas: dict[tuple[str, str], int] = {}
+    for k in antes:
+        deltas[k] = deltas.get(k, 0) - 1
+    for k in depois:
+        deltas[k] = deltas.get(k, 0) + 1
+    for (dimensao, chave), delta in deltas.items():
+        if delta:
+            incrementar(db, usuario_id, dimensao, chave, delta)
+
+
+def obter(db: Session, usuario_id=None) -> dict:
+    # Lê apenas os contadores (custo proporcional ao número de chaves, não de registros)
+    tabela = models.EstatisticaContador
+    q = db.query(tabela.dimensao, tabela.chave, func.sum(tabela.total))
+    q = q.filter(tabela.dimensao.notin_(DIMENSOES_DIA.values()))
+    q = acesso.filtrar(q, tabela, usuario_id)
+    linhas = q.group_by(tabela.dimensao, tabela.chave).all()
+
+    valores: dict[str, dict[str, int]] = {}
+    for dimensao, chave, total in linhas:
+        total = int(total or 0)
+        if total > 0:
+            valores.setdefault(dimensao, {})[chave] = total
+    ia = valores.get(DOC_IA, {})
+    return {
+        "documentos": {
+            "total": valores.get(DOC_TOTAL, {}).get("total", 0),
+            "porStatus": valores.get(DOC_STATUS, {}),
+            "porTipo": valores.get(DOC_TIPO, {}),
+            "geradosPorIA": ia.get("true", 0),
+            "manuais": ia.get("false", 0),
+        },
+        "clientes": {
+            "total": valores.get(CLI_TOTAL, {}).get("total", 0),
+            "porCidade": valores.get(CLI_CIDADE, {}),
+        },
+    }
+
+
+def reconstruir(db: Session, usuario_id=None):
+    # Recalcula os contadores a partir das tabelas de origem (todos ou de um usuário)
+    tabela = models.EstatisticaContador
+    apagar = delete(tabela)
+    if usuario_id is not None:
+        apagar = apagar.where(tabela.usuarioId == usuario_id)
+    db.execute(apagar)
+
+    Doc = models.Documento
+    Cli = models.Cliente
+
+    def agrupar(modelo, *colunas):
+        q = db.query(modelo.usuarioId, *colunas, func.count())
+        if usuario_id is not None:
+            q = q.filter(modelo.usuarioId == usuario_id)
+        return q.group_by(modelo.usuarioId, *colunas).all()
+
+    novos = []
+    for uid, total in agrupar(Doc):
+        novos.append(dict(usuarioId=uid, dimensao=DOC_TOTAL, chave="total", total=total))
+    for uid, status, total in agrupar(Doc, Doc.status):
+        novos.append(dict(usuarioId=uid, dimensao=DOC_STATUS, chave=status or "", total=total))
+    for uid, tipo, total in agrupar(Doc, Doc.tipoDocumento):
+        novos.append(dict(usuarioId=uid, dimensao=DOC_TIPO, chave=tipo or "", total=total))
+    ia: dict[tuple, int] = {}
+    for uid, gerado, total in agrupar(Doc, Doc.geradoPorIA):
+        k = (uid, _gerado_por_ia(gerado))
+        ia[k] = ia.get(k, 0) + total
+    for (uid, chave), total in ia.items():
+        novos.append(dict(usuarioId=uid, dimensao=DOC_IA, chave=chave, total=total))
+    for dimensao, coluna in ((DOC_DIA_CRIACAO, Doc.dataCreacao), (DOC_DIA_EDICAO, Doc.dataUltimaEdicao)):
+        for uid, dia, status, tipo, total in agrupar(Doc, coluna, Doc.status, Doc.tipoDocumento):
+            novos.append(dict(usuarioId=uid, dimensao=dimensao, chave=_chave_dia(dia, status, tipo), total=total))
+    for uid, total in agrupar(Cli):
+        novos.append(dict(usuarioId=uid, dimensao=CLI_TOTAL, chave="total", total=total))
+    for uid, cidade, uf, total in agrupar(Cli, Cli.cidade, Cli.uf):
+        novos.append(dict(usuarioId=uid, dimensao=CLI_CIDADE, chave=_chave_cidade(cidade, uf), total=total))
+
+    novos = [n for n in novos if n["usuarioId"] is not None]
+    if novos:
+        db.bulk_insert_mappings(tabela, novos)
+    db.commit()
+    return len(novos)
+
+
+def _inicio_balde(dia: date, periodo: str) -> date:
+    if periodo == "semana":
+        return dia - timedelta(days=dia.weekday())
+    if periodo == "mes":
+        return dia.replace(day=1)
+    if periodo == "ano":
+        return dia.replace(month=1, day=1)
+    return dia
+
+
+def _proximo_balde(dia: date, periodo: str) -> date:
+    if periodo == "semana":
+        return dia + timedelta(days=7)
+    if periodo == "mes":
+        return (dia.replace(day=28) + timedelta(days=4)).replace(day=1)
+    if periodo == "ano":
+        return dia.replace(year=dia.year + 1)
+    return dia + timedelta(days=1)
+
+
+def baldes(inicio: date, fim: date, periodo: str) -> list[date]:
+    atual = _inicio_balde(inicio, periodo)
+    resultado = []
+    while atual <= fim:
+        resultado.append(atual)
+        if len(resultado) > SERIE_MAX_BALDES:
+            raise ValueError(f"Intervalo grande demais para o período '{periodo}' (máx. {SERIE_MAX_BALDES} pontos)")
+        atual = _proximo_balde(atual, periodo)
+    return resultado
+
+
+def serie_documentos(db: Session, usuario_id, campo: str, periodo: str, inicio: date, fim: date,
+                     agrupar_por: str | None = None, status: str | None = None,
+                     tipo_documento: str | None = None) -> dict:
+    # Série temporal lida dos resumos diários: o custo depende do número de dias/chaves
+    # no intervalo, não do número de documentos
+    eixo = baldes(inicio, fim, periodo)
+    posicao = {b: i for i, b in enumerate(eixo)}
+    tabela = models.EstatisticaContador
+    q = db.query(tabela.chave, func.sum(tabela.total)).filter(
+        tabela.dimensao == DIMENSOES_DIA[campo],
+        tabela.chave >= inicio.isoformat(),
+        tabela.chave < (fim + timedelta(days=1)).isoformat(),
+    )
+    q = acesso.filtrar(q, tabela, usuario_id)
+    series: dict[str, list[int]] = {}
+    indice_dia: dict[str, int] = {}
+    total_geral = 0
+    for chave, total in q.group_by(tabela.chave).all():
+        total = int(total or 0)
+        if total <= 0:
+            continue
+        dia, status_, tipo = chave.split("|", 2)
+        if (status is not None and status_ != status) or (tipo_documento is not None and tipo != tipo_documento):
+            continue
+        nome = {"status": status_, "tipoDocumento": tipo}.get(agrupar_por, "total")
+        serie = series.get(nome)
+        if serie is None:
+            serie = series[nome] = [0] * len(eixo)
+        i = indice_dia.get(dia)
+        if i is None:
+            i = indice_dia[dia] = posicao[_inicio_balde(date.fromisoformat(dia), periodo)]
+        serie[i] += total
+        total_geral += total
+    return {
+        "campo": campo,
+        "periodo": periodo,
+        "inicio": inicio,
+        "fim": fim,
+        "baldes": eixo,
+        "series": series,
+        "total": total_geral,
+    }
+
+
+# Chave do advisory lock (Postgres) que serializa a inicialização entre os workers
+_TRAVA_INICIALIZACAO = 26_0001
+
+
+def _travar_inicializacao(db: Session):
+    # Trava mantida até o fim da transação: os demais workers esperam e encontram os contadores prontos
+    dialeto = db.get_bind().dialect.name
+    if dialeto == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": _TRAVA_INICIALIZACAO})
+    elif dialeto == "sqlite":
+        db.execute(text("BEGIN IMMEDIATE"))
+
+
+def garantir_inicializado(db: Session):
+    # Bancos existentes: popula os contadores na primeira subida após a migração, ou
+    # quando surgem dimensões novas (resumos diários) que ainda não foram calculadas.
+    # A verificação roda sob trava, senão workers subindo juntos reconstroem (e somam) em paralelo.
+    tabela = models.EstatisticaContador
+    _travar_inicializacao(db)
+    try:
+        if db.query(tabela.id).filter(tabela.dimensao == DOC_DIA_CRIACAO).first() is not None:
+            return
+        if db.query(models.Documento.id).first() is None:
+            if db.query(tabela.id).first() is not None or db.query(models.Cliente.id).first() is None:
+                return
+        reconstruir(db)
+    finally:
+        # Libera a trava quando não houve reconstrução (reconstruir já faz commit)
+        db.rollback()
+
+
+def main(argv: list[str]):
+    from .database import Base, engine, SessionLocal
+
+    if not argv or argv[0] != "rebuild":
+        print("Uso: python -m backend.app.stats rebuild [usuario_id]")
+        return 1
+    Base.metadata.create_all(bind=engine)
+    usuario_id = None
+    if len(argv) > 1:
+        from uuid import UUID
+        usuario_id = UUID(argv[1])
+    db = SessionLocal()
+    try:
+        n = reconstruir(db, usuario_id)
+        print(f"[stats] Contadores reconstruídos: {n}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
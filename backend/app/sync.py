@@ -0,0 +1,82 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from . import models, acesso
+
+# Transações que terminam depois da leitura podem ter atualizadoEm um pouco anterior ao
+# cursor devolvido; a margem reenvia esses registros (o cliente aplica como upsert por id).
+SYNC_MARGEM_SECONDS = int(os.getenv("SYNC_MARGEM_SECONDS", "5"))
+# Tombstones mais antigos que isso são removidos; clientes defasados recebem sincronização completa
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "90"))
+
+TABELAS = {"clientes": models.Cliente, "documentos": models.Documento}
+
+
+def registrar_remocao(db: Session, tabela: str, registro_id, usuario_id):
+    db.add(models.RegistroRemovido(tabela=tabela, registroId=registro_id, usuarioId=usuario_id))
+
+
+def registrar_remocoes(db: Session, tabela: str, registro_ids, usuario_id):
+    from sqlalchemy import insert
+    agora = datetime.utcnow()
+    linhas = [{"tabela": tabela, "registroId": rid, "usuarioId": usuario_id, "removidoEm": agora} for rid in registro_ids]
+    if linhas:
+        db.execute(insert(models.RegistroRemovido), linhas)
+
+
+def alteracoes_desde(db: Session, since: datetime | None, usuario_id=None) -> dict:
+    """
+    Registros criados/alterados e ids removidos desde `since` (todos se None).
+    usuario_id=None significa sem restrição de dono (administrador).
+    """
+    agora = datetime.utcnow()
+    completo = since is None or since < agora - timedelta(days=SYNC_TOMBSTONE_DAYS)
+    desde = None if completo else since - timedelta(seconds=SYNC_MARGEM_SECONDS)
+
+    resultado: dict = {"ate": agora, "completo": completo, "removidos": {}}
+    for nome, modelo in TABELAS.items():
+        q = acesso.filtrar(db.query(modelo), modelo, usuario_id)
+        if desde is not None:
+            q = q.filter(modelo.atualizadoEm >= desde)
+        resultado[nome] = q.order_by(modelo.atualizadoEm).all()
+
+        ids = []
+        if desde is not None:
+            r = models.RegistroRemovido
+            q = db.query(r.registroId).filter(r.tabela == nome, r.removidoEm >= desde)
+            if usuario_id is not None:
+                q = q.filter(r.usuarioId == usuario_id)
+            ids = [row[0] for row in q.all()]
+        resultado["removidos"][nome] = ids
+    return resultado
+
+
+def limpar_removidos(db: Session) -> int:
+    r = models.RegistroRemovido
+    limite = datetime.utcnow() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+    res = db.execute(delete(r).where(r.removidoEm < limite))
+    db.commit()
+    return res.rowcount or 0
+
+
+def main(argv: list[str]):
+    from .database import Base, engine, SessionLocal
+
+    if not argv or argv[0] != "cleanup":
+        print("Uso: python -m backend.app.sync cleanup")
+        return 1
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        n = limpar_removidos(db)
+        print(f"[sync] Tombstones expirados removidos: {n}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
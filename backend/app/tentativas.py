@@ -0,0 +1,177 @@
+import os
+import time
+import logging
+import sqlite3
+import threading
+
+# Limite de tentativas de login por token bucket, por IP e por login, verificado antes de
+# qualquer consulta ao banco ou cálculo de hash. Cada balde guarda só (fichas, instante);
+# baldes que já se recompuseram equivalem a ausentes e são os primeiros descartados.
+# TENTATIVAS_BACKEND=sqlite compartilha os baldes entre workers da mesma máquina por um
+# arquivo SQLite local (transações curtas com BEGIN IMMEDIATE), sem tocar no banco principal.
+# O IP vem de main._ip_cliente: atrás de um proxy reverso ele só identifica o cliente se o
+# proxy estiver entre os confiáveis do uvicorn; senão todos compartilham o balde do proxy.
+
+TENTATIVAS_ATIVO = os.getenv("TENTATIVAS_ATIVO", "1") == "1"
+TENTATIVAS_IP_CAPACIDADE = float(os.getenv("TENTATIVAS_IP_CAPACIDADE", "20"))
+TENTATIVAS_IP_POR_MINUTO = float(os.getenv("TENTATIVAS_IP_POR_MINUTO", "10"))
+TENTATIVAS_LOGIN_CAPACIDADE = float(os.getenv("TENTATIVAS_LOGIN_CAPACIDADE", "5"))
+TENTATIVAS_LOGIN_POR_MINUTO = float(os.getenv("TENTATIVAS_LOGIN_POR_MINUTO", "1"))
+TENTATIVAS_MAX_CHAVES = int(os.getenv("TENTATIVAS_MAX_CHAVES", "100000"))
+TENTATIVAS_BACKEND = os.getenv("TENTATIVAS_BACKEND", "memoria")
+_BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+TENTATIVAS_SQLITE_PATH = os.getenv("TENTATIVAS_SQLITE_PATH", os.path.join(_BACKEND_DIR, ".cache", "tentativas.db"))
+
+IP = "ip"
+LOGIN = "login"
+# (capacidade, fichas por segundo)
+_LIMITES = {
+    IP: (TENTATIVAS_IP_CAPACIDADE, TENTATIVAS_IP_POR_MINUTO / 60),
+    LOGIN: (TENTATIVAS_LOGIN_CAPACIDADE, TENTATIVAS_LOGIN_POR_MINUTO / 60),
+}
+
+_contadores = {"permitidas": 0, "bloqueadas_ip": 0, "bloqueadas_login": 0, "falhas": 0}
+
+logger = logging.getLogger(__name__)
+
+
+def _consumir(fichas: float, instante: float, agora: float, capacidade: float, taxa: float):
+    # Retorna (fichas, espera em segundos); espera 0 = tentativa permitida
+    fichas = min(capacidade, fichas + (agora - instante) * taxa)
+    if fichas >= 1:
+        return fichas - 1, 0.0
+    return fichas, (1 - fichas) / taxa
+
+
+class _Memoria:
+    def __init__(self, max_chaves: int):
+        self.max_chaves = max_chaves
+        self.baldes: dict[str, tuple[float, float]] = {}
+        self.lock = threading.Lock()
+
+    def consumir(self, chave: str, capacidade: float, taxa: float, agora: float) -> float:
+        with self.lock:
+            fichas, instante = self.baldes.pop(chave, (capacidade, agora))
+            fichas, espera = _consumir(fichas, instante, agora, capacidade, taxa)
+            self.baldes[chave] = (fichas, agora)  # reinserção mantém a ordem de uso recente
+            if len(self.baldes) > self.max_chaves:
+                self._podar(agora)
+            return espera
+
+    def _podar(self, agora: float):
+        # Remove baldes já cheios; se não bastar, os menos usados recentemente
+        for chave, (fichas, instante) in list(self.baldes.items()):
+            capacidade, taxa = _LIMITES[chave.split(":", 1)[0]]
+            if fichas + (agora - instante) * taxa >= capacidade:
+                del self.baldes[chave]
+        excesso = len(self.baldes) - self.max_chaves * 9 // 10
+        for chave in list(self.baldes)[:max(excesso, 0)]:
+            del self.baldes[chave]
+
+    def reiniciar(self, chave: str):
+        with self.lock:
+            self.baldes.pop(chave, None)
+
+    def tamanho(self) -> int:
+        return len(self.baldes)
+
+
+class _SQLite:
+    _LIMPEZA_A_CADA = 1000
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.conn: sqlite3.Connection | None = None
+        self.lock = threading.Lock()
+        self.operacoes = 0
+
+    def _conexao(self) -> sqlite3.Connection:
+        # Aberta no primeiro uso, já dentro do worker (nunca herdada de um fork)
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+            conn = sqlite3.connect(self.caminho, timeout=1, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS baldes (chave TEXT PRIMARY KEY, fichas REAL NOT NULL, instante REAL NOT NULL)")
+            self.conn = conn
+        return self.conn
+
+    def consumir(self, chave: str, capacidade: float, taxa: float, agora: float) -> float:
+        try:
+            return self._consumir(chave, capacidade, taxa, agora)
+        except sqlite3.Error:
+            # Arquivo indisponível ou travado: o limite não pode derrubar o login
+            _contadores["falhas"] += 1
+            logger.exception("Falha no limite de tentativas compartilhado")
+            return 0.0
+
+    def _consumir(self, chave: str, capacidade: float, taxa: float, agora: float) -> float:
+        with self.lock:
+            conn = self._conexao()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                linha = conn.execute("SELECT fichas, instante FROM baldes WHERE chave = ?", (chave,)).fetchone()
+                fichas, espera = _consumir(*(linha or (capacidade, agora)), agora, capacidade, taxa)
+                conn.execute(
+                    "INSERT INTO baldes (chave, fichas, instante) VALUES (?, ?, ?) "
+                    "ON CONFLICT(chave) DO UPDATE SET fichas = excluded.fichas, instante = excluded.instante",
+                    (chave, fichas, agora),
+                )
+                self.operacoes += 1
+                if self.operacoes % self._LIMPEZA_A_CADA == 0:
+                    # Baldes parados por tempo suficiente para encher de novo
+                    janela = max(c / t for c, t in _LIMITES.values())
+                    conn.execute("DELETE FROM baldes WHERE instante < ?", (agora - janela,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return espera
+
+    def reiniciar(self, chave: str):
+        try:
+            with self.lock:
+                self._conexao().execute("DELETE FROM baldes WHERE chave = ?", (chave,))
+        except sqlite3.Error:
+            _contadores["falhas"] += 1
+
+    def tamanho(self) -> int:
+        try:
+            with self.lock:
+                return self._conexao().execute("SELECT COUNT(*) FROM baldes").fetchone()[0]
+        except sqlite3.Error:
+            return -1
+
+
+_baldes = _SQLite(TENTATIVAS_SQLITE_PATH) if TENTATIVAS_BACKEND == "sqlite" else _Memoria(TENTATIVAS_MAX_CHAVES)
+
+
+def _chave_login(login: str) -> str:
+    return f"{LOGIN}:{(login or '').strip().lower()}"
+
+
+def verificar(ip: str | None, login: str) -> float:
+    # Consome uma tentativa do IP e do login; retorna 0 se permitida ou os segundos de espera
+    if not TENTATIVAS_ATIVO:
+        return 0.0
+    agora = time.time()
+    espera = _baldes.consumir(f"{IP}:{ip or '-'}", *_LIMITES[IP], agora)
+    if espera:
+        _contadores["bloqueadas_ip"] += 1
+        return espera
+    espera = _baldes.consumir(_chave_login(login), *_LIMITES[LOGIN], agora)
+    if espera:
+        _contadores["bloqueadas_login"] += 1
+        return espera
+    _contadores["permitidas"] += 1
+    return 0.0
+
+
+def sucesso(login: str):
+    # Login correto devolve as tentativas do usuário (erros de digitação anteriores não contam mais)
+    if TENTATIVAS_ATIVO:
+        _baldes.reiniciar(_chave_login(login))
+
+
+def estado() -> dict:
+    return {"chaves": _baldes.tamanho(), **_contadores}
@@ -0,0 +1,50 @@
+import re
+
+# Dígitos verificadores de CPF e NIT (PIS/PASEP/NIS): usados na validação de clientes
+# e no gerador de dados sintéticos.
+
+_NAO_DIGITO = re.compile(r"\D")
+_PESOS_NIT = (3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def somente_digitos(valor: str | None) -> str:
+    return _NAO_DIGITO.sub("", valor or "")
+
+
+def _dv_cpf(digitos: str) -> str:
+    peso = len(digitos) + 1
+    soma = sum(int(d) * (peso - i) for i, d in enumerate(digitos))
+    resto = soma * 10 % 11
+    return "0" if resto == 10 else str(resto)
+
+
+def digitos_cpf(base: str) -> str:
+    # base: 9 primeiros dígitos; retorna os 2 dígitos verificadores
+    d1 = _dv_cpf(base)
+    return d1 + _dv_cpf(base + d1)
+
+
+def cpf_valido(cpf: str | None) -> bool:
+    d = somente_digitos(cpf)
+    if len(d) != 11 or d == d[0] * 11:
+        return False
+    return digitos_cpf(d[:9]) == d[9:]
+
+
+def digito_nit(base: str) -> str:
+    # base: 10 primeiros dígitos; retorna o dígito verificador
+    soma = sum(int(d) * p for d, p in zip(base, _PESOS_NIT))
+    dv = 11 - soma % 11
+    return "0" if dv >= 10 else str(dv)
+
+
+def nit_valido(nit: str | None) -> bool:
+    d = somente_digitos(nit)
+    if len(d) != 11 or d == d[0] * 11:
+        return False
+    return digito_nit(d[:10]) == d[10]
+
+
+def formatar_cpf(cpf: str) -> str:
+    d = somente_digitos(cpf)
+    return f"{d[:3]}.{d[3:6]}.{d[6:9]}-{d[9:]}" if len(d) == 11 else cpf
@@ -0,0 +1,128 @@
+import itertools
+from dataclasses import dataclass
+from typing import Callable
+
+import pytest
+
+from conftest import TESTE_CLIENTES, TESTE_LATENCIA, TESTE_FATOR_LATENCIA, SENHA, USUARIO
+from backend.app import dados_sinteticos
+
+# Orçamentos por endpoint: comandos SQL, linhas lidas e latência (mediana, em ms).
+# Comandos pegam N+1 e consultas redundantes (ex.: autenticação ou refresh repetidos);
+# linhas pegam filtros perdidos (ler a tabela inteira para devolver uma página);
+# latência é o teto para a carga padrão de conftest (multiplicado por TESTE_FATOR_LATENCIA),
+# verificado só com TESTE_LATENCIA=1.
+# Um orçamento só deve subir junto com a mudança que justifica o custo novo.
+
+_gerador = dados_sinteticos.Gerador()
+_indices = itertools.count(TESTE_CLIENTES + 1)  # além dos índices usados na carga: CPFs inéditos
+_SERIE = "/relatorios/documentos?periodo=mes&inicio=2023-11-01&fim=2024-10-31&agruparPor=status"
+# Registros criados pelos próprios casos de gravação durante a execução
+_FOLGA = 50
+
+
+def _cliente() -> dict:
+    i = next(_indices)
+    return {
+        "nomeCompleto": "Cliente Orçamento", "email": "orcamento@teste.com", "estadoCivil": "Solteiro(a)",
+        "profissao": "Agricultor", "cpf": _gerador.cpf(i), "rg": "1234567", "orgaoExpedidor": "SSP",
+        "nit": _gerador.nit(i), "numeroBeneficio": "", "dataNascimento": "1960-05-10", "sexo": "F",
+        "nomeMae": "Maria", "nomePai": "José", "endereco": "Rua A, 10", "bairro": "Centro",
+        "cidade": "Recife", "uf": "PE",
+    }
+
+
+_FORMULARIO = {"intake": "Ficha de atendimento " * 200, "beneficio": "aposentadoria por idade"}
+
+
+def _documento() -> dict:
+    return {
+        "tipoDocumento": "Procuração", "titulo": f"Orçamento {next(_indices)}", "tomTexto": "Formal",
+        "conteudo": "Texto do documento", "status": "Rascunho", "dataCreacao": "2024-01-01",
+        "dataUltimaEdicao": "2024-01-02", "geradoPorIA": False,
+    }
+
+
+@dataclass
+class Orcamento:
+    metodo: str
+    caminho: str
+    quem: str | None  # "usuario", "admin" ou None (sem autenticação)
+    consultas: int
+    linhas: int | Callable[[dict], int]
+    ms: float
+    corpo: Callable[[dict], dict] | None = None
+    status: int = 200
+
+    def teto_linhas(self, dados: dict) -> int:
+        return self.linhas(dados) if callable(self.linhas) else self.linhas
+
+
+ORCAMENTOS = {
+    "health": Orcamento("GET", "/health", None, 0, 0, 10),
+    # Login: busca do usuário + gravação da sessão, sem reler nada depois do commit
+    "login": Orcamento("POST", "/auth/login", None, 2, 1, 400,
+                       corpo=lambda d: {"login": USUARIO, "senha": SENHA}),
+    # Listagens: uma consulta de autenticação + uma de dados; linhas = registros do usuário
+    "clientes": Orcamento("GET", "/clientes", "usuario", 2, lambda d: d["clientes_usuario"] + _FOLGA, 300),
+    "cliente": Orcamento("GET", "/clientes/{cliente_id}", "usuario", 2, 2, 30),
+    "cliente_cpf": Orcamento("GET", "/clientes/by-cpf/{cliente_cpf}", "usuario", 2, 2, 30),
+    "documentos": Orcamento("GET", "/documentos", "usuario", 2, lambda d: d["documentos_usuario"] + _FOLGA, 400),
+    "documento": Orcamento("GET", "/documentos/{documento_id}", "usuario", 2, 2, 30),
+    "documento_conteudo": Orcamento("GET", "/documentos/{documento_id}/conteudo", "usuario", 2, 2, 30),
+    "modelos": Orcamento("GET", "/modelos", "usuario", 2, 50, 30),
+    "sync": Orcamento("GET", "/sync", "usuario", 3,
+                      lambda d: d["clientes_usuario"] + d["documentos_usuario"] + _FOLGA, 600),
+    # Agregados vêm dos contadores: linhas não crescem com o volume de documentos
+    "stats": Orcamento("GET", "/stats", "usuario", 2, 100, 40),
+    "stats_admin": Orcamento("GET", "/stats", "admin", 2, 100, 40),
+    # Série lê um contador por dia/status/tipo com documentos, nunca os documentos em si
+    "relatorio_documentos": Orcamento("GET", _SERIE, "usuario", 2, 600, 60),
+    "relatorio_documentos_admin": Orcamento("GET", _SERIE, "admin", 2, 2500, 100),
+    # Elegibilidade lê as colunas de cálculo de todos os clientes do escopo e detalha só a página
+    "elegibilidade": Orcamento("GET", "/relatorios/elegibilidade", "usuario", 3,
+                               lambda d: d["clientes_usuario"] + _FOLGA + 1000, 150),
+    "elegibilidade_admin": Orcamento("GET", "/relatorios/elegibilidade", "admin", 3,
+                                     lambda d: TESTE_CLIENTES + _FOLGA + 1000, 300),
+    "auditoria": Orcamento("GET", "/auditoria", "admin", 2, 201, 50),
+    "usuarios": Orcamento("GET", "/usuarios", "admin", 2, 1 + 50, 30),
+    # Gravações: autenticação, conferência do CPF, contadores por dimensão alterada, INSERT/UPDATE
+    # e a releitura do registro gravado; o usuário não é relido depois do commit
+    "criar_cliente": Orcamento("POST", "/clientes", "usuario", 6, 3, 80, corpo=lambda d: _cliente()),
+    "criar_documento": Orcamento("POST", "/documentos", "usuario", 9, 2, 80, corpo=lambda d: _documento()),
+    # Mesmo dadosFormulario em vários documentos: só o contador de referências é atualizado
+    "criar_documento_formulario": Orcamento("POST", "/documentos", "usuario", 10, 2, 80,
+                                            corpo=lambda d: {**_documento(), "dadosFormulario": _FORMULARIO}),
+    "editar_documento": Orcamento("PUT", "/documentos/{documento_id}", "usuario", 4, 3, 80,
+                                  corpo=lambda d: _documento()),
+}
+
+
+@pytest.fixture
+def cabecalhos(request, auth_usuario, auth_admin):
+    return {"usuario": auth_usuario, "admin": auth_admin, None: {}}
+
+
+@pytest.mark.parametrize("nome", list(ORCAMENTOS))
+def test_orcamento(nome, client, dados, cabecalhos, medidor):
+    o = ORCAMENTOS[nome]
+    url = o.caminho.format(**dados)
+
+    def executar():
+        corpo = o.corpo(dados) if o.corpo else None
+        r = client.request(o.metodo, url, headers=cabecalhos[o.quem], json=corpo)
+        assert r.status_code == o.status, r.text
+        return r
+
+    executar()  # aquecimento: caches de processo e de plano fora da contagem
+    with medidor.medir() as m:
+        executar()
+    assert m.consultas <= o.consultas, f"{nome}: {m.consultas} comandos SQL (orçamento {o.consultas})\n{m.resumo()}"
+    teto = o.teto_linhas(dados)
+    assert m.linhas <= teto, f"{nome}: {m.linhas} linhas lidas (orçamento {teto})\n{m.resumo()}"
+
+    if not TESTE_LATENCIA:
+        return
+    ms = medidor.latencia(executar) * 1000
+    teto_ms = o.ms * TESTE_FATOR_LATENCIA
+    assert ms <= teto_ms, f"{nome}: mediana de {ms:.1f} ms (teto {teto_ms:.0f} ms)"
@@ -0,0 +1,32 @@
+import time
+
+from conftest import SENHA
+
+
+def test_login_logo_apos_revogacao_do_usuario(client, auth_admin, monkeypatch):
+    r = client.post("/usuarios/register", headers=auth_admin,
+                    json={"nome": "Revogação", "login": "revogacao_imediata", "senha": SENHA})
+    assert r.status_code == 200, r.text
+    usuario_id = r.json()["id"]
+
+    # Relógio parado no meio de um segundo, avançando 1 ms por leitura: login, troca de senha
+    # (revogação de todos os tokens do usuário) e novo login caem no mesmo segundo
+    inicio = int(time.time()) + 0.25
+    leituras = iter(range(100_000))
+    monkeypatch.setattr(time, "time", lambda: inicio + next(leituras) / 1000)
+
+    r = client.post("/auth/login", json={"login": "revogacao_imediata", "senha": SENHA})
+    assert r.status_code == 200, r.text
+    antigo = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = client.put(f"/usuarios/{usuario_id}", headers=auth_admin,
+                   json={"nome": "Revogação", "senha": SENHA + "7"})
+    assert r.status_code == 200, r.text
+
+    r = client.post("/auth/login", json={"login": "revogacao_imediata", "senha": SENHA + "7"})
+    assert r.status_code == 200, r.text
+    novo = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert int(time.time()) == int(inicio)
+
+    assert client.get("/clientes", headers=antigo).status_code == 401
+    assert client.get("/clientes", headers=novo).status_code == 200
@@ -1,6 +1,7 @@
 import { Component } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { Router } from '@angular/router';
+import { UsuarioService } from 'src/app/services/usuario.service';
 
 @Component({
   selector: 'app-logout',
@@ -9,11 +10,17 @@ import { Router } from '@angular/router';
   template: `<div class="p-3">Saindo...</div>`
 })
 export class LogoutComponent {
-  constructor(private router: Router) {
-    // efetua logout imediato
-    localStorage.clear();
-    sessionStorage.clear();
-    // redireciona para login
-    this.router.navigate(['/login']);
+  constructor(private router: Router, private usuarios: UsuarioService) {
+    // encerra a sessão no servidor (refresh token deixa de valer); falha não impede a saída
+    const sair = () => {
+      localStorage.clear();
+      sessionStorage.clear();
+      this.router.navigate(['/login']);
+    };
+    if (localStorage.getItem('access_token')) {
+      this.usuarios.sair().subscribe({ next: sair, error: sair });
+    } else {
+      sair();
+    }
   }
 }
\ No newline at end of file
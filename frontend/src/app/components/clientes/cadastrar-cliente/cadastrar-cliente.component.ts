@@ -53,6 +53,7 @@ export class CadastrarClienteComponent implements OnInit, OnDestroy {
       nit: ['', [Validators.required, Validators.minLength(8)]],
       numeroBeneficio: ['', [Validators.required, Validators.minLength(5)]],
       dataNascimento: ['', Validators.required],
+      sexo: [''],
       nomeMae: ['', [Validators.required, Validators.minLength(2)]],
       nomePai: ['', [Validators.required, Validators.minLength(2)]],
       endereco: ['', [Validators.required, Validators.minLength(5)]],
@@ -114,6 +115,7 @@ export class CadastrarClienteComponent implements OnInit, OnDestroy {
       nit: cliente.nit,
       numeroBeneficio: cliente.numeroBeneficio,
       dataNascimento: dataFormatada,
+      sexo: cliente.sexo || '',
       nomeMae: cliente.nomeMae,
       nomePai: cliente.nomePai,
       endereco: cliente.endereco,
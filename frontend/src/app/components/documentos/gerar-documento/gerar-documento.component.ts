@@ -7,6 +7,7 @@ import { Subject, takeUntil } from 'rxjs';
 // project imports
 import { SharedModule } from 'src/app/theme/shared/shared.module';
 import { DocumentoJuridicoService } from 'src/app/services/documento-juridico.service';
+import { AuthService } from 'src/app/services/auth.service';
 import {
   DocumentoJuridico,
   TipoDocumento,
@@ -54,7 +55,8 @@ export class GerarDocumentoComponent implements OnInit, OnDestroy {
     private fb: FormBuilder,
     private documentoService: DocumentoJuridicoService,
     private router: Router,
-    private route: ActivatedRoute
+    private route: ActivatedRoute,
+    private auth: AuthService
   ) {
     this.inicializarFormularios();
   }
@@ -312,7 +314,7 @@ export class GerarDocumentoComponent implements OnInit, OnDestroy {
     `;
     const cabecalho = `
       <div class="doc-header">
-        ${imagemUrl ? `<div class="doc-logo"><img src="${this.escapeHtml(imagemUrl)}" alt="Imagem do Documento" /></div>` : ''}
+        ${imagemUrl ? `<div class="doc-logo"><img src="${this.escapeHtml(this.imagemSrc(imagemUrl))}" alt="Imagem do Documento" /></div>` : ''}
         <div><strong>Tipo:</strong> ${this.escapeHtml(tipo)} | <strong>Tom:</strong> ${this.escapeHtml(tom)}</div>
         <div class="doc-meta">
           <div><strong>Cliente:</strong> ${this.escapeHtml(cliente?.nomeCliente || '')}</div>
@@ -345,6 +347,15 @@ export class GerarDocumentoComponent implements OnInit, OnDestroy {
     return blocos.join('');
   }
 
+  // Imagens armazenadas no backend (/blobs/...) exigem autenticação; <img> não envia o cabeçalho
+  imagemSrc(url: string): string {
+    const token = this.auth.getToken();
+    if (!url || !token || !url.includes('/blobs/')) {
+      return url;
+    }
+    return `${url}${url.includes('?') ? '&' : '?'}access_token=${encodeURIComponent(token)}`;
+  }
+
   private escapeHtml(valor: string): string {
     return (valor || '')
       .replace(/&/g, '&amp;')
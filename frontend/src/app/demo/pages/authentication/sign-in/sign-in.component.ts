@@ -42,6 +42,9 @@ export class SignInComponent {
       if (res?.access_token) {
         this.auth.setToken(res.access_token);
       }
+      if (res?.refresh_token) {
+        this.auth.setRefreshToken(res.refresh_token);
+      }
       if (res?.usuario?.id) {
         this.auth.setUsuarioId(res.usuario.id);
       }
@@ -1,19 +1,63 @@
 import { Injectable } from '@angular/core';
-import { HttpEvent, HttpHandler, HttpInterceptor, HttpRequest } from '@angular/common/http';
-import { Observable } from 'rxjs';
+import { HttpBackend, HttpClient, HttpErrorResponse, HttpEvent, HttpHandler, HttpInterceptor, HttpRequest } from '@angular/common/http';
+import { Observable, throwError } from 'rxjs';
+import { catchError, finalize, shareReplay, switchMap, tap } from 'rxjs/operators';
+import { environment } from 'src/environments/environment';
+
+interface TokenPar {
+  access_token: string;
+  refresh_token: string;
+}
 
 @Injectable()
 export class AuthInterceptor implements HttpInterceptor {
+  // HttpBackend não passa pelos interceptors (evita recursão no /auth/refresh)
+  private http: HttpClient;
+  private renovando: Observable<TokenPar> | null = null;
+
+  constructor(backend: HttpBackend) {
+    this.http = new HttpClient(backend);
+  }
+
   intercept(req: HttpRequest<any>, next: HttpHandler): Observable<HttpEvent<any>> {
     const token = localStorage.getItem('access_token');
-    if (token) {
-      const authReq = req.clone({
-        setHeaders: {
-          Authorization: `Bearer ${token}`
+    if (!token) {
+      return next.handle(req);
+    }
+    return next.handle(this.comToken(req, token)).pipe(
+      catchError((err) => {
+        const refresh = localStorage.getItem('refresh_token');
+        if (!(err instanceof HttpErrorResponse) || err.status !== 401 || !refresh || req.url.includes('/auth/')) {
+          return throwError(() => err);
         }
-      });
-      return next.handle(authReq);
+        // Access token expirado: renova uma vez (compartilhado entre requisições) e repete
+        return this.renovar(refresh).pipe(
+          switchMap((par) => next.handle(this.comToken(req, par.access_token))),
+          catchError(() => {
+            localStorage.removeItem('access_token');
+            localStorage.removeItem('refresh_token');
+            return throwError(() => err);
+          })
+        );
+      })
+    );
+  }
+
+  private comToken(req: HttpRequest<any>, token: string): HttpRequest<any> {
+    return req.clone({ setHeaders: { Authorization: `Bearer ${token}` } });
+  }
+
+  private renovar(refresh: string): Observable<TokenPar> {
+    if (!this.renovando) {
+      this.renovando = this.http.post<TokenPar>(`${environment.apiUrl}/auth/refresh`, { refresh_token: refresh }).pipe(
+        tap((par) => {
+          localStorage.setItem('access_token', par.access_token);
+          localStorage.setItem('refresh_token', par.refresh_token);
+        }),
+        finalize(() => (this.renovando = null)),
+        shareReplay(1)
+      );
     }
-    return next.handle(req);
+    return this.renovando;
   }
-}
\ No newline at end of file
+}
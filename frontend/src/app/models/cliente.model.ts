@@ -10,6 +10,7 @@ export interface Cliente {
   nit: string;
   numeroBeneficio: string;
   dataNascimento: Date;
+  sexo?: 'M' | 'F' | null;
   nomeMae: string;
   nomePai: string;
   endereco: string;
@@ -40,6 +41,7 @@ export interface DadosFormularioCliente {
   nit: string;
   numeroBeneficio: string;
   dataNascimento: string; // String para formulário, será convertida para Date
+  sexo?: string;
   nomeMae: string;
   nomePai: string;
   endereco: string;
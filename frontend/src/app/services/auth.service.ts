@@ -6,6 +6,7 @@ export type PerfilUsuario = 'A' | 'U';
 export class AuthService {
   private perfilKey = 'perfil';
   private tokenKey = 'access_token';
+  private refreshKey = 'refresh_token';
   private usuarioIdKey = 'usuario_id';
 
   getPerfil(): PerfilUsuario {
@@ -25,6 +26,10 @@ export class AuthService {
     return localStorage.getItem(this.tokenKey);
   }
 
+  setRefreshToken(token: string) {
+    localStorage.setItem(this.refreshKey, token);
+  }
+
   setUsuarioId(id: string) {
     localStorage.setItem(this.usuarioIdKey, id);
   }
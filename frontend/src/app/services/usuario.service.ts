@@ -34,6 +34,8 @@ export interface AuthLoginRequest {
 export interface AuthTokenResponse {
   access_token: string;
   token_type: 'bearer';
+  refresh_token?: string;
+  expires_in?: number;
   usuario: Usuario;
 }
 
@@ -66,4 +68,8 @@ export class UsuarioService {
   autenticar(data: AuthLoginRequest): Observable<AuthTokenResponse> {
     return this.http.post<AuthTokenResponse>(`${environment.apiUrl}/auth/login`, data);
   }
+
+  sair(): Observable<{ ok: boolean }> {
+    return this.http.post<{ ok: boolean }>(`${environment.apiUrl}/auth/logout`, {});
+  }
 }
\ No newline at end of file
@@ -10,9 +10,12 @@ echo Starting JurixPrev backend and frontend...
 REM Change directory to repository root (this script's location)
 cd /d "%~dp0"
 
+REM Production (multiple workers): python -m backend.app serve --help
+REM Performance budgets: cd backend && pip install -r requirements-dev.txt && python -m pytest -q (set TESTE_LATENCIA=1 to also check latency)
+REM Behind a reverse proxy, list its address in --forwarded-allow-ips so login rate limiting sees the real client IP
 REM Start backend (Uvicorn) in a new window
 echo [1/3] Starting backend (Uvicorn) on http://localhost:8000
-start "Backend (Uvicorn)" cmd /c "python -m uvicorn backend.app.main:app --reload --host 0.0.0.0 --port 8000"
+start "Backend (Uvicorn)" cmd /c "python -m uvicorn backend.app.main:app --reload --host 0.0.0.0 --port 8000 --proxy-headers --forwarded-allow-ips 127.0.0.1"
 
 REM Start frontend (Angular dev server) in a new window
 echo [2/3] Starting frontend (Angular) on http://localhost:4200